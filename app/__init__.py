@@ -82,7 +82,14 @@ def create_app(config_name=None):
         try:
             # Check database connection
             db.session.execute(db.text('SELECT 1'))
-            return {'status': 'healthy', 'database': 'connected'}, 200
+            from app.services.solucao360_service import get_client_metrics
+            from app.utils.circuit_breaker import get_breakers_metrics
+            return {
+                'status': 'healthy',
+                'database': 'connected',
+                'solucao360': get_client_metrics(),
+                'circuit_breakers': get_breakers_metrics(),
+            }, 200
         except Exception as e:
             return {'status': 'unhealthy', 'database': 'disconnected', 'error': str(e)}, 503
 
@@ -90,4 +97,8 @@ def create_app(config_name=None):
     from app.utils.error_handlers import register_error_handlers
     register_error_handlers(app)
 
+    # CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+
     return app
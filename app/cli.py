@@ -0,0 +1,31 @@
+import json
+
+import click
+
+
+def register_commands(app):
+    """Registrar comandos da CLI do Flask (flask <comando>)"""
+
+    @app.cli.command('sync-reports')
+    @click.option('--workspace', 'workspace_ids', multiple=True,
+                  help='Workspace a sincronizar (repetível). Padrão: todos os já cadastrados.')
+    @click.option('--no-create', is_flag=True, help='Não cadastrar reports novos, só atualizar/marcar órfãos.')
+    def sync_reports_command(workspace_ids, no_create):
+        """Sincronizar a tabela reports com os workspaces do Power BI."""
+        from app.services.report_sync_service import sync_workspaces
+
+        summary = sync_workspaces(list(workspace_ids) or None, create_missing=not no_create)
+        click.echo(json.dumps(summary, indent=2, ensure_ascii=False))
+
+    @app.cli.command('ingest-sti-workbook')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--sheet', default=None, help='Aba da planilha. Padrão: a primeira.')
+    def ingest_sti_workbook_command(path, sheet):
+        """Ingerir a planilha de produção STI (relatorio_produção.xlsx)."""
+        import os
+
+        from app.services.sti_workbook_service import ingest_workbook
+
+        with open(path, 'rb') as f:
+            summary = ingest_workbook(f, filename=os.path.basename(path), sheet_name=sheet)
+        click.echo(json.dumps(summary, indent=2, ensure_ascii=False, default=str))
@@ -1,11 +1,18 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import MetaData, Table, create_engine
+from sqlalchemy import MetaData, Table, create_engine, event
 
 load_dotenv()
 
 dw_engine = create_engine(os.getenv("DATABASE_URL_DW"))
 
+# DW sintético local (generate_synthetic_dw.py): o arquivo SQLite é anexado
+# como o schema "dw" das tabelas abaixo
+if dw_engine.dialect.name == "sqlite" and dw_engine.url.database not in (None, "", ":memory:"):
+    @event.listens_for(dw_engine, "connect")
+    def _attach_dw_schema(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ? AS dw", (dw_engine.url.database,))
+
 dw_metadata = MetaData(schema="dw")
 
 # Colunas: cd_filial, cd_unidade, dt_matricula, dt_inicial, dt_final, nr_matricula,
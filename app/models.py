@@ -5,6 +5,10 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # Modelo de associação N:N entre usuários e unidades com bi_filter_param
 class UserUnit(db.Model):
     __tablename__ = 'user_units'
+    __table_args__ = (
+        # A PK (user_id, unit_id) não atende buscas por unidade (unit.users)
+        db.Index('ix_user_units_unit_id_user_id', 'unit_id', 'user_id'),
+    )
     
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
     unit_id = db.Column(db.Integer, db.ForeignKey('units.id'), primary_key=True)
@@ -19,7 +23,9 @@ class UserUnit(db.Model):
 report_units = db.Table('report_units',
     db.Column('report_id', db.Integer, db.ForeignKey('reports.id'), primary_key=True),
     db.Column('unit_id', db.Integer, db.ForeignKey('units.id'), primary_key=True),
-    db.Column('created_at', db.DateTime, default=datetime.utcnow)
+    db.Column('created_at', db.DateTime, default=datetime.utcnow),
+    # A PK (report_id, unit_id) não atende buscas por unidade (unit.reports)
+    db.Index('ix_report_units_unit_id_report_id', 'unit_id', 'report_id')
 )
 
 class User(db.Model):
@@ -121,13 +127,16 @@ class Report(db.Model):
     __tablename__ = 'reports'
     
     id = db.Column(db.Integer, primary_key=True)
-    step_id = db.Column(db.Integer, db.ForeignKey('steps.id'), nullable=True)
+    step_id = db.Column(db.Integer, db.ForeignKey('steps.id'), nullable=True, index=True)
     report_id = db.Column(db.String(120), nullable=False, unique=True)  # Power BI Report ID
     workspace_id = db.Column(db.String(120), nullable=False)  # Power BI Workspace ID
     dataset_id = db.Column(db.String(120))  # Power BI Dataset ID
     name = db.Column(db.String(200), nullable=False)
-    code = db.Column(db.String(120), nullable=False)
+    # Vazio (NULL) nos reports criados pela sincronização até o admin definir
+    code = db.Column(db.String(120), nullable=True)
     embed_url = db.Column(db.String(500))
+    # Marcado pela sincronização quando o report não existe mais no workspace do Power BI
+    is_orphan = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -145,6 +154,7 @@ class Report(db.Model):
             'name': self.name,
             'code': self.code,
             'embed_url': self.embed_url,
+            'is_orphan': self.is_orphan,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -153,3 +163,66 @@ class Report(db.Model):
         else:
             data['unit_ids'] = [u.id for u in self.units]
         return data
+
+class CatalogVersion(db.Model):
+    """Versão do catálogo de navegação (steps → reports → unidades).
+
+    Linha única incrementada a cada escrita no catálogo; os workers comparam
+    este número com o do snapshot em memória para saber quando reconstruí-lo.
+    """
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class StiWorkbookUpload(db.Model):
+    """Upload da planilha de produção STI (relatorio_produção.xlsx).
+
+    file_hash (SHA-256 do arquivo) é único: reenviar o mesmo arquivo não
+    reprocessa nada. Só o upload ativo (o mais recente) alimenta o realizado
+    STI; as linhas dos anteriores são removidas na ingestão seguinte.
+    """
+    __tablename__ = 'sti_workbook_uploads'
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_hash = db.Column(db.String(64), nullable=False, unique=True)
+    filename = db.Column(db.String(255))
+    sheet_name = db.Column(db.String(120))
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    rejected_count = db.Column(db.Integer, nullable=False, default=0)
+    is_active = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'file_hash': self.file_hash,
+            'filename': self.filename,
+            'sheet_name': self.sheet_name,
+            'row_count': self.row_count,
+            'rejected_count': self.rejected_count,
+            'is_active': self.is_active,
+            'uploaded_by': self.uploaded_by,
+            'created_at': self.created_at.isoformat()
+        }
+
+class StiProductionRow(db.Model):
+    """Linha normalizada da planilha de produção STI (mesmos nomes de coluna de fato_producao_stisgt)."""
+    __tablename__ = 'sti_production_rows'
+    __table_args__ = (
+        # Agregação do realizado: upload ativo → categoria → ano de apropriação
+        db.Index('ix_sti_production_rows_upload_categoria_data',
+                 'upload_id', 'ds_produtocategoria', 'dt_apropriacao'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('sti_workbook_uploads.id'), nullable=False)
+    cd_idatendimento = db.Column(db.String(60))
+    ds_produtocategoria = db.Column(db.String(120), nullable=False)
+    nm_produto = db.Column(db.String(255))
+    nm_unidadeoperacional = db.Column(db.String(255))
+    dt_apropriacao = db.Column(db.Date, nullable=False)
+    qt_dehorasensaioscalibracoes = db.Column(db.Numeric(18, 4), nullable=False, default=0)
+    vl_totalfaturamento = db.Column(db.Numeric(18, 2), nullable=False, default=0)
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, current_app, request
 from flask_jwt_extended import jwt_required
 from app.services.powerbi_service import PowerBIService
+from app.utils.circuit_breaker import CircuitOpenError
 
 bp = Blueprint('external', __name__)
 
@@ -33,6 +34,9 @@ def get_sedics_report():
 
         return jsonify(config), 200
 
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Power BI circuit open: {str(e)}")
+        return jsonify({'error': 'Power BI temporariamente indisponível', 'details': str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"Error getting SEDICS report config: {str(e)}")
         return jsonify({'error': 'Falha ao obter configuração do relatório SEDICS', 'details': str(e)}), 500
@@ -91,6 +95,9 @@ def get_embed_report():
 
         return jsonify(config), 200
 
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Power BI circuit open: {str(e)}")
+        return jsonify({'error': 'Power BI temporariamente indisponível', 'details': str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"Error getting embed config: {str(e)}")
         return jsonify({'error': 'Falha ao obter configuração de embed', 'details': str(e)}), 500
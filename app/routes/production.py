@@ -1,22 +1,47 @@
-from datetime import datetime
-
-from flask import Blueprint, jsonify, request
+import csv
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import (
+    Float, Numeric, String, and_, cast, func, literal_column, null, or_, select, true, union_all,
+)
 
 from app.dw_models import (
     dw_engine,
     fato_producao_ebdr,
     fato_producao_epdr,
     fato_producao_metaofertaeb,
+    fato_producao_metaofertassi,
     fato_producao_metaofertasti,
     fato_producao_metaproducaoep,
     fato_producao_saudecomplementar,
     fato_producao_saudeocupacional,
+    fato_producao_stisgt,
+)
+from app import db
+from app.middleware.auth import get_current_user, require_role
+from app.models import StiProductionRow, Unit
+from app.services.solucao360_service import (
+    SSI_NOME_PRODUTO_EXCLUIDOS,
+    SSI_PRODUTO_PREFIX,
+    get_previsao_ssi_cached,
+)
+from app.services.production_scope_service import resolve_scope, scope_applies, scope_predicates, scope_to_dict
+from app.services.sti_workbook_service import (
+    active_rows_filter,
+    active_upload_version,
+    forget_active_upload,
+    ingest_workbook,
+    realizado_por_categoria,
 )
-from app.middleware.auth import get_current_user
-from app.models import Unit
-from app.services.solucao360_service import sum_previsao_ssi_producao
+from app.utils import columnar
+from app.utils.cache import TTLCache
 
 bp = Blueprint('production', __name__)
 
@@ -62,6 +87,105 @@ UNIT_FILTERS_CONFIG = {
 }
 
 
+def _load_unit_config(unit_id):
+    """Valida unit_id, usuário, acesso e configuração de filtros da unidade.
+
+    Retorna (unit, config, None) ou (None, None, resposta de erro).
+    """
+    if not unit_id:
+        return None, None, (jsonify({'error': 'unit_id é obrigatório'}), 400)
+
+    user = get_current_user()
+    if not user:
+        return None, None, (jsonify({'error': 'Usuário não encontrado'}), 404)
+
+    unit = Unit.query.get(unit_id)
+    if not unit:
+        return None, None, (jsonify({'error': 'Unidade não encontrada'}), 404)
+
+    # Verificar se o usuário tem acesso a esta unidade (admin tem acesso a todas)
+    if user.role != 'admin' and unit_id not in [u.id for u in user.units]:
+        return None, None, (jsonify({'error': 'Acesso negado a esta unidade'}), 403)
+
+    config = UNIT_FILTERS_CONFIG.get(unit.name)
+    if not config:
+        return None, None, (
+            jsonify({'error': f'Configuração de filtros não encontrada para a unidade "{unit.name}"'}),
+            404,
+        )
+
+    return unit, config, None
+
+
+def _user_scope(unit):
+    """Recorte das medidas para o usuário atual na unidade (admin: sem recorte)."""
+    user = get_current_user()
+    if user.role == 'admin':
+        return None
+    return resolve_scope(unit.name, user.get_bi_filter_param(unit.id))
+
+
+def _scope_coverage(scope, meta_tables, realizado_tables):
+    """meta_scoped/realizado_scoped: se cada lado da medida é filtrado pelo recorte.
+
+    `meta_tables` None = meta externa, sempre da unidade toda. Sem recorte, {}.
+    """
+    if not scope:
+        return {}
+    return {
+        'meta_scoped': meta_tables is not None and all(scope_applies(t, scope) for t in meta_tables),
+        'realizado_scoped': all(scope_applies(t, scope) for t in realizado_tables),
+    }
+
+
+def _with_scope_coverage(result, scope, meta_tables, realizado_tables):
+    """Acrescenta a cobertura do recorte ao resultado de uma calculadora.
+
+    Se só um dos lados é recortado, realizado / meta compara a parte com o
+    todo: `resultado` fica null em vez de um percentual enganoso.
+    """
+    coverage = _scope_coverage(scope, meta_tables, realizado_tables)
+    if coverage and coverage['meta_scoped'] != coverage['realizado_scoped']:
+        result['resultado'] = None
+    result.update(coverage)
+    return result
+
+
+def _resolve_measure(config, business_filter, measure):
+    """Valida business_filter/measure contra a configuração da unidade.
+
+    Retorna (business_filter normalizado, None) ou (None, resposta de erro).
+    """
+    if config['has_business_filters']:
+        if not business_filter:
+            return None, (jsonify({'error': 'business_filter é obrigatório para esta unidade'}), 400)
+        valid_values = {f['value'] for f in config['business_filters']}
+        if business_filter not in valid_values:
+            return None, (jsonify({'error': f'business_filter inválido para esta unidade: {business_filter}'}), 400)
+        available_measures = config['measure_filters'].get(business_filter, [])
+    else:
+        business_filter = None
+        available_measures = config['measure_filters'].get('default', [])
+
+    if measure not in {m['value'] for m in available_measures}:
+        return None, (jsonify({'error': f'measure inválido para esta unidade/filtro: {measure}'}), 400)
+
+    return business_filter, None
+
+
+def _configured_measures(config):
+    """(business_filter, measure, label) de todas as medidas configuradas na unidade."""
+    if not config['has_business_filters']:
+        return [
+            (None, m['value'], m['label'])
+            for m in config['measure_filters'].get('default', [])
+        ]
+    return [
+        (f['value'], m['value'], m['label'])
+        for f in config['business_filters']
+        for m in config['measure_filters'].get(f['value'], [])
+    ]
+
 @bp.route('/filters', methods=['GET'])
 @jwt_required()
 def get_filters():
@@ -109,25 +233,9 @@ def get_filters():
       404:
         description: Unidade não encontrada ou sem configuração de filtros
     """
-    unit_id = request.args.get('unit_id', type=int)
-    if not unit_id:
-        return jsonify({'error': 'unit_id é obrigatório'}), 400
-
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
-
-    unit = Unit.query.get(unit_id)
-    if not unit:
-        return jsonify({'error': 'Unidade não encontrada'}), 404
-
-    # Verificar se o usuário tem acesso a esta unidade (admin tem acesso a todas)
-    if user.role != 'admin' and unit_id not in [u.id for u in user.units]:
-        return jsonify({'error': 'Acesso negado a esta unidade'}), 403
-
-    config = UNIT_FILTERS_CONFIG.get(unit.name)
-    if not config:
-        return jsonify({'error': f'Configuração de filtros não encontrada para a unidade "{unit.name}"'}), 404
+    unit, config, error = _load_unit_config(request.args.get('unit_id', type=int))
+    if error:
+        return error
 
     return jsonify({
         'unit_id': unit.id,
@@ -136,72 +244,124 @@ def get_filters():
     }), 200
 
 
-def _calculate_eb_matriculas():
-    """Meta, realizado e resultado para SESI Educação Básica — Matrículas.
+# Cursos EB considerados no realizado (ebdr.nm_curso)
+_EB_CURSOS_ENSINO_MEDIO = [
+    "Ensino Médio - Linguagens+Humanas - Design e Cultura Maker",
+    "Ensino Médio - Matemática+Humanas+Linguagens - Análise de Dados e Programação",
+    "Novo Ensino Médio - Formação Geral Básica",
+    "Novo Ensino Médio - Matemática",
+    "Novo Ensino Médio - Ciências da Natureza",
+    "Ensino Médio - Matemática+Natureza - Biotecnologia e Saúde",
+    "Novo Ensino Médio - Formação Técnica e Profissional",
+]
 
-    Replica o cálculo em DAX:
-      - eb_meta = SUM(metaofertaeb.qt_alunos) / 12
-      - eb_realizado2 = DISTINCTCOUNT(ebdr.nr_matricula) onde
-          YEAR(dt_inicial) = ano atual
-      - eb_resultado = realizado / meta
+_EB_CURSOS_ENSINO_FUNDAMENTAL = [
+    "Ensino Fundamental - Anos Finais",
+    "Ensino Fundamental - Anos Iniciais",
+]
+
+def _config_ttl(name):
+    """TTL de cache lido de current_app.config a cada verificação."""
+    return lambda: current_app.config.get(name, 300)
+
+
+# Matrículas e hora-aluno leem as mesmas linhas de metaofertaeb e ebdr:
+# uma consulta por ano alimenta as duas medidas
+_eb_cache = TTLCache(ttl_seconds=_config_ttl('EB_CACHE_TTL_SECONDS'), name='eb')
+
+
+def _eb_meta_filter(scope=None):
+    """Filtros do Power Query sobre metaofertaeb (e o recorte do usuário).
 
-    Aplica os filtros do Power Query sobre metaofertaeb:
       - cd_ofertaid ∉ ('9340', '9341')
       - nm_modalidade ∈ ('Ensino Fundamental', 'Ensino Médio')
     """
+    return and_(
+        fato_producao_metaofertaeb.c.cd_ofertaid.notin_(['9340', '9341']),
+        fato_producao_metaofertaeb.c.nm_modalidade.in_(
+            ['Ensino Fundamental', 'Ensino Médio']
+        ),
+        *scope_predicates(fato_producao_metaofertaeb, scope),
+    )
+
+
+def _eb_realizado_filter(current_year, scope=None):
+    """Filtros do Power Query sobre ebdr (e o recorte do usuário).
+
+      - YEAR(dt_inicial) = ano atual
+      - nm_curso ∈ lista fixa de cursos EB
+    """
+    return and_(
+        func.extract("year", fato_producao_ebdr.c.dt_inicial) == current_year,
+        fato_producao_ebdr.c.nm_curso.in_(_EB_CURSOS_ENSINO_MEDIO + _EB_CURSOS_ENSINO_FUNDAMENTAL),
+        *scope_predicates(fato_producao_ebdr, scope),
+    )
+
+
+def _eb_totals_stmt(current_year, scope=None):
+    """Agregados EB das duas medidas em uma consulta (uma passada por tabela).
+
+    Filtros em `_eb_meta_filter` e `_eb_realizado_filter`.
+    """
+    meta = select(
+        func.sum(fato_producao_metaofertaeb.c.qt_alunos).label('qt_alunos'),
+        func.sum(fato_producao_metaofertaeb.c.nr_producao).label('nr_producao'),
+    ).where(_eb_meta_filter(scope)).subquery('meta')
+
+    realizado = select(
+        func.count(func.distinct(fato_producao_ebdr.c.nr_matricula)).label('matriculas'),
+        func.sum(fato_producao_ebdr.c.nr_carga_horaria).label('carga_horaria'),
+    ).where(_eb_realizado_filter(current_year, scope)).subquery('realizado')
+
+    return select(
+        meta.c.qt_alunos, meta.c.nr_producao, realizado.c.matriculas, realizado.c.carga_horaria,
+    ).select_from(meta.join(realizado, true()))
+
+
+def _load_eb_totals(current_year, scope=None):
     with dw_engine.connect() as conn:
-        meta_stmt = select(
-            func.sum(fato_producao_metaofertaeb.c.qt_alunos)
-        ).where(
-            and_(
-                fato_producao_metaofertaeb.c.cd_ofertaid.notin_(['9340', '9341']),
-                fato_producao_metaofertaeb.c.nm_modalidade.in_(
-                    ['Ensino Fundamental', 'Ensino Médio']
-                ),
-            )
-        )
-        total_alunos = conn.execute(meta_stmt).scalar() or 0
-        meta = int(total_alunos / 12)
+        row = conn.execute(_eb_totals_stmt(current_year, scope)).one()
+    return {
+        'qt_alunos': row.qt_alunos or 0,
+        'nr_producao': row.nr_producao or 0,
+        'matriculas': row.matriculas or 0,
+        'carga_horaria': row.carga_horaria or 0,
+    }
 
-        current_year = datetime.now().year
 
-        cursos_ensino_medio = [
-            "Ensino Médio - Linguagens+Humanas - Design e Cultura Maker",
-            "Ensino Médio - Matemática+Humanas+Linguagens - Análise de Dados e Programação",
-            "Novo Ensino Médio - Formação Geral Básica",
-            "Novo Ensino Médio - Matemática",
-            "Novo Ensino Médio - Ciências da Natureza",
-            "Ensino Médio - Matemática+Natureza - Biotecnologia e Saúde",
-            "Novo Ensino Médio - Formação Técnica e Profissional",
-        ]
+def _eb_totals(current_year, scope=None):
+    return _eb_cache.get_or_load(
+        (current_year, scope), lambda: _load_eb_totals(current_year, scope)
+    ).value
 
-        cursos_ensino_fundamental = [
-            "Ensino Fundamental - Anos Finais",
-            "Ensino Fundamental - Anos Iniciais",
-        ]
 
-        realizado_stmt = select(
-            func.count(func.distinct(fato_producao_ebdr.c.nr_matricula))
-        ).where(
-            and_(
-                func.extract("year", fato_producao_ebdr.c.dt_inicial) == current_year,
-                fato_producao_ebdr.c.nm_curso.in_(cursos_ensino_medio + cursos_ensino_fundamental),
-            )
-        )
+def _calculate_eb_matriculas(scope=None):
+    """Meta, realizado e resultado para SESI Educação Básica — Matrículas.
 
-        realizado = conn.execute(realizado_stmt).scalar() or 0
+    Replica o cálculo em DAX:
+      - eb_meta = SUM(metaofertaeb.qt_alunos) / 12
+      - eb_realizado2 = DISTINCTCOUNT(ebdr.nr_matricula) onde
+          YEAR(dt_inicial) = ano atual
+      - eb_resultado = realizado / meta
+
+    Filtros do Power Query em `_eb_meta_filter` e `_eb_realizado_filter`.
+    """
+    current_year = datetime.now().year
+    totals = _eb_totals(current_year, scope)
+    meta = int(totals['qt_alunos'] / 12)
+    realizado = totals['matriculas']
 
     resultado = (realizado / meta) if meta else 0
 
-    return {
+    return _with_scope_coverage({
         'meta': meta,
         'realizado': realizado,
         'resultado': resultado,
         'year': current_year,
-    }
+    }, scope, (fato_producao_metaofertaeb,), (fato_producao_ebdr,))
 
 
-def _calculate_eb_hora_aluno():
+def _calculate_eb_hora_aluno(scope=None):
     """Meta, realizado e resultado para SESI Educação Básica — Hora-aluno.
 
     Replica o cálculo em DAX:
@@ -210,62 +370,37 @@ def _calculate_eb_hora_aluno():
           YEAR(dt_inicial) = ano atual
       - eb_realizado_x_metahoras = realizado / meta
 
-    Aplica os mesmos filtros de matrículas:
-      - metaofertaeb: cd_ofertaid ∉ ('9340','9341'), nm_modalidade ∈ ('Ensino Fundamental','Ensino Médio')
-      - ebdr: nm_curso ∈ lista fixa de cursos EB
+    Aplica os mesmos filtros de matrículas (ver `_eb_totals_stmt`).
     """
-    with dw_engine.connect() as conn:
-        meta_stmt = select(
-            func.sum(fato_producao_metaofertaeb.c.nr_producao)
-        ).where(
-            and_(
-                fato_producao_metaofertaeb.c.cd_ofertaid.notin_(['9340', '9341']),
-                fato_producao_metaofertaeb.c.nm_modalidade.in_(
-                    ['Ensino Fundamental', 'Ensino Médio']
-                ),
-            )
-        )
-        meta = conn.execute(meta_stmt).scalar() or 0
-
-        current_year = datetime.now().year
-
-        cursos_ensino_medio = [
-            "Ensino Médio - Linguagens+Humanas - Design e Cultura Maker",
-            "Ensino Médio - Matemática+Humanas+Linguagens - Análise de Dados e Programação",
-            "Novo Ensino Médio - Formação Geral Básica",
-            "Novo Ensino Médio - Matemática",
-            "Novo Ensino Médio - Ciências da Natureza",
-            "Ensino Médio - Matemática+Natureza - Biotecnologia e Saúde",
-            "Novo Ensino Médio - Formação Técnica e Profissional",
-        ]
-
-        cursos_ensino_fundamental = [
-            "Ensino Fundamental - Anos Finais",
-            "Ensino Fundamental - Anos Iniciais",
-        ]
-
-        realizado_stmt = select(
-            func.sum(fato_producao_ebdr.c.nr_carga_horaria)
-        ).where(
-            and_(
-                func.extract("year", fato_producao_ebdr.c.dt_inicial) == current_year,
-                fato_producao_ebdr.c.nm_curso.in_(cursos_ensino_medio + cursos_ensino_fundamental),
-            )
-        )
-
-        realizado = conn.execute(realizado_stmt).scalar() or 0
+    current_year = datetime.now().year
+    totals = _eb_totals(current_year, scope)
+    meta = totals['nr_producao']
+    realizado = totals['carga_horaria']
 
     resultado = (realizado / meta) if meta else 0
 
-    return {
+    return _with_scope_coverage({
         'meta': meta,
         'realizado': realizado,
         'resultado': resultado,
         'year': current_year,
-    }
+    }, scope, (fato_producao_metaofertaeb,), (fato_producao_ebdr,))
+
+
+def _ep_realizado_filter(current_year, scope=None):
+    """Filtros do Power Query sobre epdr, para o ano vigente (e o recorte do usuário)."""
+    return and_(
+        func.extract('year', fato_producao_epdr.c.dt_data) == current_year,
+        fato_producao_epdr.c.nm_unidade.notin_([
+            'Cep - Jackson Monteiro Ferreira',
+            'Cep - Napoleão Barbosa',
+        ]),
+        fato_producao_epdr.c.dt_inicial > datetime(2022, 12, 31).date(),
+        *scope_predicates(fato_producao_epdr, scope),
+    )
 
 
-def _calculate_ep_hora_aluno():
+def _calculate_ep_hora_aluno(scope=None):
     """Meta, realizado e resultado para SENAI Educação Profissional (EP) — Hora-aluno.
 
     Replica o cálculo em DAX:
@@ -280,35 +415,109 @@ def _calculate_ep_hora_aluno():
     with dw_engine.connect() as conn:
         meta_stmt = select(
             func.sum(fato_producao_metaproducaoep.c.nr_horaalunomensalalocada)
-        )
+        ).where(*scope_predicates(fato_producao_metaproducaoep, scope))
         meta = conn.execute(meta_stmt).scalar() or 0
 
         current_year = datetime.now().year
         realizado_stmt = select(
             func.sum(fato_producao_epdr.c.nr_cargahoraria)
-        ).where(
-            and_(
-                func.extract('year', fato_producao_epdr.c.dt_data) == current_year,
-                fato_producao_epdr.c.nm_unidade.notin_([
-                    'Cep - Jackson Monteiro Ferreira',
-                    'Cep - Napoleão Barbosa',
-                ]),
-                fato_producao_epdr.c.dt_inicial > datetime(2022, 12, 31).date(),
-            )
-        )
+        ).where(_ep_realizado_filter(current_year, scope))
         realizado = conn.execute(realizado_stmt).scalar() or 0
 
     resultado = (realizado / meta) if meta else 0
 
-    return {
+    return _with_scope_coverage({
         'meta': meta,
         'realizado': realizado,
         'resultado': resultado,
         'year': current_year,
-    }
+    }, scope, (fato_producao_metaproducaoep,), (fato_producao_epdr,))
 
 
-def _calculate_ssi_consultas_exames():
+def _ssi_meta_api():
+    """Meta SSI do Solução 360, sem propagar falhas.
+
+    Retorna (meta, meta_status, meta_updated_at); meta é None quando não há
+    nem valor em cache para servir.
+    """
+    try:
+        # Com valor antigo em cache (memória ou disco), falhas viram stale=True
+        cached = get_previsao_ssi_cached()
+    except Exception as e:
+        current_app.logger.warning(f"Meta SSI indisponível: {str(e)}")
+        return None, 'unavailable', None
+    updated_at = datetime.fromtimestamp(cached.stored_at).isoformat()
+    return cached.value['total'] or 0, 'stale' if cached.stale else 'ok', updated_at
+
+
+def _ssi_meta_dw_stmt(current_year, scope=None):
+    """ssi_meta no DW: SUM(metaofertassi.nr_producao) com os filtros do Power Query.
+
+    Mesmas regras aplicadas às linhas do Solução 360:
+      - cd_produto inicia com "103"
+      - nm_produto ∉ (lista de exclusões do PQ)
+    e recorte pelo ano vigente via YEAR(dt_calendario).
+    """
+    return select(
+        func.sum(fato_producao_metaofertassi.c.nr_producao)
+    ).where(
+        and_(
+            fato_producao_metaofertassi.c.cd_produto.like(f'{SSI_PRODUTO_PREFIX}%'),
+            fato_producao_metaofertassi.c.nm_produto.notin_(sorted(SSI_NOME_PRODUTO_EXCLUIDOS)),
+            func.extract('year', fato_producao_metaofertassi.c.dt_calendario) == current_year,
+            *scope_predicates(fato_producao_metaofertassi, scope),
+        )
+    )
+
+
+def _ssi_realizado_stmts(current_year, scope=None):
+    """ssi_realizado: SUM(qt_qtde) de saudecomplementar e de saudeocupacional."""
+    complementar_stmt = select(
+        func.sum(fato_producao_saudecomplementar.c.qt_qtde)
+    ).where(
+        and_(
+            fato_producao_saudecomplementar.c.st_status == 'LANCADO',
+            fato_producao_saudecomplementar.c.nm_item.notin_([
+                'PRE-CONSULTA',
+                'VACINA H1N1 MONODOSE - 2023',
+                'VACINA H1N1 MONODOSE - 2024',
+                'VACINA H1N1 MONODOSE - 2025',
+            ]),
+            fato_producao_saudecomplementar.c.nk_idlanc.isnot(None),
+            func.extract('year', fato_producao_saudecomplementar.c.dt_data) == current_year,
+            *scope_predicates(fato_producao_saudecomplementar, scope),
+        )
+    )
+    ocupacional_stmt = select(
+        func.sum(fato_producao_saudeocupacional.c.qt_qtde)
+    ).where(
+        and_(
+            fato_producao_saudeocupacional.c.st_status == 'LANCADO',
+            fato_producao_saudeocupacional.c.nm_item != 'PRE-CONSULTA',
+            fato_producao_saudeocupacional.c.nk_idlanc.isnot(None),
+            func.extract('year', fato_producao_saudeocupacional.c.dt_data) == current_year,
+            *scope_predicates(fato_producao_saudeocupacional, scope),
+        )
+    )
+    return complementar_stmt, ocupacional_stmt
+
+
+def _ssi_reconciliation(api_meta, dw_meta):
+    """Compara a meta do Solução 360 com a do DW e registra divergências no log."""
+    tolerance = current_app.config.get('SSI_META_RECONCILE_TOLERANCE', 0.01)
+    if api_meta is None:
+        return {'api': None, 'dw': dw_meta, 'difference': None, 'matches': None}
+    api_meta, dw_meta = float(api_meta), float(dw_meta)
+    difference = dw_meta - api_meta
+    matches = abs(difference) <= tolerance * max(abs(api_meta), 1)
+    if not matches:
+        current_app.logger.warning(
+            f"Meta SSI divergente: API={api_meta} DW={dw_meta} (diferença {difference})"
+        )
+    return {'api': api_meta, 'dw': dw_meta, 'difference': difference, 'matches': matches}
+
+
+def _calculate_ssi_consultas_exames(scope=None):
     """Meta, realizado e resultado para SESI Saúde — Consultas e exames (SSI).
 
     Replica os cálculos em DAX:
@@ -317,7 +526,8 @@ def _calculate_ssi_consultas_exames():
           CDS_RELORC_OFERTA_004). Aplica-se o filtro do Power Query:
             - Produto inicia com "103"
             - NomeProduto ∉ (lista de exclusões do PQ)
-          Soma todas as colunas Producao{Mês} já com os filtros aplicados.
+          Soma todas as colunas Producao{Mês} já com os filtros aplicados
+          (ProducaoMarco/ProducaoMarço contam uma vez só).
       - ssi_realizado = SUM(producao_ssi_real[qt_qtde]) onde
           producao_ssi_real = UNION(saudecomplementar, saudeocupacional)
           Filtros replicados do Power Query:
@@ -329,93 +539,214 @@ def _calculate_ssi_consultas_exames():
           Recorte pelo ano vigente via YEAR(dt_data) — replica o contexto do
           dashboard, que exibe sempre o ano corrente.
       - resultado = realizado / meta (0 quando meta vazia)
+
+    A origem da meta vem de SSI_META_SOURCE:
+      - 'api' (padrão): Solução 360. Se ele estiver fora (ou com o circuito
+        aberto), o realizado do DW é devolvido mesmo assim, com meta_status
+        'stale' (último valor em cache; meta_updated_at indica quando) ou
+        'unavailable' (meta e resultado null);
+      - 'dw': fato_producao_metaofertassi (ver `_ssi_meta_dw_stmt`), calculada
+        na mesma consulta do realizado;
+      - 'reconcile': meta do DW, mais `meta_reconciliation` com a comparação
+        contra o total do Solução 360.
+
+    O recorte do usuário filtra o realizado e a meta do DW; a meta do
+    Solução 360 é sempre a da unidade toda (`meta_scoped` false e, com o
+    realizado recortado, `resultado` null).
     """
-    meta = sum_previsao_ssi_producao() or 0
+    source = current_app.config.get('SSI_META_SOURCE', 'api')
     current_year = datetime.now().year
 
+    # Meta (quando vem do DW) e as duas parcelas do realizado em um único SELECT
+    columns = [stmt.scalar_subquery() for stmt in _ssi_realizado_stmts(current_year, scope)]
+    if source in ('dw', 'reconcile'):
+        columns.append(_ssi_meta_dw_stmt(current_year, scope).scalar_subquery())
+
     with dw_engine.connect() as conn:
-        complementar_stmt = select(
-            func.sum(fato_producao_saudecomplementar.c.qt_qtde)
-        ).where(
-            and_(
-                fato_producao_saudecomplementar.c.st_status == 'LANCADO',
-                fato_producao_saudecomplementar.c.nm_item.notin_([
-                    'PRE-CONSULTA',
-                    'VACINA H1N1 MONODOSE - 2023',
-                    'VACINA H1N1 MONODOSE - 2024',
-                    'VACINA H1N1 MONODOSE - 2025',
-                ]),
-                fato_producao_saudecomplementar.c.nk_idlanc.isnot(None),
-                func.extract('year', fato_producao_saudecomplementar.c.dt_data) == current_year,
-            )
-        )
-        ocupacional_stmt = select(
-            func.sum(fato_producao_saudeocupacional.c.qt_qtde)
-        ).where(
-            and_(
-                fato_producao_saudeocupacional.c.st_status == 'LANCADO',
-                fato_producao_saudeocupacional.c.nm_item != 'PRE-CONSULTA',
-                fato_producao_saudeocupacional.c.nk_idlanc.isnot(None),
-                func.extract('year', fato_producao_saudeocupacional.c.dt_data) == current_year,
-            )
-        )
-        realizado_comp = conn.execute(complementar_stmt).scalar() or 0
-        realizado_ocup = conn.execute(ocupacional_stmt).scalar() or 0
+        values = conn.execute(select(*columns)).one()
 
-    realizado = realizado_comp + realizado_ocup
-    resultado = (realizado / meta) if meta else 0
+    # float: o DW devolve Decimal e a meta do Solução 360 é float
+    realizado = float(values[0] or 0) + float(values[1] or 0)
 
-    return {
+    extra = {}
+    if source in ('dw', 'reconcile'):
+        meta = float(values[2] or 0)
+        meta_status, meta_updated_at = 'ok', None
+        if source == 'reconcile':
+            extra['meta_reconciliation'] = _ssi_reconciliation(_ssi_meta_api()[0], meta)
+    else:
+        meta, meta_status, meta_updated_at = _ssi_meta_api()
+        if meta is not None:
+            meta = float(meta)
+
+    if meta is None:
+        resultado = None
+    else:
+        resultado = (realizado / meta) if meta else 0
+
+    return _with_scope_coverage({
         'meta': meta,
         'realizado': realizado,
         'resultado': resultado,
         'year': current_year,
-    }
+        'meta_source': 'api' if source == 'api' else 'dw',
+        'meta_status': meta_status,
+        'meta_updated_at': meta_updated_at,
+        **extra,
+    }, scope,
+        (fato_producao_metaofertassi,) if source in ('dw', 'reconcile') else None,
+        (fato_producao_saudecomplementar, fato_producao_saudeocupacional),
+    )
+
+
+# Naturezas STI (nm_naturezaprodutosuperior na meta) e as categorias
+# (ds_produtocategoria) do SGT que compõem o realizado de cada uma
+_STI_CATEGORIAS = {
+    'Consultoria': ('Consultoria',),
+    'Metrologia': ('Metrologia',),
+}
+
+# Meta e realizado STI mudam poucas vezes ao dia e são lidos pelas duas
+# medidas da aba: uma consulta por ano a cada STI_CACHE_TTL_SECONDS
+_sti_cache = TTLCache(ttl_seconds=_config_ttl('STI_CACHE_TTL_SECONDS'), name='sti')
+
+
+def _sti_meta_filter(naturezas, scope=None):
+    """metaofertasti das naturezas informadas (e o recorte do usuário)."""
+    return and_(
+        fato_producao_metaofertasti.c.nm_naturezaprodutosuperior.in_(list(naturezas)),
+        *scope_predicates(fato_producao_metaofertasti, scope),
+    )
+
+
+def _sti_realizado_filter(categorias, current_year, scope=None):
+    """stisgt das categorias informadas no ano vigente (e o recorte do usuário)."""
+    return and_(
+        fato_producao_stisgt.c.ds_produtocategoria.in_(list(categorias)),
+        func.extract('year', fato_producao_stisgt.c.dt_apropriacao) == current_year,
+        *scope_predicates(fato_producao_stisgt, scope),
+    )
 
 
-def _sti_meta(natureza):
-    """Soma da meta STI por natureza (Consultoria / Metrologia).
+def _sti_totals_stmt(current_year, include_realizado=True, scope=None):
+    """Meta e realizado das naturezas STI em uma consulta (UNION ALL agrupado).
 
-    sti_meta = SUM(fato_producao_metaofertasti[nr_producao]) onde
-    nm_naturezaprodutosuperior = natureza.
+      - sti_meta = SUM(metaofertasti.nr_producao) por nm_naturezaprodutosuperior
+      - sti_realizado = SUM(stisgt.qt_dehorasensaioscalibracoes) e
+          SUM(stisgt.vl_totalfaturamento) por ds_produtocategoria, onde
+          YEAR(dt_apropriacao) = ano vigente
+
+    Com `include_realizado=False` (realizado vindo da planilha), só a meta.
     """
+    meta = fato_producao_metaofertasti.c
+    sgt = fato_producao_stisgt.c
+    categorias = [c for cats in _STI_CATEGORIAS.values() for c in cats]
+
+    meta_stmt = select(
+        literal_column("'meta'").label('tipo'),
+        meta.nm_naturezaprodutosuperior.label('grupo'),
+        func.sum(meta.nr_producao).label('producao'),
+        cast(null(), Numeric).label('faturamento'),
+    ).where(_sti_meta_filter(_STI_CATEGORIAS, scope)).group_by(meta.nm_naturezaprodutosuperior)
+    if not include_realizado:
+        return meta_stmt
+
+    realizado_stmt = select(
+        literal_column("'realizado'").label('tipo'),
+        sgt.ds_produtocategoria.label('grupo'),
+        func.sum(sgt.qt_dehorasensaioscalibracoes).label('producao'),
+        func.sum(sgt.vl_totalfaturamento).label('faturamento'),
+    ).where(
+        _sti_realizado_filter(categorias, current_year, scope)
+    ).group_by(sgt.ds_produtocategoria)
+
+    return union_all(meta_stmt, realizado_stmt)
+
+
+def _load_sti_totals(source, current_year, scope=None):
+    """Totais STI do ano; o realizado vem do DW (stisgt) ou da planilha ingerida."""
+    totals = {
+        natureza: {'meta': 0, 'realizado': 0, 'faturamento': 0}
+        for natureza in _STI_CATEGORIAS
+    }
+    natureza_por_categoria = {
+        categoria: natureza
+        for natureza, categorias in _STI_CATEGORIAS.items()
+        for categoria in categorias
+    }
+    from_planilha = source == 'planilha'
     with dw_engine.connect() as conn:
-        stmt = select(
-            func.sum(fato_producao_metaofertasti.c.nr_producao)
-        ).where(
-            fato_producao_metaofertasti.c.nm_naturezaprodutosuperior == natureza
-        )
-        return conn.execute(stmt).scalar() or 0
+        rows = conn.execute(
+            _sti_totals_stmt(current_year, include_realizado=not from_planilha, scope=scope)
+        ).all()
+    if from_planilha:
+        rows += [
+            ('realizado', categoria, horas, faturamento)
+            for categoria, (horas, faturamento) in realizado_por_categoria(
+                current_year, natureza_por_categoria, scope
+            ).items()
+        ]
+    # float: DW e app DB podem devolver Decimal e float para as mesmas medidas
+    for tipo, grupo, producao, faturamento in rows:
+        if tipo == 'meta':
+            totals[grupo]['meta'] += float(producao or 0)
+        else:
+            natureza = natureza_por_categoria[grupo]
+            totals[natureza]['realizado'] += float(producao or 0)
+            totals[natureza]['faturamento'] += float(faturamento or 0)
+    return totals
+
+
+def _sti_data_version():
+    """Origem do realizado STI e, na planilha, o upload ativo (parte das chaves de cache).
+
+    Um upload novo, em qualquer worker ou pelo CLI, muda a chave: os valores
+    antigos deixam de ser servidos sem esperar o TTL.
+    """
+    source = current_app.config.get('STI_REALIZADO_SOURCE', 'dw')
+    return source, active_upload_version() if source == 'planilha' else None
 
 
-# Realizado e resultado do STI dependem da planilha SharePoint
-# (relatorio_produção.xlsx em sistemafiea.sharepoint.com/sites/observatorioregional),
-# que ainda não está integrada — devolvemos placeholder até a fonte estar disponível.
-_STI_REALIZADO_PLACEHOLDER = 'Em construção'
+def _sti_totals(current_year, scope=None):
+    """{natureza: {'meta', 'realizado', 'faturamento'}} do ano, via cache.
 
+    STI_REALIZADO_SOURCE escolhe a origem do realizado: 'dw' (fato_producao_stisgt)
+    ou 'planilha' (relatorio_produção.xlsx ingerido em sti_production_rows).
+    """
+    version = _sti_data_version()
+    return _sti_cache.get_or_load(
+        (version, current_year, scope), lambda: _load_sti_totals(version[0], current_year, scope)
+    ).value
 
-def _calculate_sti_consultoria():
-    """STI Consultoria — apenas meta; realizado pendente de integração SharePoint."""
-    return {
-        'meta': _sti_meta('Consultoria'),
-        'realizado': _STI_REALIZADO_PLACEHOLDER,
-        'resultado': _STI_REALIZADO_PLACEHOLDER,
-        'year': datetime.now().year,
-    }
 
+def _calculate_sti(natureza, scope=None):
+    current_year = datetime.now().year
+    totals = _sti_totals(current_year, scope)[natureza]
+    meta, realizado = totals['meta'], totals['realizado']
+    from_planilha = current_app.config.get('STI_REALIZADO_SOURCE', 'dw') == 'planilha'
+    return _with_scope_coverage({
+        'meta': meta,
+        'realizado': realizado,
+        'resultado': (realizado / meta) if meta else 0,
+        'faturamento': totals['faturamento'],
+        'year': current_year,
+    }, scope, (fato_producao_metaofertasti,),
+        (StiProductionRow.__table__ if from_planilha else fato_producao_stisgt,))
+
+
+def _calculate_sti_consultoria(scope=None):
+    """STI Consultoria — meta (metaofertasti) e realizado (stisgt ou planilha); ver `_sti_totals`."""
+    return _calculate_sti('Consultoria', scope)
 
-def _calculate_sti_servicos_metrologia():
-    """STI Metrologia — apenas meta; realizado pendente de integração SharePoint."""
-    return {
-        'meta': _sti_meta('Metrologia'),
-        'realizado': _STI_REALIZADO_PLACEHOLDER,
-        'resultado': _STI_REALIZADO_PLACEHOLDER,
-        'year': datetime.now().year,
-    }
+
+def _calculate_sti_servicos_metrologia(scope=None):
+    """STI Metrologia — meta (metaofertasti) e realizado (stisgt ou planilha); ver `_sti_totals`."""
+    return _calculate_sti('Metrologia', scope)
 
 
 # Mapa de calculadoras por (unit_name, business_filter, measure).
 # business_filter é None quando a unidade não tem filtro de negócio.
+# Cada calculadora recebe o recorte do usuário (None = unidade toda).
 _SUMMARY_CALCULATORS = {
     ('SESI Educação Básica', None, 'matriculas'): _calculate_eb_matriculas,
     ('SESI Educação Básica', None, 'hora_aluno'): _calculate_eb_hora_aluno,
@@ -425,6 +756,90 @@ _SUMMARY_CALCULATORS = {
     ('SENAI Educação Profissional e STI', 'STI', 'servicos_metrologia'): _calculate_sti_servicos_metrologia,
 }
 
+# Resultado de cada calculadora por ano e recorte, compartilhado por /summary e
+# /summary/all (usuários com o mesmo recorte compartilham as entradas)
+_summary_cache = TTLCache(ttl_seconds=_config_ttl('PRODUCTION_CACHE_TTL_SECONDS'), name='production')
+
+# Versão dos dados de cada calculadora que muda fora do DW (entra na chave do cache)
+_CALCULATOR_DATA_VERSIONS = {
+    key: _sti_data_version
+    for key, calculator in _SUMMARY_CALCULATORS.items()
+    if calculator in (_calculate_sti_consultoria, _calculate_sti_servicos_metrologia)
+}
+
+
+def _run_calculator(key, scope=None):
+    """Resultado da calculadora `key` no recorte `scope`, via cache.
+
+    Resultados com meta externa degradada (stale/unavailable) não ficam no
+    cache, para a próxima chamada tentar de novo a fonte.
+    """
+    data_version = _CALCULATOR_DATA_VERSIONS.get(key)
+    cache_key = (key, datetime.now().year, scope, data_version() if data_version else None)
+    result = _summary_cache.get_or_load(
+        cache_key, lambda: _SUMMARY_CALCULATORS[key](scope)
+    ).value
+    if result.get('meta_status') in ('stale', 'unavailable'):
+        _summary_cache.invalidate(cache_key)
+    return {**result, 'scope': scope_to_dict(scope)}
+
+
+def _run_calculators(keys, max_workers=None, scope=None):
+    """Executa várias calculadoras em paralelo, cada uma no contexto da app.
+
+    Retorna {key: (resultado, erro, segundos)}; a falha de uma calculadora não
+    afeta as demais. Calculadoras que leem as mesmas tabelas compartilham a
+    consulta pelos caches de `_eb_totals`/`_sti_totals`.
+    """
+    app = current_app._get_current_object()
+    keys = list(dict.fromkeys(keys))
+    max_workers = max_workers or app.config.get('PRODUCTION_MAX_WORKERS', 6)
+
+    def run(key):
+        started = time.monotonic()
+        with app.app_context():
+            try:
+                result, error = _run_calculator(key, scope), None
+            except Exception as e:
+                app.logger.error(f"Error calculating {key}: {str(e)}")
+                result, error = None, str(e)
+        return result, error, round(time.monotonic() - started, 3)
+
+    if not keys:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        futures = {key: pool.submit(run, key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def _calculator_keys(unit_name, config):
+    """Chaves de `_SUMMARY_CALCULATORS` das medidas configuradas na unidade."""
+    return [
+        (unit_name, business_filter, measure)
+        for business_filter, measure, _ in _configured_measures(config)
+        if (unit_name, business_filter, measure) in _SUMMARY_CALCULATORS
+    ]
+
+
+def _measure_entries(unit_name, config, results):
+    """Entradas de `measures` (/summary/all, /overview) a partir de `_run_calculators`."""
+    measures = []
+    for business_filter, measure, label in _configured_measures(config):
+        entry = {'business_filter': business_filter, 'measure': measure, 'label': label}
+        key = (unit_name, business_filter, measure)
+        if key not in results:
+            entry['error'] = 'Cálculo ainda não implementado para esta combinação'
+        else:
+            result, calc_error, elapsed = results[key]
+            entry['elapsed_seconds'] = elapsed
+            if calc_error:
+                entry['error'] = 'Falha ao calcular a medida'
+                entry['details'] = calc_error
+            else:
+                entry.update(result)
+        measures.append(entry)
+    return measures
+
 
 @bp.route('/summary', methods=['GET'])
 @jwt_required()
@@ -473,6 +888,29 @@ def get_production_summary():
               type: number
             year:
               type: integer
+            meta_status:
+              type: string
+              description: "Só para medidas com meta externa (SSI): ok, stale (último valor em cache) ou unavailable (meta e resultado null)"
+            meta_updated_at:
+              type: string
+            faturamento:
+              type: number
+              description: "STI: SUM(vl_totalfaturamento) do realizado no ano"
+            meta_source:
+              type: string
+              description: "SSI: origem da meta (api ou dw, conforme SSI_META_SOURCE)"
+            meta_reconciliation:
+              type: object
+              description: "SSI com SSI_META_SOURCE=reconcile: metas da API e do DW e a diferença"
+            scope:
+              type: object
+              description: "Recorte aplicado ({coluna: [valores]}, a partir do bi_filter_param do usuário); null = unidade toda"
+            meta_scoped:
+              type: boolean
+              description: "Só com recorte: se a meta foi filtrada por ele (false = meta da unidade toda, ex.: Solução 360 ou tabela sem a coluna)"
+            realizado_scoped:
+              type: boolean
+              description: "Só com recorte: se o realizado foi filtrado por ele; quando difere de meta_scoped, resultado é null"
       400:
         description: Parâmetros inválidos
       403:
@@ -491,37 +929,16 @@ def get_production_summary():
     if not measure:
         return jsonify({'error': 'measure é obrigatório'}), 400
 
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
-
-    unit = Unit.query.get(unit_id)
-    if not unit:
-        return jsonify({'error': 'Unidade não encontrada'}), 404
-
-    if user.role != 'admin' and unit_id not in [u.id for u in user.units]:
-        return jsonify({'error': 'Acesso negado a esta unidade'}), 403
-
-    config = UNIT_FILTERS_CONFIG.get(unit.name)
-    if not config:
-        return jsonify({'error': f'Configuração de filtros não encontrada para a unidade "{unit.name}"'}), 404
+    unit, config, error = _load_unit_config(unit_id)
+    if error:
+        return error
 
-    if config['has_business_filters']:
-        if not business_filter:
-            return jsonify({'error': 'business_filter é obrigatório para esta unidade'}), 400
-        valid_values = {f['value'] for f in config['business_filters']}
-        if business_filter not in valid_values:
-            return jsonify({'error': f'business_filter inválido para esta unidade: {business_filter}'}), 400
-        available_measures = config['measure_filters'].get(business_filter, [])
-    else:
-        business_filter = None
-        available_measures = config['measure_filters'].get('default', [])
-
-    if measure not in {m['value'] for m in available_measures}:
-        return jsonify({'error': f'measure inválido para esta unidade/filtro: {measure}'}), 400
+    business_filter, error = _resolve_measure(config, business_filter, measure)
+    if error:
+        return error
 
-    calculator = _SUMMARY_CALCULATORS.get((unit.name, business_filter, measure))
-    if not calculator:
+    key = (unit.name, business_filter, measure)
+    if key not in _SUMMARY_CALCULATORS:
         return jsonify({
             'error': 'Cálculo ainda não implementado para esta combinação',
             'unit_name': unit.name,
@@ -529,7 +946,7 @@ def get_production_summary():
             'measure': measure,
         }), 501
 
-    result = calculator()
+    result = _run_calculator(key, _user_scope(unit))
 
     return jsonify({
         'unit_id': unit.id,
@@ -538,3 +955,727 @@ def get_production_summary():
         'measure': measure,
         **result,
     }), 200
+
+
+@bp.route('/summary/all', methods=['GET'])
+@jwt_required()
+def get_production_summary_all():
+    """
+    Obter o resumo de produção de todas as medidas configuradas da unidade
+    Equivale a chamar /summary para cada filtro de negócio e medida, com as
+    calculadoras executadas em paralelo.
+    ---
+    tags:
+      - Production
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: unit_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Meta, realizado e resultado de cada medida
+        schema:
+          type: object
+          properties:
+            unit_id:
+              type: integer
+            unit_name:
+              type: string
+            has_business_filters:
+              type: boolean
+            measures:
+              type: array
+              description: "Uma entrada por medida (business_filter, measure, label, elapsed_seconds e os campos de /summary). Medidas sem cálculo ou que falharam trazem error."
+              items:
+                type: object
+            elapsed_seconds:
+              type: number
+      400:
+        description: unit_id ausente
+      403:
+        description: Usuário não tem acesso à unidade
+      404:
+        description: Unidade não encontrada ou sem configuração de filtros
+    """
+    started = time.monotonic()
+    unit, config, error = _load_unit_config(request.args.get('unit_id', type=int))
+    if error:
+        return error
+
+    results = _run_calculators(_calculator_keys(unit.name, config), scope=_user_scope(unit))
+
+    return jsonify({
+        'unit_id': unit.id,
+        'unit_name': unit.name,
+        'has_business_filters': config['has_business_filters'],
+        'measures': _measure_entries(unit.name, config, results),
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }), 200
+
+
+@bp.route('/overview', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def get_production_overview():
+    """
+    Obter o resumo de produção de todas as unidades e medidas (apenas admin)
+    Cada calculadora roda uma única vez, em um pool limitado
+    (PRODUCTION_MAX_WORKERS), mesmo que várias unidades a usem.
+    ---
+    tags:
+      - Production
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Medidas por unidade e tempo de cada calculadora
+        schema:
+          type: object
+          properties:
+            units:
+              type: array
+              description: "Uma entrada por unidade com configuração (unit_id, unit_name, has_business_filters e measures, como em /summary/all)"
+              items:
+                type: object
+            timings:
+              type: array
+              description: "Tempo (segundos) de cada calculadora executada; inclui o tempo de espera por consultas compartilhadas"
+              items:
+                type: object
+            elapsed_seconds:
+              type: number
+      403:
+        description: Apenas admin
+    """
+    started = time.monotonic()
+    units = [
+        (unit, UNIT_FILTERS_CONFIG[unit.name])
+        for unit in Unit.query.order_by(Unit.id).all()
+        if unit.name in UNIT_FILTERS_CONFIG
+    ]
+
+    results = _run_calculators(
+        key for unit, config in units for key in _calculator_keys(unit.name, config)
+    )
+
+    return jsonify({
+        'units': [
+            {
+                'unit_id': unit.id,
+                'unit_name': unit.name,
+                'has_business_filters': config['has_business_filters'],
+                'measures': _measure_entries(unit.name, config, results),
+            }
+            for unit, config in units
+        ],
+        'timings': [
+            {
+                'unit_name': unit_name,
+                'business_filter': business_filter,
+                'measure': measure,
+                'elapsed_seconds': elapsed,
+                'ok': error is None,
+            }
+            for (unit_name, business_filter, measure), (_, error, elapsed) in results.items()
+        ],
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }), 200
+
+
+# Drill-down unidade → área → curso. Cada medida declara, por fato, a coluna
+# somada e o filtro; a hierarquia inteira sai de uma consulta por tabela.
+_DRILLDOWN_LEVELS = ('nm_unidade', 'nm_area', 'nm_curso')
+
+# Dialetos com GROUP BY ROLLUP(...); nos demais (ex.: SQLite) os níveis são
+# calculados por um UNION ALL de GROUP BYs, ainda em um único statement
+_ROLLUP_DIALECTS = {'mssql', 'postgresql', 'oracle'}
+
+# Rótulo dos valores nulos nas dimensões (para poder navegar até eles)
+_DRILLDOWN_NULL_LABEL = 'Não informado'
+
+_DRILLDOWN_PAGE_SIZE = 50
+_DRILLDOWN_MAX_PAGE_SIZE = 500
+
+_drilldown_cache = TTLCache(ttl_seconds=_config_ttl('PRODUCTION_CACHE_TTL_SECONDS'), name='drilldown')
+
+
+def _ep_hora_aluno_drilldown_sources(current_year, scope=None):
+    """(medida, tabela, coluna somada, filtro) do drill-down de EP hora-aluno."""
+    meta_scope = scope_predicates(fato_producao_metaproducaoep, scope)
+    return [
+        ('meta', fato_producao_metaproducaoep,
+         fato_producao_metaproducaoep.c.nr_horaalunomensalalocada,
+         and_(*meta_scope) if meta_scope else None),
+        ('realizado', fato_producao_epdr,
+         fato_producao_epdr.c.nr_cargahoraria, _ep_realizado_filter(current_year, scope)),
+    ]
+
+
+_DRILLDOWNS = {
+    ('SENAI Educação Profissional e STI', 'EP', 'hora_aluno'): _ep_hora_aluno_drilldown_sources,
+}
+
+
+def _rollup_stmt(table, value, where):
+    """SUM(value) em todos os níveis de `_DRILLDOWN_LEVELS` (com subtotais e total).
+
+    Cada linha traz as dimensões, uma flag g_<dimensão> (1 = nível agregado,
+    como GROUPING()) e o total.
+    """
+    dims = [table.c[name] for name in _DRILLDOWN_LEVELS]
+
+    if dw_engine.dialect.name in _ROLLUP_DIALECTS:
+        stmt = select(
+            *[dim.label(name) for dim, name in zip(dims, _DRILLDOWN_LEVELS)],
+            *[func.grouping(dim).label(f'g_{name}') for dim, name in zip(dims, _DRILLDOWN_LEVELS)],
+            func.sum(value).label('total'),
+        ).group_by(func.rollup(*dims))
+        return stmt.where(where) if where is not None else stmt
+
+    parts = []
+    for depth in range(len(dims), -1, -1):
+        columns = [
+            (dim if i < depth else cast(null(), dim.type)).label(name)
+            for i, (dim, name) in enumerate(zip(dims, _DRILLDOWN_LEVELS))
+        ]
+        flags = [
+            literal_column('0' if i < depth else '1').label(f'g_{name}')
+            for i, name in enumerate(_DRILLDOWN_LEVELS)
+        ]
+        part = select(*columns, *flags, func.sum(value).label('total'))
+        if where is not None:
+            part = part.where(where)
+        if depth:
+            part = part.group_by(*dims[:depth])
+        parts.append(part)
+    return union_all(*parts)
+
+
+def _load_drilldown(key, current_year, scope=None):
+    """{caminho: {'meta', 'realizado'}} para todos os nós (caminho () = total)."""
+    nodes = {}
+    with dw_engine.connect() as conn:
+        for measure, table, value, where in _DRILLDOWNS[key](current_year, scope):
+            for row in conn.execute(_rollup_stmt(table, value, where)).mappings():
+                path = []
+                for name in _DRILLDOWN_LEVELS:
+                    if row[f'g_{name}']:
+                        break
+                    path.append(row[name] if row[name] is not None else _DRILLDOWN_NULL_LABEL)
+                node = nodes.setdefault(tuple(path), {'meta': 0.0, 'realizado': 0.0})
+                node[measure] += float(row['total'] or 0)
+    return nodes
+
+
+def _drilldown_nodes(key, scope=None):
+    current_year = datetime.now().year
+    cached = _drilldown_cache.get_or_load(
+        (key, current_year, scope), lambda: _load_drilldown(key, current_year, scope)
+    )
+    return cached.value, current_year
+
+
+_DRILLDOWN_FORMATS = {'json': 'application/json', **columnar.COLUMNAR_FORMATS}
+
+# Colunas dos filhos na saída Arrow/Parquet
+_DRILLDOWN_COLUMNS = [
+    ('name', String()), ('meta', Float()), ('realizado', Float()), ('resultado', Float()),
+]
+
+
+def _drilldown_entry(name, totals, comparable=True):
+    meta, realizado = totals['meta'], totals['realizado']
+    return {
+        'name': name,
+        'meta': meta,
+        'realizado': realizado,
+        'resultado': ((realizado / meta) if meta else 0) if comparable else None,
+    }
+
+
+@bp.route('/drilldown', methods=['GET'])
+@jwt_required()
+def get_production_drilldown():
+    """
+    Detalhar meta e realizado por unidade → área → curso
+    Sem nm_unidade, devolve as unidades; com nm_unidade, as áreas da unidade;
+    com nm_unidade e nm_area, os cursos (paginados). A hierarquia inteira vem
+    de uma consulta ROLLUP por tabela, cacheada.
+    Em Arrow IPC ou Parquet (Accept ou `format`), as linhas são os filhos e o
+    restante da resposta vai nos metadados do schema.
+    ---
+    tags:
+      - Production
+    security:
+      - Bearer: []
+    produces:
+      - application/json
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
+    parameters:
+      - in: query
+        name: unit_id
+        type: integer
+        required: true
+      - in: query
+        name: measure
+        type: string
+        required: true
+        description: "Medida com detalhamento (hoje: hora_aluno de EP)"
+      - in: query
+        name: business_filter
+        type: string
+        required: false
+      - in: query
+        name: nm_unidade
+        type: string
+        required: false
+      - in: query
+        name: nm_area
+        type: string
+        required: false
+        description: Exige nm_unidade
+      - in: query
+        name: page
+        type: integer
+        required: false
+        description: Página dos cursos (nível folha)
+      - in: query
+        name: page_size
+        type: integer
+        required: false
+      - in: query
+        name: format
+        type: string
+        enum: [json, arrow, parquet]
+        required: false
+        description: "Sobrepõe o header Accept (padrão json)"
+    responses:
+      200:
+        description: Totais do nó e seus filhos
+      400:
+        description: Parâmetros inválidos
+      403:
+        description: Usuário não tem acesso à unidade
+      404:
+        description: Unidade ou nó não encontrado
+      406:
+        description: Formato não suportado (Arrow/Parquet exigem pyarrow no servidor)
+      501:
+        description: Medida sem detalhamento
+    """
+    unit_id = request.args.get('unit_id', type=int)
+    measure = request.args.get('measure')
+    if not unit_id:
+        return jsonify({'error': 'unit_id é obrigatório'}), 400
+    if not measure:
+        return jsonify({'error': 'measure é obrigatório'}), 400
+
+    unit, config, error = _load_unit_config(unit_id)
+    if error:
+        return error
+    business_filter, error = _resolve_measure(config, request.args.get('business_filter'), measure)
+    if error:
+        return error
+
+    key = (unit.name, business_filter, measure)
+    if key not in _DRILLDOWNS:
+        return jsonify({'error': 'Detalhamento não disponível para esta medida'}), 501
+
+    fmt, error = _response_format(_DRILLDOWN_FORMATS, 'json')
+    if error:
+        return error
+
+    path = []
+    for name in _DRILLDOWN_LEVELS[:-1]:
+        value = request.args.get(name)
+        if not value:
+            break
+        path.append(value)
+    if len(path) < len(_DRILLDOWN_LEVELS) - 1 and request.args.get(_DRILLDOWN_LEVELS[len(path) + 1]):
+        return jsonify({'error': f'{_DRILLDOWN_LEVELS[len(path) + 1]} exige {_DRILLDOWN_LEVELS[len(path)]}'}), 400
+    path = tuple(path)
+
+    scope = _user_scope(unit)
+    nodes, current_year = _drilldown_nodes(key, scope)
+    if path not in nodes:
+        return jsonify({'error': 'Nó não encontrado'}), 404
+    sources = _DRILLDOWNS[key](current_year, scope)
+    coverage = _scope_coverage(
+        scope,
+        [table for name, table, _, _ in sources if name == 'meta'],
+        [table for name, table, _, _ in sources if name == 'realizado'],
+    )
+    comparable = coverage.get('meta_scoped') == coverage.get('realizado_scoped')
+
+    children = sorted(
+        (child_path[-1], totals)
+        for child_path, totals in nodes.items()
+        if len(child_path) == len(path) + 1 and child_path[:len(path)] == path
+    )
+    level = _DRILLDOWN_LEVELS[len(path)]
+
+    pagination = None
+    if len(path) == len(_DRILLDOWN_LEVELS) - 1:
+        page = max(request.args.get('page', 1, type=int), 1)
+        page_size = request.args.get('page_size', _DRILLDOWN_PAGE_SIZE, type=int)
+        page_size = min(max(page_size, 1), _DRILLDOWN_MAX_PAGE_SIZE)
+        total = len(children)
+        children = children[(page - 1) * page_size:page * page_size]
+        pagination = {
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'pages': (total + page_size - 1) // page_size,
+        }
+
+    response = {
+        'unit_id': unit.id,
+        'unit_name': unit.name,
+        'business_filter': business_filter,
+        'measure': measure,
+        'year': current_year,
+        'scope': scope_to_dict(scope),
+        **coverage,
+        'path': dict(zip(_DRILLDOWN_LEVELS, path)),
+        'level': level,
+        'node': _drilldown_entry(path[-1] if path else None, nodes[path], comparable),
+        'pagination': pagination,
+    }
+    if fmt != 'json':
+        rows = [
+            (name, totals['meta'], totals['realizado'], _drilldown_entry(name, totals, comparable)['resultado'])
+            for name, totals in children
+        ]
+        return Response(
+            columnar.COLUMNAR_WRITERS[fmt](_DRILLDOWN_COLUMNS, [rows], metadata=response),
+            mimetype=columnar.COLUMNAR_FORMATS[fmt],
+        )
+
+    response['children'] = [_drilldown_entry(name, totals, comparable) for name, totals in children]
+    return jsonify(response), 200
+
+
+# Exportação das linhas de fato por trás de cada medida, com os mesmos filtros
+# (e recorte) das calculadoras. Cada fonte: (nome, engine, tabela, filtro).
+def _eb_export_sources(current_year, scope=None):
+    return [
+        ('realizado', dw_engine, fato_producao_ebdr, _eb_realizado_filter(current_year, scope)),
+        ('meta', dw_engine, fato_producao_metaofertaeb, _eb_meta_filter(scope)),
+    ]
+
+
+def _ep_hora_aluno_export_sources(current_year, scope=None):
+    meta_scope = scope_predicates(fato_producao_metaproducaoep, scope)
+    return [
+        ('realizado', dw_engine, fato_producao_epdr, _ep_realizado_filter(current_year, scope)),
+        ('meta', dw_engine, fato_producao_metaproducaoep, and_(true(), *meta_scope)),
+    ]
+
+
+def _ssi_export_sources(current_year, scope=None):
+    complementar_stmt, ocupacional_stmt = _ssi_realizado_stmts(current_year, scope)
+    return [
+        ('realizado_complementar', dw_engine, fato_producao_saudecomplementar,
+         complementar_stmt.whereclause),
+        ('realizado_ocupacional', dw_engine, fato_producao_saudeocupacional,
+         ocupacional_stmt.whereclause),
+        ('meta', dw_engine, fato_producao_metaofertassi,
+         _ssi_meta_dw_stmt(current_year, scope).whereclause),
+    ]
+
+
+def _sti_export_sources(natureza):
+    def sources(current_year, scope=None):
+        categorias = _STI_CATEGORIAS[natureza]
+        if current_app.config.get('STI_REALIZADO_SOURCE', 'dw') == 'planilha':
+            realizado = ('realizado', db.engine, StiProductionRow.__table__,
+                         active_rows_filter(current_year, categorias, scope))
+        else:
+            realizado = ('realizado', dw_engine, fato_producao_stisgt,
+                         _sti_realizado_filter(categorias, current_year, scope))
+        return [
+            realizado,
+            ('meta', dw_engine, fato_producao_metaofertasti, _sti_meta_filter((natureza,), scope)),
+        ]
+    return sources
+
+
+_EXPORT_SOURCES = {
+    ('SESI Educação Básica', None, 'matriculas'): _eb_export_sources,
+    ('SESI Educação Básica', None, 'hora_aluno'): _eb_export_sources,
+    ('SESI Saúde', None, 'consultas_exames'): _ssi_export_sources,
+    ('SENAI Educação Profissional e STI', 'EP', 'hora_aluno'): _ep_hora_aluno_export_sources,
+    ('SENAI Educação Profissional e STI', 'STI', 'consultoria'): _sti_export_sources('Consultoria'),
+    ('SENAI Educação Profissional e STI', 'STI', 'servicos_metrologia'): _sti_export_sources('Metrologia'),
+}
+
+# Dados pessoais (LGPD) ficam fora da exportação: alunos/pacientes, contato,
+# médicos e responsáveis do atendimento e a observação livre (dados clínicos)
+_EXPORT_EXCLUDED_COLUMNS = {
+    'nm_aluno', 'nm_paciente', 'cd_cpf', 'cd_cpfcnpj', 'dt_nasc', 'nm_email', 'nr_telefone',
+    'nm_medicoexecutante', 'nr_medicoexecutante', 'nm_medico_solicitante', 'nr_medicosolicitante',
+    'nm_responsavel', 'nm_obsatend',
+}
+
+# Linhas lidas do cursor por vez (e por pedaço enviado ao cliente)
+_EXPORT_BATCH_SIZE = 5000
+
+_EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    **columnar.COLUMNAR_FORMATS,
+}
+
+
+def _negotiate_format(formats, default):
+    """Formato pelo parâmetro `format` ou pelo Accept; None se não houver um aceitável."""
+    requested = request.args.get('format')
+    if requested:
+        return requested if requested in formats else None
+    if not request.accept_mimetypes:
+        return default
+    # O padrão vem primeiro: em empate (ex.: */*) é ele o escolhido
+    offered = sorted(formats, key=lambda name: name != default)
+    by_mimetype = {formats[name]: name for name in offered}
+    best = request.accept_mimetypes.best_match(list(by_mimetype))
+    return by_mimetype.get(best)
+
+
+def _response_format(formats, default):
+    """(formato negociado, None) ou (None, resposta 406)."""
+    fmt = _negotiate_format(formats, default)
+    if fmt is None:
+        return None, (jsonify({'error': f'Formato não suportado; use um de: {", ".join(formats)}'}), 406)
+    if fmt in columnar.COLUMNAR_FORMATS and not columnar.available():
+        return None, (jsonify({'error': f'Formato {fmt} indisponível: pyarrow não está instalado no servidor'}), 406)
+    return fmt, None
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def _export_rows(engine, stmt, batch_size=_EXPORT_BATCH_SIZE):
+    """Lotes de linhas de `stmt` por cursor do lado do servidor (memória constante)."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for batch in result.partitions():
+            yield batch
+
+
+def _export_csv(engine, stmt, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Cabeçalho sai antes da consulta: o cliente recebe bytes na hora
+    writer.writerow([column.name for column in columns])
+    yield buffer.getvalue()
+    for batch in _export_rows(engine, stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+
+def _export_ndjson(engine, stmt, columns):
+    columns = [column.name for column in columns]
+    for batch in _export_rows(engine, stmt):
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + '\n'
+            for row in batch
+        )
+
+
+def _export_columnar(fmt):
+    def write(engine, stmt, columns):
+        return columnar.COLUMNAR_WRITERS[fmt](
+            [(column.name, column.type) for column in columns], _export_rows(engine, stmt)
+        )
+    return write
+
+
+_EXPORT_WRITERS = {
+    'csv': _export_csv,
+    'ndjson': _export_ndjson,
+    'arrow': _export_columnar('arrow'),
+    'parquet': _export_columnar('parquet'),
+}
+
+
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_production_rows():
+    """
+    Exportar as linhas de fato por trás de uma medida (CSV, NDJSON, Arrow IPC ou Parquet)
+    Usa os mesmos filtros (e o recorte do usuário) do cálculo em /summary. As
+    linhas são lidas do DW em lotes e enviadas conforme chegam. Colunas com
+    dados pessoais (nome de aluno/paciente, CPF, contato, médicos e
+    responsável, observações do atendimento) não são exportadas.
+    ---
+    tags:
+      - Production
+    security:
+      - Bearer: []
+    produces:
+      - text/csv
+      - application/x-ndjson
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
+    parameters:
+      - in: query
+        name: unit_id
+        type: integer
+        required: true
+      - in: query
+        name: measure
+        type: string
+        required: true
+      - in: query
+        name: business_filter
+        type: string
+        required: false
+      - in: query
+        name: source
+        type: string
+        required: false
+        description: "Tabela da medida: realizado (padrão), meta ou, em SSI, realizado_complementar/realizado_ocupacional"
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson, arrow, parquet]
+        required: false
+        description: "Sobrepõe o header Accept (padrão csv); arrow/parquet exigem pyarrow no servidor"
+    responses:
+      200:
+        description: Linhas da tabela, em streaming
+      400:
+        description: Parâmetros inválidos
+      403:
+        description: Usuário não tem acesso à unidade
+      404:
+        description: Unidade não encontrada
+      406:
+        description: Formato não suportado
+      501:
+        description: Medida sem exportação
+    """
+    unit_id = request.args.get('unit_id', type=int)
+    measure = request.args.get('measure')
+    if not unit_id:
+        return jsonify({'error': 'unit_id é obrigatório'}), 400
+    if not measure:
+        return jsonify({'error': 'measure é obrigatório'}), 400
+
+    unit, config, error = _load_unit_config(unit_id)
+    if error:
+        return error
+    business_filter, error = _resolve_measure(config, request.args.get('business_filter'), measure)
+    if error:
+        return error
+
+    key = (unit.name, business_filter, measure)
+    if key not in _EXPORT_SOURCES:
+        return jsonify({'error': 'Exportação não disponível para esta medida'}), 501
+
+    fmt, error = _response_format(_EXPORT_FORMATS, 'csv')
+    if error:
+        return error
+
+    current_year = datetime.now().year
+    sources = {
+        name: (engine, table, where)
+        for name, engine, table, where in _EXPORT_SOURCES[key](current_year, _user_scope(unit))
+    }
+    source = request.args.get('source')
+    if source is None:
+        source = next(name for name in sources if name.startswith('realizado'))
+    if source not in sources:
+        return jsonify({'error': f'source inválido; use um de: {", ".join(sources)}'}), 400
+
+    engine, table, where = sources[source]
+    columns = [column for column in table.c if column.name not in _EXPORT_EXCLUDED_COLUMNS]
+    stmt = select(*columns).where(where)
+
+    filename = f'{table.name}_{current_year}.{fmt}'
+    return Response(
+        stream_with_context(_EXPORT_WRITERS[fmt](engine, stmt, columns)),
+        mimetype=_EXPORT_FORMATS[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            # Proxies (nginx) não devem acumular a resposta antes de enviar
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+@bp.route('/sti/workbook', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def upload_sti_workbook():
+    """
+    Enviar a planilha de produção STI (relatorio_produção.xlsx) (apenas admin)
+    A planilha é lida uma vez, em streaming, e suas linhas normalizadas
+    substituem as do upload anterior. Reenviar o mesmo arquivo (mesmo SHA-256)
+    não reprocessa nada. Usada como realizado STI com STI_REALIZADO_SOURCE=planilha.
+    ---
+    tags:
+      - Production
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+    parameters:
+      - in: formData
+        name: file
+        type: file
+        required: true
+        description: Planilha .xlsx
+      - in: formData
+        name: sheet
+        type: string
+        required: false
+        description: Nome da aba (padrão - a primeira)
+    responses:
+      200:
+        description: Arquivo já ingerido (skipped=true)
+      201:
+        description: Planilha ingerida; inclui contagem de linhas e erros por linha
+      400:
+        description: Arquivo ausente, inválido ou sem o cabeçalho esperado
+    """
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({'error': 'Arquivo é obrigatório (campo file)'}), 400
+    if not file.filename.lower().endswith(('.xlsx', '.xlsm')):
+        return jsonify({'error': 'Envie uma planilha .xlsx'}), 400
+
+    user = get_current_user()
+    try:
+        summary = ingest_workbook(
+            file.stream,
+            filename=file.filename,
+            uploaded_by=user.id if user else None,
+            sheet_name=request.form.get('sheet') or None,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error ingesting STI workbook: {str(e)}")
+        return jsonify({'error': 'Falha ao processar a planilha', 'details': str(e)}), 500
+
+    if not summary['skipped']:
+        # Os demais workers veem o upload novo pela chave dos caches
+        # (ver `_sti_data_version`); este descarta o que já tem na hora
+        forget_active_upload()
+        _sti_cache.invalidate()
+        _summary_cache.invalidate_where(lambda cache_key: cache_key[0] in _CALCULATOR_DATA_VERSIONS)
+    return jsonify(summary), 200 if summary['skipped'] else 201
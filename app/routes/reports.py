@@ -1,12 +1,41 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select, update
 from app import db
-from app.models import Report, Unit
+from app.models import Report, Step, Unit, report_units
+from app.services.catalog_service import commit_catalog_change
 from app.services.powerbi_service import PowerBIService
+from app.utils.circuit_breaker import CircuitOpenError
+from app.services.report_sync_service import sync_workspaces
 from app.middleware.auth import get_current_user, require_role
+from app.utils.validation import existing_ids, is_int, is_int_list
 
 bp = Blueprint('reports', __name__)
 
+# Limite de itens por chamada bulk (mantém os IN (...) abaixo do limite de
+# 2100 parâmetros do SQL Server)
+_BULK_MAX_ITEMS = 500
+
+# Campos do report que o bulk pode gravar
+_BULK_REPORT_FIELDS = ('workspace_id', 'dataset_id', 'name', 'code', 'embed_url', 'step_id')
+
+# Campos NOT NULL no modelo: não podem ser enviados como null ou vazios
+_REQUIRED_REPORT_FIELDS = ('workspace_id', 'name')
+
+
+def _report_field_error(field, value):
+    """Mensagem de erro do valor de um campo do bulk, ou None se for válido."""
+    if value is None or value == '':
+        return f'{field} não pode ser vazio' if field in _REQUIRED_REPORT_FIELDS else None
+    if field == 'step_id':
+        return None if is_int(value) else 'step_id deve ser um inteiro'
+    if not isinstance(value, str):
+        return f'{field} deve ser uma string'
+    length = Report.__table__.c[field].type.length
+    if length and len(value) > length:
+        return f'{field} excede {length} caracteres'
+    return None
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def list_reports():
@@ -56,6 +85,8 @@ def list_reports():
                     if report.id not in seen_report_ids:
                         reports.append(report)
                         seen_report_ids.add(report.id)
+        # Reports removidos do Power BI só aparecem para o admin
+        reports = [report for report in reports if not report.is_orphan]
     
     return jsonify([report.to_dict() for report in reports]), 200
 
@@ -142,6 +173,10 @@ def create_report():
         description: Report criado com sucesso
       400:
         description: Dados inválidos
+      404:
+        description: Unidade ou step não encontrado
+      409:
+        description: Report ID já existe
     """
     data = request.get_json()
     
@@ -149,17 +184,21 @@ def create_report():
     if not all(field in data for field in required_fields):
         return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
     
-    # Verificar se unit_ids é uma lista
-    if not isinstance(data['unit_ids'], list) or len(data['unit_ids']) == 0:
-        return jsonify({'error': 'unit_ids deve ser um array não vazio'}), 400
+    # Verificar se unit_ids é uma lista de inteiros
+    if not is_int_list(data['unit_ids']) or len(data['unit_ids']) == 0:
+        return jsonify({'error': 'unit_ids deve ser um array não vazio de inteiros'}), 400
+    step_id = data.get('step_id')
+    if step_id is not None and not is_int(step_id):
+        return jsonify({'error': 'step_id deve ser um inteiro'}), 400
     
-    # Verificar se todas as unidades existem
-    units = []
-    for unit_id in data['unit_ids']:
-        unit = Unit.query.get(unit_id)
-        if not unit:
-            return jsonify({'error': f'Unidade ID {unit_id} não encontrada'}), 404
-        units.append(unit)
+    # Verificar se todas as unidades existem (uma única consulta)
+    units_by_id = {u.id: u for u in Unit.query.filter(Unit.id.in_(data['unit_ids'])).all()}
+    missing = [unit_id for unit_id in data['unit_ids'] if unit_id not in units_by_id]
+    if missing:
+        return jsonify({'error': f'Unidade ID {missing[0]} não encontrada'}), 404
+    units = [units_by_id[unit_id] for unit_id in dict.fromkeys(data['unit_ids'])]
+    if step_id is not None and not existing_ids(Step.id, [step_id]):
+        return jsonify({'error': f'Step ID {step_id} não encontrado'}), 404
     
     # Verificar se report_id já existe
     if Report.query.filter_by(report_id=data['report_id']).first():
@@ -171,17 +210,175 @@ def create_report():
         dataset_id=data.get('dataset_id'),
         name=data['name'],
         embed_url=data.get('embed_url'),
-        step_id=data.get('step_id')
+        step_id=step_id
     )
     
     # Associar unidades
     report.units.extend(units)
     
     db.session.add(report)
-    db.session.commit()
+    commit_catalog_change()
     
     return jsonify(report.to_dict(include_units=True)), 201
 
+@bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def bulk_upsert_reports():
+    """
+    Criar ou atualizar vários reports e seus vínculos com unidades (apenas admin)
+    Tudo em uma única transação: se qualquer item for inválido, nada é gravado.
+    Reports são identificados por report_id (ID do Power BI); vínculos em
+    unit_ids são adicionados aos existentes.
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - reports
+          properties:
+            reports:
+              type: array
+              items:
+                type: object
+                required:
+                  - report_id
+                properties:
+                  report_id:
+                    type: string
+                  workspace_id:
+                    type: string
+                    description: Obrigatório para reports novos
+                  name:
+                    type: string
+                    description: Obrigatório para reports novos
+                  code:
+                    type: string
+                    description: Obrigatório para reports novos
+                  dataset_id:
+                    type: string
+                  embed_url:
+                    type: string
+                  step_id:
+                    type: integer
+                  unit_ids:
+                    type: array
+                    items:
+                      type: integer
+    responses:
+      200:
+        description: Resumo dos reports criados/atualizados e vínculos criados
+      400:
+        description: Dados inválidos (lista de erros por item)
+    """
+    data = request.get_json()
+    items = data.get('reports') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or len(items) == 0:
+        return jsonify({'error': 'reports deve ser um array não vazio'}), 400
+    if len(items) > _BULK_MAX_ITEMS:
+        return jsonify({'error': f'Máximo de {_BULK_MAX_ITEMS} reports por chamada'}), 400
+
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('report_id'):
+            errors.append({'index': index, 'error': 'report_id é obrigatório'})
+            continue
+        if not isinstance(item['report_id'], str):
+            errors.append({'index': index, 'error': 'report_id deve ser uma string'})
+            continue
+        if item['report_id'] in seen:
+            errors.append({'index': index, 'error': 'report_id duplicado na requisição'})
+        seen.add(item['report_id'])
+        if not is_int_list(item.get('unit_ids', [])):
+            errors.append({'index': index, 'error': 'unit_ids deve ser um array de inteiros'})
+        for field in _BULK_REPORT_FIELDS:
+            error = _report_field_error(field, item[field]) if field in item else None
+            if error:
+                errors.append({'index': index, 'error': error})
+    if errors:
+        return jsonify({'error': 'Dados inválidos', 'details': errors}), 400
+
+    # Validações de existência em lote: uma consulta por tabela
+    existing = dict(db.session.execute(
+        select(Report.report_id, Report.id).where(Report.report_id.in_(list(seen)))
+    ).all())
+    unit_ids = {u for item in items for u in item.get('unit_ids', [])}
+    step_ids = {item['step_id'] for item in items if item.get('step_id') is not None}
+    missing_units = unit_ids - existing_ids(Unit.id, unit_ids)
+    missing_steps = step_ids - existing_ids(Step.id, step_ids)
+
+    for index, item in enumerate(items):
+        if item['report_id'] not in existing:
+            absent = [f for f in ('workspace_id', 'name', 'code') if not item.get(f)]
+            if absent:
+                errors.append({'index': index, 'error': f'Campos obrigatórios ausentes: {", ".join(absent)}'})
+        bad_units = sorted(missing_units.intersection(item.get('unit_ids', [])))
+        if bad_units:
+            errors.append({'index': index, 'error': f'Unidades não encontradas: {bad_units}'})
+        if item.get('step_id') in missing_steps:
+            errors.append({'index': index, 'error': f'Step ID {item["step_id"]} não encontrado'})
+    if errors:
+        return jsonify({'error': 'Dados inválidos', 'details': errors}), 400
+
+    # Inserts via ORM (o flush agrupa em INSERT multi-linha) e updates por PK em lote
+    new_reports = [
+        Report(**{'report_id': item['report_id'], **{f: item.get(f) for f in _BULK_REPORT_FIELDS}})
+        for item in items if item['report_id'] not in existing
+    ]
+    db.session.add_all(new_reports)
+    db.session.flush()
+
+    updates = [
+        {'id': existing[item['report_id']], **{f: item[f] for f in _BULK_REPORT_FIELDS if f in item}}
+        for item in items if item['report_id'] in existing
+    ]
+    updates = [row for row in updates if len(row) > 1]
+    if updates:
+        db.session.execute(update(Report), updates)
+
+    ids = {**existing, **{r.report_id: r.id for r in new_reports}}
+    wanted = {
+        (ids[item['report_id']], unit_id)
+        for item in items for unit_id in item.get('unit_ids', [])
+    }
+    current_links = set()
+    if wanted:
+        current_links = set(db.session.execute(
+            select(report_units.c.report_id, report_units.c.unit_id)
+            .where(report_units.c.report_id.in_({report_id for report_id, _ in wanted}))
+        ).all())
+    new_links = [
+        {'report_id': report_id, 'unit_id': unit_id}
+        for report_id, unit_id in sorted(wanted - current_links)
+    ]
+    if new_links:
+        db.session.execute(report_units.insert(), new_links)
+
+    commit_catalog_change()
+
+    return jsonify({
+        'created': len(new_reports),
+        'updated': len(existing),
+        'links_created': len(new_links),
+        'reports': [
+            {
+                'id': ids[item['report_id']],
+                'report_id': item['report_id'],
+                'status': 'updated' if item['report_id'] in existing else 'created',
+            }
+            for item in items
+        ],
+    }), 200
+
 @bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @require_role('admin')
@@ -225,7 +422,7 @@ def update_report(id):
     if 'dataset_id' in data:
         report.dataset_id = data['dataset_id']
     
-    db.session.commit()
+    commit_catalog_change()
     
     return jsonify(report.to_dict()), 200
 
@@ -254,7 +451,7 @@ def delete_report(id):
     report = Report.query.get_or_404(id)
     
     db.session.delete(report)
-    db.session.commit()
+    commit_catalog_change()
     
     return '', 204
 
@@ -286,10 +483,13 @@ def get_embed_config(id):
       403:
         description: Acesso negado
       404:
-        description: Report não encontrado
+        description: Report não encontrado (ou removido do Power BI)
     """
     report = Report.query.get_or_404(id)
     user = get_current_user()
+
+    if report.is_orphan:
+        return jsonify({'error': 'Report não existe mais no workspace do Power BI'}), 404
     
     # Obter unit_id do query parameter
     unit_id = request.args.get('unit_id', type=int)
@@ -327,6 +527,9 @@ def get_embed_config(id):
 
         return jsonify(config), 200
 
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Power BI circuit open: {str(e)}")
+        return jsonify({'error': 'Power BI temporariamente indisponível', 'details': str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"Error getting embed config: {str(e)}")
         return jsonify({'error': 'Falha ao obter configuração de embed', 'details': str(e)}), 500
@@ -389,11 +592,102 @@ def list_workspace_reports(workspace_id):
             'reports': simplified_reports
         }), 200
     
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Power BI circuit open: {str(e)}")
+        return jsonify({'error': 'Power BI temporariamente indisponível', 'details': str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"Error fetching workspace reports: {str(e)}")
         return jsonify({'error': 'Falha ao buscar reports do workspace', 'details': str(e)}), 500
 
 
+@bp.route('/sync', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def sync_reports():
+    """
+    Sincronizar reports com o Power BI (apenas admin)
+    Busca cada workspace uma vez e aplica inserts, updates (name, embed_url,
+    dataset_id) e marcação de órfãos em lote, em uma única transação.
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            workspace_ids:
+              type: array
+              items:
+                type: string
+              description: Workspaces a sincronizar (padrão - todos os já cadastrados)
+            create_missing:
+              type: boolean
+              default: true
+              description: Cadastrar reports que existem no Power BI mas não na tabela
+    responses:
+      200:
+        description: Resumo da sincronização
+      400:
+        description: Dados inválidos
+      500:
+        description: Erro na sincronização
+    """
+    data = request.get_json(silent=True) or {}
+    workspace_ids = data.get('workspace_ids')
+    if workspace_ids is not None and (
+        not isinstance(workspace_ids, list) or not all(isinstance(w, str) for w in workspace_ids)
+    ):
+        return jsonify({'error': 'workspace_ids deve ser um array de strings'}), 400
+    create_missing = data.get('create_missing', True)
+    if not isinstance(create_missing, bool):
+        return jsonify({'error': 'create_missing deve ser um booleano'}), 400
+
+    try:
+        summary = sync_workspaces(workspace_ids, create_missing=create_missing)
+        return jsonify(summary), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error syncing reports: {str(e)}")
+        return jsonify({'error': 'Falha ao sincronizar reports', 'details': str(e)}), 500
+
+
+@bp.route('/sync/<workspace_id>', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def sync_workspace_reports(workspace_id):
+    """
+    Sincronizar reports de um workspace do Power BI (apenas admin)
+    ---
+    tags:
+      - Reports
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: workspace_id
+        type: string
+        required: true
+        description: ID do workspace do Power BI
+    responses:
+      200:
+        description: Resumo da sincronização
+      500:
+        description: Erro na sincronização
+    """
+    try:
+        summary = sync_workspaces([workspace_id])
+        return jsonify(summary), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error syncing workspace reports: {str(e)}")
+        return jsonify({'error': 'Falha ao sincronizar reports do workspace', 'details': str(e)}), 500
+
+
 @bp.route('/summary', methods=['GET'])
 @jwt_required()
 def get_general_report():
@@ -433,6 +727,9 @@ def get_general_report():
 
         return jsonify(config), 200
 
+    except CircuitOpenError as e:
+        current_app.logger.warning(f"Power BI circuit open: {str(e)}")
+        return jsonify({'error': 'Power BI temporariamente indisponível', 'details': str(e)}), 503
     except Exception as e:
         current_app.logger.error(f"Error getting general report config: {str(e)}")
         return jsonify({'error': 'Falha ao obter configuração do relatório geral', 'details': str(e)}), 500
@@ -1,8 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from app import db
-from app.models import Step, Report, Unit
 from app.middleware.auth import get_current_user
+from app.services.catalog_service import get_catalog
 
 bp = Blueprint('steps', __name__)
 
@@ -20,8 +19,8 @@ def list_steps():
       200:
         description: Lista de steps
     """
-    steps = Step.query.order_by(Step.step_number).all()
-    return jsonify([step.to_dict() for step in steps]), 200
+    catalog = get_catalog()
+    return jsonify([step.to_dict() for step in catalog.steps]), 200
 
 @bp.route('/<int:step_number>/units/<int:unit_id>/reports', methods=['GET'])
 @jwt_required()
@@ -55,26 +54,24 @@ def get_reports_by_step_and_unit(step_number, unit_id):
         description: Usuário não tem acesso à unidade
     """
     user = get_current_user()
+    catalog = get_catalog()
     
     # Verificar se o step existe usando step_number
-    step = Step.query.filter_by(step_number=step_number).first()
+    step = catalog.get_step(step_number)
     if not step:
         return jsonify({'error': 'Step não encontrado'}), 404
     
     # Verificar se a unidade existe
-    unit = Unit.query.get(unit_id)
+    unit = catalog.get_unit(unit_id)
     if not unit:
         return jsonify({'error': 'Unidade não encontrada'}), 404
     
     # Verificar se o usuário tem acesso à unidade (admin tem acesso a todas)
-    if user.role != 'admin' and unit not in user.units:
+    if user.role != 'admin' and unit_id not in [uu.unit_id for uu in user.user_units]:
         return jsonify({'error': 'Acesso negado a esta unidade'}), 403
     
-    # Buscar reports que pertencem ao step E à unidade
-    reports = Report.query.filter(
-        Report.step_id == step.id,
-        Report.units.any(Unit.id == unit_id)
-    ).all()
+    # Reports que pertencem ao step E à unidade, direto do catálogo em memória
+    reports = catalog.reports_for(step.id, unit_id)
     
     return jsonify({
         'step': step.to_dict(),
@@ -1,11 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import insert, select, update
 from app import db
-from app.models import Unit, User
+from app.models import Unit, User, UserUnit
 from app.middleware.auth import require_role, require_unit_access, get_current_user
+from app.services.catalog_service import commit_catalog_change, get_catalog
+from app.utils.validation import existing_ids, is_int
 
 bp = Blueprint('units', __name__)
 
+# Limite de itens por chamada bulk (mantém os IN (...) abaixo do limite de
+# 2100 parâmetros do SQL Server)
+_BULK_MAX_ITEMS = 500
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def list_units():
@@ -73,7 +80,7 @@ def create_unit():
     )
     
     db.session.add(unit)
-    db.session.commit()
+    commit_catalog_change()
     
     return jsonify(unit.to_dict()), 201
 
@@ -102,6 +109,43 @@ def get_unit(id):
     unit = Unit.query.get_or_404(id)
     return jsonify(unit.to_dict(include_users=True)), 200
 
+@bp.route('/<int:id>/navigation', methods=['GET'])
+@jwt_required()
+@require_unit_access
+def get_unit_navigation(id):
+    """
+    Obter a árvore de navegação da unidade (todos os steps com seus reports)
+    Substitui a chamada a /api/steps seguida de uma chamada por step.
+    Suporta requisições condicionais via ETag (If-None-Match).
+    ---
+    tags:
+      - Units
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Unidade e lista de steps, cada um com os reports disponíveis para a unidade
+      304:
+        description: Árvore não mudou desde o ETag informado
+      404:
+        description: Unidade não encontrada
+    """
+    navigation = get_catalog().navigation(id)
+    if not navigation:
+        return jsonify({'error': 'Unidade não encontrada'}), 404
+
+    payload, etag = navigation
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('NAVIGATION_CACHE_MAX_AGE', 60)
+    return response.make_conditional(request)
+
 @bp.route('/<int:id>', methods=['PUT'])
 @jwt_required()
 @require_role('admin')
@@ -141,7 +185,7 @@ def update_unit(id):
     if 'description' in data:
         unit.description = data['description']
     
-    db.session.commit()
+    commit_catalog_change()
     
     return jsonify(unit.to_dict()), 200
 
@@ -170,7 +214,7 @@ def delete_unit(id):
     unit = Unit.query.get_or_404(id)
     
     db.session.delete(unit)
-    db.session.commit()
+    commit_catalog_change()
     
     return '', 204
 
@@ -226,6 +270,116 @@ def add_user_to_unit(id):
     
     return jsonify({'message': 'Usuário adicionado à unidade com sucesso'}), 200
 
+@bp.route('/memberships/bulk', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+def bulk_upsert_memberships():
+    """
+    Associar vários usuários a unidades, com bi_filter_param (apenas admin)
+    Tudo em uma única transação: se qualquer item for inválido, nada é gravado.
+    Associações existentes têm o bi_filter_param atualizado.
+    ---
+    tags:
+      - Units
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - memberships
+          properties:
+            memberships:
+              type: array
+              items:
+                type: object
+                required:
+                  - user_id
+                  - unit_id
+                  - bi_filter_param
+                properties:
+                  user_id:
+                    type: integer
+                  unit_id:
+                    type: integer
+                  bi_filter_param:
+                    type: string
+    responses:
+      200:
+        description: Resumo das associações criadas/atualizadas
+      400:
+        description: Dados inválidos (lista de erros por item)
+    """
+    data = request.get_json()
+    items = data.get('memberships') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or len(items) == 0:
+        return jsonify({'error': 'memberships deve ser um array não vazio'}), 400
+    if len(items) > _BULK_MAX_ITEMS:
+        return jsonify({'error': f'Máximo de {_BULK_MAX_ITEMS} associações por chamada'}), 400
+
+    errors = []
+    pairs = set()
+    for index, item in enumerate(items):
+        if (not isinstance(item, dict)
+                or not is_int(item.get('user_id'))
+                or not is_int(item.get('unit_id'))
+                or not item.get('bi_filter_param')):
+            errors.append({'index': index, 'error': 'user_id, unit_id e bi_filter_param são obrigatórios'})
+            continue
+        # bi_filter_param vira filtro do Power BI e chave de recorte de produção
+        if not isinstance(item['bi_filter_param'], str) or len(item['bi_filter_param']) > 255:
+            errors.append({'index': index, 'error': 'bi_filter_param deve ser uma string de até 255 caracteres'})
+            continue
+        pair = (item['user_id'], item['unit_id'])
+        if pair in pairs:
+            errors.append({'index': index, 'error': 'Associação duplicada na requisição'})
+        pairs.add(pair)
+    if errors:
+        return jsonify({'error': 'Dados inválidos', 'details': errors}), 400
+
+    # Validações de existência em lote: uma consulta por tabela
+    user_ids = {user_id for user_id, _ in pairs}
+    unit_ids = {unit_id for _, unit_id in pairs}
+    missing_users = user_ids - existing_ids(User.id, user_ids)
+    missing_units = unit_ids - existing_ids(Unit.id, unit_ids)
+
+    for index, item in enumerate(items):
+        if item['user_id'] in missing_users:
+            errors.append({'index': index, 'error': f'Usuário ID {item["user_id"]} não encontrado'})
+        if item['unit_id'] in missing_units:
+            errors.append({'index': index, 'error': f'Unidade ID {item["unit_id"]} não encontrada'})
+    if errors:
+        return jsonify({'error': 'Dados inválidos', 'details': errors}), 400
+
+    existing = set(db.session.execute(
+        select(UserUnit.user_id, UserUnit.unit_id).where(
+            UserUnit.user_id.in_(user_ids),
+            UserUnit.unit_id.in_(unit_ids),
+        )
+    ).all())
+
+    rows = [
+        {'user_id': item['user_id'], 'unit_id': item['unit_id'], 'bi_filter_param': item['bi_filter_param']}
+        for item in items
+    ]
+    new_rows = [row for row in rows if (row['user_id'], row['unit_id']) not in existing]
+    updated_rows = [row for row in rows if (row['user_id'], row['unit_id']) in existing]
+
+    if new_rows:
+        db.session.execute(insert(UserUnit), new_rows)
+    if updated_rows:
+        db.session.execute(update(UserUnit), updated_rows)
+    db.session.commit()
+
+    return jsonify({
+        'created': len(new_rows),
+        'updated': len(updated_rows),
+    }), 200
+
 @bp.route('/<int:id>/users/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 @require_role('admin')
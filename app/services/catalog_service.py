@@ -0,0 +1,268 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from types import MappingProxyType
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import CatalogVersion, Report, Step, Unit, report_units
+
+# Linha única da tabela catalog_version
+_VERSION_ROW_ID = 1
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+class StepEntry(namedtuple('StepEntry', [
+    'id', 'step_number', 'name', 'created_at', 'updated_at',
+])):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'step_number': self.step_number,
+            'name': self.name,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+
+class UnitEntry(namedtuple('UnitEntry', [
+    'id', 'name', 'description', 'created_at', 'updated_at',
+])):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+
+class ReportEntry(namedtuple('ReportEntry', [
+    'id', 'step_id', 'report_id', 'workspace_id', 'dataset_id', 'name', 'code',
+    'embed_url', 'is_orphan', 'created_at', 'updated_at', 'units',
+])):
+    """Report do catálogo; `units` é uma tupla de pares (unit_id, unit_name)."""
+    __slots__ = ()
+
+    def to_dict(self, include_units=False):
+        data = {
+            'id': self.id,
+            'step_id': self.step_id,
+            'report_id': self.report_id,
+            'workspace_id': self.workspace_id,
+            'dataset_id': self.dataset_id,
+            'name': self.name,
+            'code': self.code,
+            'embed_url': self.embed_url,
+            'is_orphan': self.is_orphan,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+        if include_units:
+            data['units'] = [{'id': unit_id, 'name': name} for unit_id, name in self.units]
+        else:
+            data['unit_ids'] = [unit_id for unit_id, _ in self.units]
+        return data
+
+
+class Catalog:
+    """Snapshot imutável de steps → reports → unidades.
+
+    Construído de uma vez e trocado atomicamente; nenhuma leitura toca o banco.
+    """
+
+    __slots__ = ('version', 'built_at', 'steps', 'units', 'reports',
+                 '_steps_by_number', '_reports_by_step_unit', '_navigation')
+
+    def __init__(self, version, steps, units, reports):
+        self.version = version
+        self.built_at = datetime.utcnow()
+        self.steps = tuple(sorted(steps, key=lambda s: s.step_number))
+        self.units = MappingProxyType({u.id: u for u in units})
+        self.reports = MappingProxyType({r.id: r for r in reports})
+        self._steps_by_number = MappingProxyType({s.step_number: s for s in self.steps})
+
+        # Órfãos (removidos do Power BI) ficam em `reports`, mas fora da navegação
+        by_step_unit = {}
+        for report in sorted(reports, key=lambda r: r.id):
+            if report.is_orphan:
+                continue
+            for unit_id, _ in report.units:
+                by_step_unit.setdefault((report.step_id, unit_id), []).append(report)
+        self._reports_by_step_unit = MappingProxyType(
+            {key: tuple(value) for key, value in by_step_unit.items()}
+        )
+        self._navigation = MappingProxyType(
+            {unit_id: self._build_navigation(unit) for unit_id, unit in self.units.items()}
+        )
+
+    def _build_navigation(self, unit):
+        payload = {
+            'unit': unit.to_dict(),
+            'steps': [
+                {
+                    **step.to_dict(),
+                    'reports': [r.to_dict() for r in self.reports_for(step.id, unit.id)],
+                }
+                for step in self.steps
+            ],
+        }
+        # ETag derivado do conteúdo: igual em todos os workers para o mesmo catálogo
+        digest = hashlib.sha1(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return payload, digest
+
+    def get_step(self, step_number):
+        return self._steps_by_number.get(step_number)
+
+    def get_unit(self, unit_id):
+        return self.units.get(unit_id)
+
+    def reports_for(self, step_id, unit_id):
+        return self._reports_by_step_unit.get((step_id, unit_id), ())
+
+    def navigation(self, unit_id):
+        """Árvore steps → reports da unidade e seu ETag, ou None se a unidade não existir.
+
+        O payload é compartilhado entre requisições e não deve ser modificado.
+        """
+        return self._navigation.get(unit_id)
+
+
+def _load_catalog(version):
+    """Lê steps, unidades e reports (um único join com report_units)."""
+    session = db.session
+
+    steps = [
+        StepEntry(row.id, row.step_number, row.name, _iso(row.created_at), _iso(row.updated_at))
+        for row in session.execute(select(
+            Step.id, Step.step_number, Step.name, Step.created_at, Step.updated_at,
+        ))
+    ]
+    units = [
+        UnitEntry(row.id, row.name, row.description, _iso(row.created_at), _iso(row.updated_at))
+        for row in session.execute(select(
+            Unit.id, Unit.name, Unit.description, Unit.created_at, Unit.updated_at,
+        ))
+    ]
+    unit_names = {u.id: u.name for u in units}
+
+    report_rows = session.execute(
+        select(
+            Report.id, Report.step_id, Report.report_id, Report.workspace_id,
+            Report.dataset_id, Report.name, Report.code, Report.embed_url,
+            Report.is_orphan, Report.created_at, Report.updated_at, report_units.c.unit_id,
+        )
+        .select_from(Report)
+        .outerjoin(report_units, report_units.c.report_id == Report.id)
+        .order_by(Report.id, report_units.c.unit_id)
+    )
+
+    fields = {}
+    report_unit_pairs = {}
+    for row in report_rows:
+        if row.id not in fields:
+            fields[row.id] = (
+                row.id, row.step_id, row.report_id, row.workspace_id, row.dataset_id,
+                row.name, row.code, row.embed_url, bool(row.is_orphan),
+                _iso(row.created_at), _iso(row.updated_at),
+            )
+            report_unit_pairs[row.id] = []
+        if row.unit_id is not None:
+            report_unit_pairs[row.id].append((row.unit_id, unit_names.get(row.unit_id)))
+
+    reports = [
+        ReportEntry(*values, tuple(report_unit_pairs[report_id]))
+        for report_id, values in fields.items()
+    ]
+    return Catalog(version, steps, units, reports)
+
+
+def _read_version():
+    """Versão atual do catálogo no banco (None se a tabela não estiver acessível)."""
+    try:
+        version = db.session.execute(
+            select(CatalogVersion.version).where(CatalogVersion.id == _VERSION_ROW_ID)
+        ).scalar()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Catalog version unavailable: {str(e)}")
+        return None
+    return version or 0
+
+
+_catalog = None
+_checked_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Retorna o snapshot do catálogo deste worker, reconstruindo se necessário.
+
+    A versão no banco só é consultada a cada CATALOG_VERSION_CHECK_SECONDS;
+    entre verificações, o snapshot em memória é servido sem acesso ao banco.
+    """
+    global _catalog, _checked_at
+    interval = current_app.config.get('CATALOG_VERSION_CHECK_SECONDS', 5)
+
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _checked_at < interval:
+        return catalog
+
+    with _catalog_lock:
+        catalog = _catalog
+        if catalog is not None and time.monotonic() - _checked_at < interval:
+            return catalog
+
+        version = _read_version()
+        if catalog is None or version is None or version != catalog.version:
+            catalog = _load_catalog(version)
+            _catalog = catalog
+        _checked_at = time.monotonic()
+        return catalog
+
+
+def invalidate_catalog():
+    """Descarta o snapshot deste worker; o próximo acesso reconstrói."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+
+def bump_catalog_version():
+    """Incrementa a versão do catálogo na transação corrente (sem commit)."""
+    updated = CatalogVersion.query.filter_by(id=_VERSION_ROW_ID).update(
+        {
+            CatalogVersion.version: CatalogVersion.version + 1,
+            CatalogVersion.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        db.session.add(CatalogVersion(id=_VERSION_ROW_ID, version=1))
+
+
+def commit_catalog_change():
+    """Commit de uma escrita no catálogo com invalidação write-through.
+
+    A versão é incrementada na mesma transação da escrita, para que os demais
+    workers percebam a mudança; o snapshot local é descartado logo após o commit.
+    """
+    bump_catalog_version()
+    db.session.commit()
+    invalidate_catalog()
@@ -1,9 +1,18 @@
 import requests
 import msal
+import threading
+import time
 from datetime import datetime, timedelta
 from flask import current_app
 import json
 
+from app.utils.circuit_breaker import get_breaker
+
+# Cache de metadados de reports (embedUrl, datasetId, name) compartilhado
+# pelas instâncias do serviço no worker, chaveado por (workspace_id, report_id)
+_report_metadata_cache = {}
+_report_metadata_lock = threading.Lock()
+
 class PowerBIService:
     def __init__(self):
         self.client_id = current_app.config['POWERBI_CLIENT_ID']
@@ -11,7 +20,17 @@ class PowerBIService:
         self.tenant_id = current_app.config['POWERBI_TENANT_ID']
         self.authority = current_app.config['POWERBI_AUTHORITY_URL']
         self.scope = [current_app.config['POWERBI_SCOPE']]
-        self.base_url = 'https://api.powerbi.com/v1.0/myorg'
+        self.base_url = current_app.config.get('POWERBI_API_URL', 'https://api.powerbi.com/v1.0/myorg').rstrip('/')
+        # Endpoint OAuth2 direto (stand-in local); vazio = MSAL com a authority
+        self.token_url = current_app.config.get('POWERBI_TOKEN_URL')
+        self.metadata_ttl = current_app.config.get('POWERBI_METADATA_TTL_SECONDS', 600)
+        self.timeout = current_app.config.get('POWERBI_TIMEOUT_SECONDS', 30)
+        # Breaker compartilhado pelo worker: após falhas seguidas, falha na hora
+        self._breaker = get_breaker(
+            'powerbi',
+            failure_threshold=current_app.config.get('POWERBI_BREAKER_FAILURES', 5),
+            recovery_timeout=current_app.config.get('POWERBI_BREAKER_RESET_SECONDS', 60),
+        )
         
         self._token_cache = {}
     
@@ -27,13 +46,17 @@ class PowerBIService:
                 return token_data['token']
         
         # Obter novo token
-        app = msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=self.authority,
-            client_credential=self.client_secret
-        )
-        
-        result = app.acquire_token_for_client(scopes=self.scope)
+        if self.token_url:
+            result = self._acquire_token_from_url()
+        else:
+            app = msal.ConfidentialClientApplication(
+                self.client_id,
+                authority=self.authority,
+                client_credential=self.client_secret
+            )
+            
+            with self._breaker:
+                result = app.acquire_token_for_client(scopes=self.scope)
         
         if "access_token" in result:
             # Cachear token (expira em 1 hora, renovar 5 minutos antes)
@@ -46,6 +69,22 @@ class PowerBIService:
         else:
             raise Exception(f"Failed to acquire token: {result.get('error_description')}")
     
+    def _acquire_token_from_url(self):
+        """client_credentials direto em POWERBI_TOKEN_URL (mesmo formato de resposta do MSAL)"""
+        with self._breaker:
+            response = requests.post(self.token_url, data={
+                'grant_type': 'client_credentials',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'scope': ' '.join(self.scope),
+            }, timeout=self.timeout)
+            if response.status_code >= 500 or response.status_code == 429:
+                response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            return {'error_description': response.text}
+    
     def get_headers(self):
         """Retorna headers com authorization"""
         token = self.get_access_token()
@@ -54,26 +93,80 @@ class PowerBIService:
             'Content-Type': 'application/json'
         }
     
+    def _get_json(self, url):
+        """GET na API do Power BI, com timeout e circuit breaker"""
+        headers = self.get_headers()
+        with self._breaker:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        return response.json()
+    
     def get_workspaces(self):
         """Lista todos os workspaces"""
         url = f'{self.base_url}/groups'
-        response = requests.get(url, headers=self.get_headers())
-        response.raise_for_status()
-        return response.json().get('value', [])
+        return self._get_json(url).get('value', [])
+    
+    def _cache_report_metadata(self, workspace_id, report):
+        with _report_metadata_lock:
+            _report_metadata_cache[(workspace_id, report['id'])] = (
+                time.monotonic() + self.metadata_ttl, report
+            )
     
     def get_reports(self, workspace_id):
-        """Lista reports de um workspace"""
+        """Lista reports de um workspace (e aquece o cache de metadados)"""
         url = f'{self.base_url}/groups/{workspace_id}/reports'
-        response = requests.get(url, headers=self.get_headers())
-        response.raise_for_status()
-        return response.json().get('value', [])
+        reports = self._get_json(url).get('value', [])
+        for report in reports:
+            self._cache_report_metadata(workspace_id, report)
+        return reports
     
     def get_report(self, workspace_id, report_id):
-        """Obtém detalhes de um report específico"""
+        """Obtém detalhes de um report específico (com cache de metadados)"""
+        cached = _report_metadata_cache.get((workspace_id, report_id))
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        
         url = f'{self.base_url}/groups/{workspace_id}/reports/{report_id}'
-        response = requests.get(url, headers=self.get_headers())
-        response.raise_for_status()
-        return response.json()
+        report = self._get_json(url)
+        self._cache_report_metadata(workspace_id, report)
+        return report
+    
+    def _post_generate_token(self, url, headers, payload, username, roles):
+        """POST em GenerateToken, repetindo sem effective identity se o dataset não tiver RLS"""
+        response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+        
+        # Se o dataset não suporta RLS, tentar novamente sem effective identity
+        if not response.ok and username and roles:
+            try:
+                error_json = response.json()
+                error_msg = error_json.get('error', {}).get('message', '')
+                if "shouldn't have effective identity" in error_msg:
+                    current_app.logger.warning(
+                        f"Dataset não suporta RLS, gerando token sem effective identity"
+                    )
+                    payload.pop("identities", None)
+                    current_app.logger.info(f"Retry Payload: {json.dumps(payload, indent=2)}")
+                    response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+            except (ValueError, KeyError):
+                pass
+        
+        # Log da resposta
+        current_app.logger.info(f"Status Code: {response.status_code}")
+        if not response.ok:
+            error_detail = response.text
+            try:
+                error_json = response.json()
+                error_detail = json.dumps(error_json, indent=2)
+            except:
+                pass
+            current_app.logger.error(f"Power BI Error Response: {error_detail}")
+            # HTTPError (e não Exception genérica) para o breaker contar só falhas 5xx/429
+            raise requests.HTTPError(
+                f"Power BI API Error {response.status_code}: {error_detail}",
+                response=response,
+            )
+        
+        return response
     
     def generate_embed_token(self, workspace_id, report_id, dataset_ids=None, username=None, roles=None):
         """
@@ -122,36 +215,8 @@ class PowerBIService:
         current_app.logger.info(f"Payload: {json.dumps(payload, indent=2)}")
         
         headers = self.get_headers()
-        response = requests.post(url, headers=headers, json=payload)
-        
-        # Se o dataset não suporta RLS, tentar novamente sem effective identity
-        if not response.ok and username and roles:
-            try:
-                error_json = response.json()
-                error_msg = error_json.get('error', {}).get('message', '')
-                if "shouldn't have effective identity" in error_msg:
-                    current_app.logger.warning(
-                        f"Dataset não suporta RLS, gerando token sem effective identity"
-                    )
-                    payload.pop("identities", None)
-                    current_app.logger.info(f"Retry Payload: {json.dumps(payload, indent=2)}")
-                    response = requests.post(url, headers=headers, json=payload)
-            except (ValueError, KeyError):
-                pass
-        
-        # Log da resposta
-        current_app.logger.info(f"Status Code: {response.status_code}")
-        if not response.ok:
-            error_detail = response.text
-            try:
-                error_json = response.json()
-                error_detail = json.dumps(error_json, indent=2)
-            except:
-                pass
-            current_app.logger.error(f"Power BI Error Response: {error_detail}")
-            raise Exception(f"Power BI API Error {response.status_code}: {error_detail}")
-        
-        response.raise_for_status()
+        with self._breaker:
+            response = self._post_generate_token(url, headers, payload, username, roles)
         
         result = response.json()
         return {
@@ -192,7 +257,7 @@ class PowerBIService:
     def sync_reports_from_workspace(self, workspace_id):
         """
         Sincroniza reports de um workspace
-        Retorna lista de reports
+        Retorna lista de reports (uma única chamada à API por workspace)
         """
         reports = self.get_reports(workspace_id)
         return [
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+
+from flask import current_app
+
+# Recorte das medidas de produção por usuário.
+#
+# UserUnit.bi_filter_param (o mesmo valor usado no RLS do Power BI) é mapeado,
+# por unidade, para valores de dimensões do DW. O arquivo apontado por
+# PRODUCTION_SCOPES_FILE tem o formato:
+#
+#   {
+#     "SESI Educação Básica": {
+#       "3": {"cd_unidade": ["101"], "cd_filial": ["12"]},
+#       "0": null
+#     },
+#     "SENAI Educação Profissional e STI": {
+#       "1": {"nm_unidade": ["Senai Poço"], "nm_unidadeoperacional": ["Senai Poço"]}
+#     }
+#   }
+#
+# Cada chave do recorte é um nome de coluna; o filtro entra apenas nas tabelas
+# que têm a coluna (colunas diferentes podem apontar a mesma unidade em tabelas
+# diferentes, como nm_unidade e nm_unidadeoperacional acima). Colunas que não
+# existem em nenhuma tabela de produção invalidam o arquivo. `null` (ou
+# bi_filter_param sem mapeamento) = sem recorte.
+
+_lock = threading.Lock()
+_loaded = {'path': None, 'mtime': None, 'scopes': {}}
+
+
+class ProductionScopeError(Exception):
+    """PRODUCTION_SCOPES_FILE configurado, mas sem nenhuma versão válida carregada."""
+
+
+def _known_columns():
+    """Colunas das tabelas que os recortes filtram (DW e planilha STI)."""
+    from app.dw_models import dw_metadata
+    from app.models import StiProductionRow
+
+    tables = [*dw_metadata.tables.values(), StiProductionRow.__table__]
+    return {column.name for table in tables for column in table.c}
+
+
+def _normalize(scope):
+    """Recorte em forma canônica e hashable: ((coluna, (valores...)), ...) ou None."""
+    if not scope:
+        return None
+    if not isinstance(scope, dict):
+        raise ValueError(f'recorte inválido: {scope!r}')
+    normalized = []
+    for column, values in sorted(scope.items()):
+        if isinstance(values, (str, int, float)):
+            values = [values]
+        values = tuple(sorted({str(v) for v in values}))
+        if values:
+            normalized.append((column, values))
+    return tuple(normalized) or None
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    scopes = {
+        (unit_name, str(param)): _normalize(scope)
+        for unit_name, params in raw.items()
+        for param, scope in (params or {}).items()
+    }
+    known = _known_columns()
+    for (unit_name, param), scope in scopes.items():
+        unknown = sorted(column for column, _ in scope or () if column not in known)
+        if unknown:
+            raise ValueError(
+                f'coluna(s) {", ".join(unknown)} do recorte {unit_name!r}/{param!r} '
+                'não existem nas tabelas de produção'
+            )
+    return scopes
+
+
+def _last_valid(path, error):
+    """Última versão válida do arquivo; sem nenhuma, falha em vez de liberar a unidade toda."""
+    if _loaded['path'] == path:
+        return _loaded['scopes']
+    raise ProductionScopeError(f'Recortes de produção indisponíveis: {error}')
+
+
+def _scopes():
+    """Mapa {(unit_name, bi_filter_param): recorte}, relido quando o arquivo muda."""
+    path = current_app.config.get('PRODUCTION_SCOPES_FILE')
+    if not path:
+        return {}
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        current_app.logger.error(f"Arquivo de recortes de produção indisponível: {str(e)}")
+        return _last_valid(path, e)
+    if _loaded['path'] == path and _loaded['mtime'] == mtime:
+        return _loaded['scopes']
+    with _lock:
+        if _loaded['path'] != path or _loaded['mtime'] != mtime:
+            try:
+                scopes = _load(path)
+            except (OSError, ValueError) as e:
+                current_app.logger.error(f"Arquivo de recortes de produção inválido: {str(e)}")
+                return _last_valid(path, e)
+            _loaded.update(path=path, mtime=mtime, scopes=scopes)
+        return _loaded['scopes']
+
+
+def resolve_scope(unit_name, bi_filter_param):
+    """Recorte do usuário na unidade (None = sem recorte, números da unidade toda).
+
+    Usuários com o mesmo recorte recebem o mesmo valor, e por isso
+    compartilham as entradas de cache.
+    """
+    if bi_filter_param is None:
+        return None
+    return _scopes().get((unit_name, str(bi_filter_param)))
+
+
+def scope_predicates(table, scope):
+    """Predicados IN do recorte para as colunas que existem em `table`."""
+    if not scope:
+        return []
+    return [table.c[column].in_(values) for column, values in scope if column in table.c]
+
+
+def scope_applies(table, scope):
+    """True se o recorte filtra `table` (ao menos uma das colunas existe nela)."""
+    return bool(scope) and any(column in table.c for column, _ in scope)
+
+
+def scope_to_dict(scope):
+    return {column: list(values) for column, values in scope} if scope else None
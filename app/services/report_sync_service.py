@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+
+from app import db
+from app.models import Report
+from app.services.catalog_service import commit_catalog_change
+from app.services.powerbi_service import PowerBIService
+
+# Campos do report atualizados a partir do Power BI
+_SYNCED_FIELDS = ('workspace_id', 'dataset_id', 'name', 'embed_url')
+
+_MAX_WORKERS = 4
+
+
+def _fetch_workspaces(pbi_service, workspace_ids):
+    """Busca cada workspace uma única vez, em paralelo.
+
+    Retorna ({workspace_id: [reports]}, {workspace_id: erro}).
+    """
+    # Um token antes do fan-out, para as threads reaproveitarem o cache do serviço
+    pbi_service.get_access_token()
+
+    fetched, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(workspace_ids)) or 1) as pool:
+        futures = {
+            workspace_id: pool.submit(pbi_service.sync_reports_from_workspace, workspace_id)
+            for workspace_id in workspace_ids
+        }
+        for workspace_id, future in futures.items():
+            try:
+                fetched[workspace_id] = future.result()
+            except Exception as e:
+                current_app.logger.error(f"Error syncing workspace {workspace_id}: {str(e)}")
+                errors[workspace_id] = str(e)
+    return fetched, errors
+
+
+def sync_workspaces(workspace_ids=None, create_missing=True):
+    """Sincroniza a tabela reports com os workspaces do Power BI.
+
+    Compara por report_id: insere reports novos (se `create_missing`), atualiza
+    name/embed_url/dataset_id que mudaram e marca como órfãos os reports que
+    sumiram do workspace. Tudo é gravado em lote, em uma única transação.
+    Workspaces que falharem na API são ignorados (seus reports não viram órfãos).
+
+    Sem `workspace_ids`, sincroniza todos os workspaces já cadastrados.
+    """
+    started = time.monotonic()
+
+    if workspace_ids is None:
+        workspace_ids = sorted(db.session.execute(
+            select(Report.workspace_id).distinct()
+        ).scalars())
+    workspace_ids = list(dict.fromkeys(workspace_ids))
+
+    fetched, errors = _fetch_workspaces(PowerBIService(), workspace_ids) if workspace_ids else ({}, {})
+
+    remote = {
+        report['report_id']: report
+        for reports in fetched.values()
+        for report in reports
+    }
+
+    existing = {
+        row.report_id: row
+        for row in db.session.execute(select(
+            Report.id, Report.report_id, Report.is_orphan, *[getattr(Report, f) for f in _SYNCED_FIELDS]
+        ))
+    }
+
+    inserts, updates = [], []
+    unchanged = 0
+    for report_id, report in remote.items():
+        row = existing.get(report_id)
+        if row is None:
+            if create_missing:
+                # code fica NULL até o admin defini-lo
+                inserts.append({f: report[f] for f in ('report_id',) + _SYNCED_FIELDS})
+            continue
+        changes = {f: report[f] for f in _SYNCED_FIELDS if getattr(row, f) != report[f]}
+        if row.is_orphan:
+            changes['is_orphan'] = False
+        if changes:
+            updates.append({'id': row.id, **changes})
+        else:
+            unchanged += 1
+
+    orphaned = [
+        {'id': row.id, 'is_orphan': True}
+        for report_id, row in existing.items()
+        if row.workspace_id in fetched and report_id not in remote and not row.is_orphan
+    ]
+
+    if inserts:
+        db.session.execute(insert(Report), inserts)
+    if updates:
+        db.session.execute(update(Report), updates)
+    if orphaned:
+        db.session.execute(update(Report), orphaned)
+    if inserts or updates or orphaned:
+        commit_catalog_change()
+
+    return {
+        'workspaces': sorted(fetched),
+        'created': len(inserts),
+        'updated': len(updates),
+        'orphaned': len(orphaned),
+        'unchanged': unchanged,
+        'errors': errors,
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }
@@ -1,22 +1,43 @@
+import codecs
+import json
+import logging
 import os
+import random
 import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import requests
 
+from app.utils.cache import TTLCache
+from app.utils.circuit_breaker import CircuitBreaker, get_breaker
+
 LOGIN_PATH = '/seguranca/tokens'
 FONTE_DADOS_PREVISAO_SSI = 'CDS_RELORC_OFERTA_004'
 
-# Meses retornados pela API como colunas ProducaoJaneiro..ProducaoDezembro
-_PRODUCAO_MONTHLY_FIELDS = [
-    'ProducaoJaneiro', 'ProducaoFevereiro', 'ProducaoMarco', 'ProducaoMarço',
-    'ProducaoAbril', 'ProducaoMaio', 'ProducaoJunho', 'ProducaoJulho',
-    'ProducaoAgosto', 'ProducaoSetembro', 'ProducaoOutubro', 'ProducaoNovembro',
-    'ProducaoDezembro',
-]
+# Meses retornados pela API como colunas ProducaoJaneiro..ProducaoDezembro.
+# Março aparece como ProducaoMarco e/ou ProducaoMarço: os nomes são aliases da
+# mesma coluna e vale o primeiro preenchido, para não contar março duas vezes.
+_PRODUCAO_MONTH_FIELDS = (
+    ('ProducaoJaneiro',),
+    ('ProducaoFevereiro',),
+    ('ProducaoMarco', 'ProducaoMarço'),
+    ('ProducaoAbril',),
+    ('ProducaoMaio',),
+    ('ProducaoJunho',),
+    ('ProducaoJulho',),
+    ('ProducaoAgosto',),
+    ('ProducaoSetembro',),
+    ('ProducaoOutubro',),
+    ('ProducaoNovembro',),
+    ('ProducaoDezembro',),
+)
+_MONTHS = len(_PRODUCAO_MONTH_FIELDS)
 
 # Replica os filtros aplicados no Power Query sobre fato_previsaossi360
-_NOME_PRODUTO_EXCLUIDOS = {
+# (também usados na meta SSI calculada no DW, em routes/production.py)
+SSI_NOME_PRODUTO_EXCLUIDOS = {
     'AULA DE RELAXAMENTO',
     'AULÃO DE DANÇA',
     'BLITZ POSTURAL',
@@ -31,7 +52,111 @@ _NOME_PRODUTO_EXCLUIDOS = {
     'YOGA E MEDITAÇÃO',
 }
 
-_PRODUTO_PREFIX = '103'
+SSI_PRODUTO_PREFIX = '103'
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos pedaços lidos do corpo da resposta no modo streaming
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _JsonRowStream:
+    """Parser incremental das respostas de fontes de dados.
+
+    Lê o corpo em pedaços e devolve um item por vez da lista de linhas —
+    lista direta, {data: [...]} ou {result: [...]}, como em `_extract_list` —
+    sem materializar o payload inteiro. Cada item é decodificado com
+    `json.JSONDecoder.raw_decode`; itens que cruzam a fronteira de um pedaço
+    são completados com o pedaço seguinte.
+    """
+
+    _LIST_KEYS = ('data', 'result')
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def _fill(self):
+        """Acrescenta o próximo pedaço ao buffer; False quando o corpo acabou."""
+        if self._exhausted:
+            return False
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self._buf = self._buf[self._pos:] + text
+                self._pos = 0
+                return True
+        self._buf = self._buf[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        self._exhausted = True
+        return False
+
+    def _peek(self):
+        """Próximo caractere não branco (sem consumir); '' no fim do corpo."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _next_char(self):
+        char = self._peek()
+        if not char:
+            raise ValueError('Resposta Solução 360 truncada')
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise ValueError('Resposta Solução 360 com JSON inválido')
+                continue
+            # Um número no fim do buffer pode continuar no próximo pedaço
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _items(self):
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._next_char()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError('Resposta Solução 360 com JSON inválido')
+
+    def __iter__(self):
+        char = self._next_char()
+        if char == '[':
+            yield from self._items()
+            return
+        if char == '{':
+            while self._peek() != '}':
+                key = self._value()
+                if self._next_char() != ':':
+                    raise ValueError('Resposta Solução 360 com JSON inválido')
+                if key in self._LIST_KEYS and self._peek() == '[':
+                    self._pos += 1
+                    yield from self._items()
+                    return
+                self._value()
+                if self._peek() == ',':
+                    self._pos += 1
+        raise ValueError('Formato inesperado da resposta Solução 360')
 
 
 class Solucao360Client:
@@ -44,20 +169,41 @@ class Solucao360Client:
       negócio que esperam sessão de usuário.
 
     Se `api_key` for fornecida, ela é usada direto. Caso contrário, cai no
-    fluxo de login e cacheia o token por `token_ttl_seconds`.
+    fluxo de login e cacheia o token por `token_ttl_seconds`; com
+    `start_token_refresher()`, uma thread faz o primeiro login e renova o
+    token antes de expirar. Requisições que chegam antes do primeiro login
+    esperam por ele em vez de logar em paralelo.
+
+    Todas as chamadas passam por um circuit breaker: com a API fora do ar,
+    falham na hora com CircuitOpenError em vez de esperar o timeout.
     """
 
     def __init__(self, api_host, email=None, password=None, api_key=None,
-                 tenant='FIEA', token_ttl_seconds=3000):
+                 tenant='FIEA', token_ttl_seconds=3000, timeout=30, breaker=None):
         self._api_host = api_host.rstrip('/')
         self._email = email
         self._password = password
         self._api_key = api_key
         self._tenant = tenant
         self._token_ttl = timedelta(seconds=token_ttl_seconds)
-        self._token = None
-        self._token_expiry = None
+        self._timeout = timeout
+        self._breaker = breaker or CircuitBreaker('solucao360')
+        # (token, expiry) trocados juntos, para leitura sem lock
+        self._session = (None, None)
         self._lock = threading.Lock()
+        self._refresher = None
+        self._refresher_stop = threading.Event()
+        # Sinalizado quando a primeira tentativa de login do refresher termina
+        self._first_refresh_done = threading.Event()
+        self._refresh_stats = {
+            'refreshes': 0,
+            'failures': 0,
+            'consecutive_failures': 0,
+            'last_refresh_at': None,
+            'last_error': None,
+            'last_error_at': None,
+            'next_refresh_at': None,
+        }
 
     def _login(self):
         headers = {
@@ -69,7 +215,7 @@ class Solucao360Client:
             self._api_host + LOGIN_PATH,
             json={'email': self._email, 'password': self._password},
             headers=headers,
-            timeout=30,
+            timeout=self._timeout,
         )
         response.raise_for_status()
         token = response.json().get('token')
@@ -85,13 +231,102 @@ class Solucao360Client:
                 'Solução 360 sem credencial: configure SOLUCAO360_API_KEY ou '
                 'SOLUCAO360_EMAIL + SOLUCAO360_PASSWORD'
             )
+        token, expiry = self._session
+        if token and expiry and datetime.utcnow() < expiry:
+            return token
+        if token is None and self._refresher_running() and not self._first_refresh_done.is_set():
+            # O refresher já está fazendo o primeiro login: espera por ele
+            self._first_refresh_done.wait(self._timeout)
         with self._lock:
+            token, expiry = self._session
             now = datetime.utcnow()
-            if self._token and self._token_expiry and now < self._token_expiry:
-                return self._token
-            self._token = self._login()
-            self._token_expiry = now + self._token_ttl
-            return self._token
+            if token and expiry and now < expiry:
+                return token
+            token = self._login()
+            self._session = (token, now + self._token_ttl)
+            return token
+
+    def _invalidate_token(self):
+        with self._lock:
+            self._session = (None, None)
+
+    def _refresh_token(self):
+        """Faz login fora do lock e troca o token atomicamente."""
+        started = datetime.utcnow()
+        try:
+            token = self._login()
+        except Exception as e:
+            with self._lock:
+                self._refresh_stats['failures'] += 1
+                self._refresh_stats['consecutive_failures'] += 1
+                self._refresh_stats['last_error'] = str(e)
+                self._refresh_stats['last_error_at'] = datetime.utcnow().isoformat()
+            logger.warning(f"Renovação do token Solução 360 falhou: {e}")
+            return False
+        with self._lock:
+            self._session = (token, started + self._token_ttl)
+            self._refresh_stats['refreshes'] += 1
+            self._refresh_stats['consecutive_failures'] = 0
+            self._refresh_stats['last_refresh_at'] = datetime.utcnow().isoformat()
+        return True
+
+    def _refresh_loop(self, margin, jitter):
+        while not self._refresher_stop.is_set():
+            _, expiry = self._session
+            if expiry is None:
+                wait = 0.0
+            else:
+                wait = (expiry - datetime.utcnow()).total_seconds() - margin
+                wait = max(0.0, wait - random.uniform(0, jitter))
+            with self._lock:
+                failures = self._refresh_stats['consecutive_failures']
+                if failures:
+                    # Backoff exponencial após falhas (máx. 5 min)
+                    wait = min(30 * 2 ** (failures - 1), 300)
+                self._refresh_stats['next_refresh_at'] = (
+                    datetime.utcnow() + timedelta(seconds=wait)
+                ).isoformat()
+            if self._refresher_stop.wait(wait):
+                return
+            self._refresh_token()
+            self._first_refresh_done.set()
+
+    def start_token_refresher(self, margin_seconds=300, jitter_seconds=60):
+        """Inicia a thread que renova o token `margin_seconds` (± jitter) antes de expirar.
+
+        Sem efeito no modo API key, que não tem login.
+        """
+        if self._api_key or self._refresher_running():
+            return
+        self._refresher_stop.clear()
+        self._first_refresh_done.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, args=(margin_seconds, jitter_seconds),
+            name='solucao360-token-refresher', daemon=True,
+        )
+        self._refresher.start()
+
+    def stop_token_refresher(self):
+        self._refresher_stop.set()
+
+    def _refresher_running(self):
+        # Após um fork (gunicorn --preload) a thread do processo pai não existe
+        return bool(self._refresher and self._refresher.is_alive())
+
+    def token_metrics(self):
+        """Saúde da sessão: modo de autenticação, validade do token e renovações."""
+        if self._api_key:
+            return {'auth_mode': 'api_key', 'healthy': True}
+        _, expiry = self._session
+        with self._lock:
+            stats = dict(self._refresh_stats)
+        return {
+            'auth_mode': 'login',
+            'healthy': bool(expiry and datetime.utcnow() < expiry),
+            'token_expires_at': expiry.isoformat() if expiry else None,
+            'refresher_running': self._refresher_running(),
+            **stats,
+        }
 
     def _headers(self):
         return {
@@ -101,21 +336,20 @@ class Solucao360Client:
             'tenant': self._tenant,
         }
 
-    def _request(self, method, endpoint, params=None, json_body=None):
+    def _send(self, method, endpoint, params=None, json_body=None, stream=False):
         url = self._api_host + endpoint
         response = requests.request(
             method, url, headers=self._headers(),
             params=params or None, json=json_body,
-            timeout=30,
+            timeout=self._timeout, stream=stream,
         )
         if response.status_code == 401:
-            with self._lock:
-                self._token = None
-                self._token_expiry = None
+            response.close()
+            self._invalidate_token()
             response = requests.request(
                 method, url, headers=self._headers(),
                 params=params or None, json=json_body,
-                timeout=30,
+                timeout=self._timeout, stream=stream,
             )
         if not response.ok:
             raise requests.HTTPError(
@@ -123,7 +357,34 @@ class Solucao360Client:
                 f'— body: {response.text[:1000]}',
                 response=response,
             )
-        return response.json()
+        return response
+
+    def _request(self, method, endpoint, params=None, json_body=None):
+        with self._breaker:
+            return self._send(method, endpoint, params=params, json_body=json_body).json()
+
+    def _read_chunks(self, response):
+        """Pedaços do corpo; falhas de leitura (timeout no meio do stream) vão para o breaker."""
+        chunks = response.iter_content(chunk_size=_STREAM_CHUNK_SIZE)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                self._breaker.record_failure(e)
+                raise
+            yield chunk
+
+    def iter_rows(self, method, endpoint, params=None, json_body=None):
+        """Gera as linhas de uma resposta em lista, parseando o corpo em streaming."""
+        # O bloco do breaker cobre só o _send: nenhum yield acontece dentro dele
+        with self._breaker:
+            response = self._send(method, endpoint, params=params, json_body=json_body, stream=True)
+        try:
+            yield from _JsonRowStream(self._read_chunks(response))
+        finally:
+            response.close()
 
     def get(self, endpoint, params=None):
         return self._request('GET', endpoint, params=params)
@@ -155,10 +416,50 @@ def _get_client():
             )
         _client = Solucao360Client(
             api_host, email=email, password=password, api_key=api_key, tenant=tenant,
+            timeout=float(os.getenv('SOLUCAO360_TIMEOUT_SECONDS', 30)),
+            breaker=get_breaker(
+                'solucao360',
+                failure_threshold=int(os.getenv('SOLUCAO360_BREAKER_FAILURES', 5)),
+                recovery_timeout=float(os.getenv('SOLUCAO360_BREAKER_RESET_SECONDS', 60)),
+            ),
         )
+        _start_refresher(_client)
         return _client
 
 
+def _start_refresher(client):
+    if os.getenv('SOLUCAO360_TOKEN_REFRESH', 'true').lower() in ('1', 'true', 'yes'):
+        client.start_token_refresher(
+            margin_seconds=int(os.getenv('SOLUCAO360_TOKEN_REFRESH_MARGIN_SECONDS', 300)),
+            jitter_seconds=int(os.getenv('SOLUCAO360_TOKEN_REFRESH_JITTER_SECONDS', 60)),
+        )
+
+
+def init_client():
+    """Cria o cliente e inicia o refresher no boot do servidor.
+
+    Chamado só pelos entrypoints do servidor (post_fork em gunicorn.conf.py e
+    `python run.py`), para que o primeiro login aconteça antes do tráfego sem
+    que scripts e comandos `flask` façam login. Idempotente. Sem credenciais
+    configuradas não faz nada.
+    """
+    try:
+        client = _get_client()
+    except RuntimeError as e:
+        logger.info(f"Cliente Solução 360 não iniciado: {e}")
+        return None
+    _start_refresher(client)
+    return client
+
+
+def get_client_metrics():
+    """Métricas do cliente deste worker (None se o Solução 360 ainda não foi usado)."""
+    client = _client
+    if client is None:
+        return None
+    return {'token': client.token_metrics()}
+
+
 def _extract_list(payload):
     """A API pode retornar lista direta, {data: [...]} ou {result: [...]}."""
     if isinstance(payload, list):
@@ -171,24 +472,175 @@ def _extract_list(payload):
     raise ValueError('Formato inesperado da resposta Solução 360')
 
 
-def fetch_previsao_ssi():
-    """Busca previsão SSI do Solução 360, já filtrada conforme Power Query."""
-    empresa_ano_fiscal_id = os.getenv('SOLUCAO360_EMPRESA_ANO_FISCAL_ID', '1020')
-    endpoint = f'/tools/fontes-dados/{FONTE_DADOS_PREVISAO_SSI}/executar'
+# Fontes de dados mudam no máximo uma vez por dia: cache por (fonte, parâmetros)
+# com TTL configurável, cópia opcional em disco (compartilhada entre workers e
+# reinícios) e fallback para o último valor quando o Solução 360 falha.
+# As variáveis são lidas no uso (não no import), como os demais SOLUCAO360_*.
+def _default_cache_ttl():
+    return int(os.getenv('SOLUCAO360_CACHE_TTL_SECONDS', 21600))
 
-    raw = _extract_list(
-        _get_client().get(endpoint, params={'EmpresaAnoFiscalId': empresa_ano_fiscal_id})
-    )
 
-    filtered = []
-    for row in raw:
-        produto = row.get('Produto') or ''
-        if not str(produto).startswith(_PRODUTO_PREFIX):
-            continue
-        if row.get('NomeProduto') in _NOME_PRODUTO_EXCLUIDOS:
-            continue
-        filtered.append(row)
-    return filtered
+def _cache_dir():
+    return os.getenv('SOLUCAO360_CACHE_DIR') or None
+
+
+def _cache_rows():
+    """Se falso, o cache guarda só os agregados (sem as linhas filtradas)."""
+    return os.getenv('SOLUCAO360_CACHE_ROWS', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _max_workers():
+    """Execuções simultâneas no fan-out por EmpresaAnoFiscalId."""
+    return int(os.getenv('SOLUCAO360_MAX_WORKERS', 4))
+
+
+def _empresa_ano_fiscal_id():
+    return os.getenv('SOLUCAO360_EMPRESA_ANO_FISCAL_ID', '1020')
+
+
+def _empresa_ano_fiscal_ids():
+    """Anos fiscais padrão do fan-out (SOLUCAO360_EMPRESA_ANO_FISCAL_IDS, separados por vírgula)."""
+    ids = os.getenv('SOLUCAO360_EMPRESA_ANO_FISCAL_IDS', '')
+    return [i.strip() for i in ids.split(',') if i.strip()] or [_empresa_ano_fiscal_id()]
+
+
+def _collect_rows(rows):
+    """Redutor padrão: guarda as linhas filtradas."""
+    return {'rows': list(rows)}
+
+
+class FonteDados:
+    """Fonte de dados do Solução 360 (`/tools/fontes-dados/<codigo>/executar`).
+
+    - params: parâmetros fixos da execução (além de EmpresaAnoFiscalId);
+    - row_filter: predicado aplicado linha a linha durante o streaming;
+    - reducer: transforma o stream filtrado no valor cacheado (JSON), por
+      padrão {'rows': [...]}; deve manter a chave 'rows' (lista ou None);
+    - ttl_seconds: validade do cache (padrão SOLUCAO360_CACHE_TTL_SECONDS).
+
+    Registre com `register_fonte` e use `iter_fonte`, `get_fonte_cached`,
+    `fetch_fonte_many` e `iter_fonte_merged`.
+    """
+
+    def __init__(self, name, codigo, params=None, row_filter=None, reducer=None,
+                 ttl_seconds=None, method='GET', fiscal_year_param='EmpresaAnoFiscalId'):
+        self.name = name
+        self.codigo = codigo
+        self.params = dict(params or {})
+        self.row_filter = row_filter
+        self.reducer = reducer or _collect_rows
+        self.method = method
+        self.fiscal_year_param = fiscal_year_param
+        self.ttl_seconds = ttl_seconds
+        self._cache = None
+        self._cache_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        """TTLCache da fonte, criado no primeiro uso (TTL e diretório lidos nesse momento)."""
+        if self._cache is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    self._cache = TTLCache(
+                        ttl_seconds=self.ttl_seconds or _default_cache_ttl(),
+                        directory=_cache_dir(),
+                        name=f'solucao360-{self.codigo.lower()}',
+                    )
+        return self._cache
+
+    @property
+    def endpoint(self):
+        return f'/tools/fontes-dados/{self.codigo}/executar'
+
+    def _params(self, empresa_ano_fiscal_id, extra_params):
+        return {
+            **self.params,
+            **(extra_params or {}),
+            self.fiscal_year_param: empresa_ano_fiscal_id or _empresa_ano_fiscal_id(),
+        }
+
+    def iter_rows(self, empresa_ano_fiscal_id=None, params=None):
+        """Linhas de uma execução, filtradas uma a uma sem materializar o payload."""
+        rows = _get_client().iter_rows(
+            self.method, self.endpoint, params=self._params(empresa_ano_fiscal_id, params),
+        )
+        if self.row_filter is None:
+            yield from rows
+            return
+        for row in rows:
+            if self.row_filter(row):
+                yield row
+
+    def get_cached(self, empresa_ano_fiscal_id=None, params=None):
+        """CachedValue do redutor da fonte para um ano fiscal."""
+        query = self._params(empresa_ano_fiscal_id, params)
+        key = (self.codigo, tuple(sorted((k, str(v)) for k, v in query.items())))
+        return self.cache.get_or_load(
+            key, lambda: self.reducer(self.iter_rows(empresa_ano_fiscal_id, params)),
+        )
+
+
+_fontes = {}
+
+
+def register_fonte(name, codigo, **options):
+    """Registra (ou substitui) uma fonte de dados; ver `FonteDados` para as opções."""
+    fonte = FonteDados(name, codigo, **options)
+    _fontes[name] = fonte
+    return fonte
+
+
+def get_fonte(name):
+    fonte = _fontes.get(name)
+    if fonte is None:
+        raise ValueError(f'Fonte de dados Solução 360 não registrada: {name}')
+    return fonte
+
+
+def iter_fonte(name, empresa_ano_fiscal_id=None, params=None):
+    return get_fonte(name).iter_rows(empresa_ano_fiscal_id, params)
+
+
+def get_fonte_cached(name, empresa_ano_fiscal_id=None, params=None):
+    return get_fonte(name).get_cached(empresa_ano_fiscal_id, params)
+
+
+def fetch_fonte_many(name, empresa_ano_fiscal_ids=None, params=None):
+    """Executa a fonte para vários anos fiscais em paralelo (cada um com seu cache).
+
+    Retorna ({id: CachedValue}, {id: erro}) na ordem dos ids; um ano que falhar
+    sem valor em cache não impede os demais.
+    """
+    fonte = get_fonte(name)
+    ids = list(dict.fromkeys(str(i) for i in (empresa_ano_fiscal_ids or _empresa_ano_fiscal_ids())))
+
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(_max_workers(), len(ids)))) as pool:
+        futures = {i: pool.submit(fonte.get_cached, i, params) for i in ids}
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logger.warning(f"Fonte {fonte.codigo} (EmpresaAnoFiscalId={i}) falhou: {e}")
+                errors[i] = str(e)
+    return results, errors
+
+
+def iter_fonte_merged(name, empresa_ano_fiscal_ids=None, params=None):
+    """Stream único com as linhas de vários anos fiscais, marcadas com o id de origem.
+
+    As execuções são feitas em paralelo via `fetch_fonte_many`; anos que
+    falharam são omitidos (e registrados no log). Se a fonte não guarda as
+    linhas no cache, cada ano é lido de novo em streaming.
+    """
+    fonte = get_fonte(name)
+    results, _ = fetch_fonte_many(name, empresa_ano_fiscal_ids, params)
+    for i, cached in results.items():
+        rows = cached.value.get('rows')
+        if rows is None:
+            rows = fonte.iter_rows(i, params)
+        for row in rows:
+            yield {**row, fonte.fiscal_year_param: i}
 
 
 def _coerce_number(value):
@@ -200,11 +652,147 @@ def _coerce_number(value):
         return 0.0
 
 
+def _month_value(row, aliases):
+    for field in aliases:
+        value = row.get(field)
+        if value not in (None, ''):
+            return _coerce_number(value)
+    return 0.0
+
+
+class ProducaoColumns:
+    """Matriz linhas × meses de Producao, montada em uma passada pelas linhas.
+
+    Os valores ficam em um `array('d')` contíguo (12 por linha) e cada linha
+    guarda o índice do seu (Produto, NomeProduto); `aggregate()` calcula total
+    anual, totais por mês e o detalhamento por produto sobre essa matriz.
+    """
+
+    def __init__(self):
+        self._values = array('d')
+        self._row_products = array('l')
+        self._products = {}
+
+    def add(self, row):
+        product = (row.get('Produto'), row.get('NomeProduto'))
+        index = self._products.setdefault(product, len(self._products))
+        self._row_products.append(index)
+        self._values.extend(_month_value(row, aliases) for aliases in _PRODUCAO_MONTH_FIELDS)
+
+    def __len__(self):
+        return len(self._row_products)
+
+    def aggregate(self):
+        values = self._values
+        monthly = [sum(values[month::_MONTHS]) for month in range(_MONTHS)]
+
+        product_monthly = [[0.0] * _MONTHS for _ in self._products]
+        for row_index, product_index in enumerate(self._row_products):
+            offset = row_index * _MONTHS
+            target = product_monthly[product_index]
+            for month in range(_MONTHS):
+                target[month] += values[offset + month]
+
+        by_produto = [
+            {
+                'produto': produto,
+                'nome_produto': nome_produto,
+                'total': sum(product_monthly[index]),
+                'monthly': product_monthly[index],
+            }
+            for (produto, nome_produto), index in self._products.items()
+        ]
+        by_produto.sort(key=lambda item: (str(item['produto']), str(item['nome_produto'])))
+
+        return {
+            'total': sum(monthly),
+            'monthly': monthly,
+            'by_produto': by_produto,
+        }
+
+
+def _previsao_ssi_row_filter(row):
+    """Replica os filtros do Power Query sobre fato_previsaossi360."""
+    produto = row.get('Produto') or ''
+    return (
+        str(produto).startswith(SSI_PRODUTO_PREFIX)
+        and row.get('NomeProduto') not in SSI_NOME_PRODUTO_EXCLUIDOS
+    )
+
+
+def _reduce_previsao_ssi(rows):
+    """Consome o stream uma vez, agregando e (opcionalmente) guardando as linhas."""
+    kept = [] if _cache_rows() else None
+    columns = ProducaoColumns()
+    for row in rows:
+        columns.add(row)
+        if kept is not None:
+            kept.append(row)
+    return {'rows': kept, **columns.aggregate()}
+
+
+PREVISAO_SSI = 'previsao_ssi'
+
+register_fonte(
+    PREVISAO_SSI,
+    FONTE_DADOS_PREVISAO_SSI,
+    row_filter=_previsao_ssi_row_filter,
+    reducer=_reduce_previsao_ssi,
+)
+
+
+def iter_previsao_ssi(empresa_ano_fiscal_id=None):
+    """Gera as linhas da previsão SSI, filtradas conforme Power Query uma a uma.
+
+    O corpo da resposta é parseado em streaming: nem o payload completo nem a
+    lista de linhas descartadas ficam em memória.
+    """
+    return iter_fonte(PREVISAO_SSI, empresa_ano_fiscal_id)
+
+
+def get_previsao_ssi_cached(empresa_ano_fiscal_id=None):
+    """CachedValue da previsão SSI: {'rows': [...] | None} mais os agregados
+    de `ProducaoColumns.aggregate()` ('total', 'monthly', 'by_produto').
+
+    `stale` indica que o valor venceu e foi servido porque o Solução 360 falhou.
+    """
+    return get_fonte_cached(PREVISAO_SSI, empresa_ano_fiscal_id)
+
+
+def fetch_previsao_ssi(empresa_ano_fiscal_id=None):
+    """Busca previsão SSI do Solução 360, já filtrada conforme Power Query."""
+    cached = get_previsao_ssi_cached(empresa_ano_fiscal_id)
+    if cached.value['rows'] is not None:
+        return cached.value['rows']
+    return list(iter_previsao_ssi(empresa_ano_fiscal_id))
+
+
+def aggregate_previsao_ssi(empresa_ano_fiscal_id=None):
+    """Totais da previsão SSI: anual, por mês e por Produto/NomeProduto."""
+    value = get_previsao_ssi_cached(empresa_ano_fiscal_id).value
+    return {key: value[key] for key in ('total', 'monthly', 'by_produto')}
+
+
+def compare_previsao_ssi(empresa_ano_fiscal_ids=None):
+    """Totais da previsão SSI por ano fiscal, buscados em paralelo.
+
+    Retorna {'years': {id: {'total', 'monthly', 'stale', 'updated_at'}}, 'errors': {id: erro}}.
+    """
+    results, errors = fetch_fonte_many(PREVISAO_SSI, empresa_ano_fiscal_ids)
+    return {
+        'years': {
+            i: {
+                'total': cached.value['total'],
+                'monthly': cached.value['monthly'],
+                'stale': cached.stale,
+                'updated_at': datetime.fromtimestamp(cached.stored_at).isoformat(),
+            }
+            for i, cached in results.items()
+        },
+        'errors': errors,
+    }
+
+
 def sum_previsao_ssi_producao():
     """Soma anual de Producao (equivalente a SUM(fato_previsaossi360[Producao]))."""
-    total = 0.0
-    for row in fetch_previsao_ssi():
-        for field in _PRODUCAO_MONTHLY_FIELDS:
-            if field in row:
-                total += _coerce_number(row[field])
-    return total
+    return get_previsao_ssi_cached().value['total']
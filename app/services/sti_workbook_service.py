@@ -0,0 +1,293 @@
+import hashlib
+import re
+import time
+import unicodedata
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, select, update
+
+from app import db
+from app.models import StiProductionRow, StiWorkbookUpload
+from app.services.production_scope_service import scope_predicates
+
+# Cabeçalhos aceitos por coluna (comparados sem acento, caixa, espaços e pontuação)
+_HEADER_ALIASES = {
+    'cd_idatendimento': ('cd_idatendimento', 'id atendimento', 'atendimento', 'código do atendimento'),
+    'ds_produtocategoria': ('ds_produtocategoria', 'categoria', 'categoria do produto',
+                            'produto categoria', 'categoria produto'),
+    'nm_produto': ('nm_produto', 'produto', 'nome do produto'),
+    'nm_unidadeoperacional': ('nm_unidadeoperacional', 'unidade operacional', 'unidade'),
+    'dt_apropriacao': ('dt_apropriacao', 'apropriação', 'data de apropriação', 'data apropriação'),
+    'qt_dehorasensaioscalibracoes': ('qt_dehorasensaioscalibracoes',
+                                     'qtde de horas/ensaios/calibrações',
+                                     'quantidade de horas/ensaios/calibrações',
+                                     'horas/ensaios/calibrações', 'qt de horas ensaios calibrações'),
+    'vl_totalfaturamento': ('vl_totalfaturamento', 'total faturamento', 'valor total faturamento',
+                            'valor total de faturamento', 'faturamento'),
+}
+_REQUIRED = ('ds_produtocategoria', 'dt_apropriacao', 'qt_dehorasensaioscalibracoes')
+
+# Linhas examinadas em busca do cabeçalho, inserts por lote e erros devolvidos
+_HEADER_SCAN_ROWS = 20
+_BATCH_SIZE = 1000
+_MAX_REPORTED_ERRORS = 50
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _normalize_header(value):
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+_HEADER_LOOKUP = {
+    _normalize_header(alias): field
+    for field, aliases in _HEADER_ALIASES.items()
+    for alias in aliases
+}
+
+
+def file_sha256(fileobj):
+    """SHA-256 do arquivo, lido em pedaços; devolve o cursor ao início."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(_HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S'):
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+    raise ValueError(f'data inválida: {value!r}')
+
+
+# Inteiro pt-BR com separador de milhar e sem vírgula: "1.234" é mil duzentos
+# e trinta e quatro, não 1,234
+_THOUSANDS_ONLY = re.compile(r'^-?[1-9]\d{0,2}(\.\d{3})+$')
+
+
+def _parse_number(value):
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise ValueError(f'número inválido: {value!r}')
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().replace('R$', '').replace(' ', '')
+    if ',' in text or _THOUSANDS_ONLY.match(text):
+        # Formato pt-BR: 1.234,56 ou só separador de milhar (1.234, 1.234.567)
+        text = text.replace('.', '').replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f'número inválido: {value!r}')
+
+
+def _text(value, max_length):
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text[:max_length] or None
+
+
+def _find_header(rows):
+    """(número da linha, {índice da coluna: campo}) do cabeçalho."""
+    for row_number, row in enumerate(rows, start=1):
+        columns = {}
+        for index, value in enumerate(row):
+            if value is None:
+                continue
+            field = _HEADER_LOOKUP.get(_normalize_header(value))
+            if field and field not in columns.values():
+                columns[index] = field
+        if all(field in columns.values() for field in _REQUIRED):
+            return row_number, columns
+        if row_number >= _HEADER_SCAN_ROWS:
+            break
+    raise ValueError(
+        'Cabeçalho não encontrado: a planilha precisa das colunas de categoria do produto, '
+        'data de apropriação e quantidade de horas/ensaios/calibrações'
+    )
+
+
+def _normalize_row(values, columns):
+    record = {field: values[index] if index < len(values) else None for index, field in columns.items()}
+    categoria = _text(record.get('ds_produtocategoria'), 120)
+    if not categoria:
+        raise ValueError('categoria do produto vazia')
+    return {
+        'cd_idatendimento': _text(record.get('cd_idatendimento'), 60),
+        'ds_produtocategoria': categoria,
+        'nm_produto': _text(record.get('nm_produto'), 255),
+        'nm_unidadeoperacional': _text(record.get('nm_unidadeoperacional'), 255),
+        'dt_apropriacao': _parse_date(record.get('dt_apropriacao')),
+        'qt_dehorasensaioscalibracoes': _parse_number(record.get('qt_dehorasensaioscalibracoes')),
+        'vl_totalfaturamento': _parse_number(record.get('vl_totalfaturamento')),
+    }
+
+
+def ingest_workbook(fileobj, filename=None, uploaded_by=None, sheet_name=None):
+    """Ingere a planilha de produção STI na tabela sti_production_rows.
+
+    - Se o arquivo (pelo SHA-256) já é o upload ativo, nada é reprocessado.
+    - A planilha é lida uma única vez em modo read-only (streaming); linhas
+      inválidas são contadas e reportadas, não interrompem a carga.
+    - As linhas são inseridas em lote e o upload novo substitui o anterior na
+      mesma transação.
+
+    Levanta ValueError para arquivo ilegível ou sem o cabeçalho esperado.
+    """
+    # Import local: só o upload/CLI precisam do openpyxl
+    import openpyxl
+
+    started = time.monotonic()
+    file_hash = file_sha256(fileobj)
+
+    existing = db.session.execute(
+        select(StiWorkbookUpload).where(StiWorkbookUpload.file_hash == file_hash)
+    ).scalar_one_or_none()
+    if existing is not None and existing.is_active:
+        return {**existing.to_dict(), 'skipped': True, 'errors': [], 'elapsed_seconds': 0}
+    if existing is not None:
+        # Upload antigo reenviado: as linhas dele já foram descartadas, reprocessa
+        db.session.delete(existing)
+        db.session.flush()
+
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        db.session.rollback()
+        raise ValueError(f'Arquivo não é uma planilha .xlsx válida: {e}')
+
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header_row, columns = _find_header(rows)
+
+        upload = StiWorkbookUpload(
+            file_hash=file_hash,
+            filename=filename,
+            sheet_name=sheet.title,
+            uploaded_by=uploaded_by,
+            is_active=False,
+        )
+        db.session.add(upload)
+        db.session.flush()
+
+        batch, errors = [], []
+        row_count = rejected_count = 0
+        for row_number, values in enumerate(rows, start=header_row + 1):
+            if all(value is None or value == '' for value in values):
+                continue
+            try:
+                record = _normalize_row(values, columns)
+            except ValueError as e:
+                rejected_count += 1
+                if len(errors) < _MAX_REPORTED_ERRORS:
+                    errors.append({'row': row_number, 'error': str(e)})
+                continue
+            record['upload_id'] = upload.id
+            batch.append(record)
+            row_count += 1
+            if len(batch) >= _BATCH_SIZE:
+                db.session.execute(insert(StiProductionRow), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(StiProductionRow), batch)
+    except KeyError:
+        db.session.rollback()
+        raise ValueError(f'Aba não encontrada na planilha: {sheet_name}')
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        workbook.close()
+
+    # Troca o upload ativo e descarta as linhas dos anteriores
+    previous_ids = select(StiWorkbookUpload.id).where(StiWorkbookUpload.id != upload.id)
+    db.session.execute(delete(StiProductionRow).where(StiProductionRow.upload_id.in_(previous_ids)))
+    db.session.execute(
+        update(StiWorkbookUpload)
+        .where(StiWorkbookUpload.id != upload.id)
+        .values(is_active=False)
+    )
+    upload.row_count = row_count
+    upload.rejected_count = rejected_count
+    upload.is_active = True
+    db.session.commit()
+
+    return {
+        **upload.to_dict(),
+        'skipped': False,
+        'errors': errors,
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }
+
+
+# Upload ativo visto por este worker: relido do banco a cada
+# STI_WORKBOOK_CHECK_SECONDS, é o sinal entre workers de que a planilha mudou
+_active_upload = {'version': None, 'checked_at': None}
+
+
+def active_upload_version():
+    """(id, created_at) do upload ativo, ou None; entra nas chaves dos caches STI."""
+    interval = current_app.config.get('STI_WORKBOOK_CHECK_SECONDS', 5)
+    checked_at = _active_upload['checked_at']
+    if checked_at is not None and time.monotonic() - checked_at < interval:
+        return _active_upload['version']
+    row = db.session.execute(
+        select(StiWorkbookUpload.id, StiWorkbookUpload.created_at)
+        .where(StiWorkbookUpload.is_active.is_(True))
+        .order_by(StiWorkbookUpload.id.desc())
+        .limit(1)
+    ).first()
+    version = (row.id, row.created_at.isoformat() if row.created_at else None) if row else None
+    _active_upload.update(version=version, checked_at=time.monotonic())
+    return version
+
+
+def forget_active_upload():
+    """Força a releitura do upload ativo neste worker (após uma ingestão)."""
+    _active_upload['checked_at'] = None
+
+
+def active_rows_filter(year, categorias, scope=None):
+    """Linhas do upload ativo nas categorias e no ano informados.
+
+    `scope` é o recorte do usuário (ver production_scope_service).
+    """
+    active_upload = select(StiWorkbookUpload.id).where(StiWorkbookUpload.is_active.is_(True))
+    return and_(
+        StiProductionRow.upload_id.in_(active_upload),
+        StiProductionRow.ds_produtocategoria.in_(list(categorias)),
+        StiProductionRow.dt_apropriacao >= date(year, 1, 1),
+        StiProductionRow.dt_apropriacao < date(year + 1, 1, 1),
+        *scope_predicates(StiProductionRow.__table__, scope),
+    )
+
+
+def realizado_por_categoria(year, categorias, scope=None):
+    """{categoria: (horas/ensaios/calibrações, faturamento)} do upload ativo no ano."""
+    stmt = select(
+        StiProductionRow.ds_produtocategoria,
+        func.sum(StiProductionRow.qt_dehorasensaioscalibracoes),
+        func.sum(StiProductionRow.vl_totalfaturamento),
+    ).where(
+        active_rows_filter(year, categorias, scope)
+    ).group_by(StiProductionRow.ds_produtocategoria)
+    return {
+        categoria: (horas or 0, faturamento or 0)
+        for categoria, horas, faturamento in db.session.execute(stmt)
+    }
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+# value: valor armazenado; stored_at: epoch (time.time()) da carga;
+# stale: True quando o valor já passou do TTL (ex.: servido porque a recarga falhou)
+CachedValue = namedtuple('CachedValue', ['value', 'stored_at', 'stale'])
+
+
+class TTLCache:
+    """Cache chave → valor com TTL, persistência opcional em disco e stale-on-error.
+
+    - Valores válidos (idade < ttl) são servidos da memória; quando o valor em
+      memória falta ou venceu, a cópia em disco (se configurada, e possivelmente
+      gravada por outro worker) é usada antes de recarregar.
+    - A recarga de uma chave é feita por uma thread só; as demais esperam.
+    - Se a recarga falhar e houver um valor antigo (memória ou disco), ele é
+      devolvido com stale=True em vez de propagar o erro.
+
+    Os valores precisam ser serializáveis em JSON quando `directory` é usado.
+    `ttl_seconds` pode ser uma função sem argumentos, chamada a cada verificação
+    (ex.: para ler o TTL de current_app.config).
+    """
+
+    def __init__(self, ttl_seconds, directory=None, name='cache'):
+        self.ttl = ttl_seconds
+        self.directory = directory
+        self.name = name
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{self.name}-{digest}.json')
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache {self.name}: falha ao ler {key!r} do disco: {e}")
+            return None
+        return payload['stored_at'], payload['value']
+
+    def _write_disk(self, key, stored_at, value):
+        if not self.directory:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': repr(key), 'stored_at': stored_at, 'value': value}, f,
+                          ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Cache {self.name}: falha ao gravar {key!r} em disco: {e}")
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _is_fresh(self, stored_at):
+        ttl = self.ttl() if callable(self.ttl) else self.ttl
+        return time.time() - stored_at < ttl
+
+    def peek(self, key):
+        """Valor atual da chave (fresco ou vencido) sem recarregar; None se ausente."""
+        entry = self._entries.get(key)
+        if entry is None or not self._is_fresh(entry[0]):
+            disk_entry = self._read_disk(key)
+            if disk_entry is not None and (entry is None or disk_entry[0] > entry[0]):
+                entry = disk_entry
+                self._entries[key] = entry
+        if entry is None:
+            return None
+        stored_at, value = entry
+        return CachedValue(value, stored_at, not self._is_fresh(stored_at))
+
+    def get_or_load(self, key, loader):
+        """Devolve o CachedValue da chave, chamando `loader()` se estiver vencido."""
+        cached = self.peek(key)
+        if cached is not None and not cached.stale:
+            return cached
+
+        with self._key_lock(key):
+            # Outra thread pode ter recarregado enquanto esperávamos
+            cached = self.peek(key)
+            if cached is not None and not cached.stale:
+                return cached
+            try:
+                value = loader()
+            except Exception as e:
+                if cached is None:
+                    raise
+                logger.warning(
+                    f"Cache {self.name}: recarga de {key!r} falhou ({e}); "
+                    f"servindo valor de {time.time() - cached.stored_at:.0f}s atrás"
+                )
+                return cached
+            stored_at = time.time()
+            self._entries[key] = (stored_at, value)
+            self._write_disk(key, stored_at, value)
+            return CachedValue(value, stored_at, False)
+
+    def invalidate(self, key=None):
+        """Descarta uma chave (ou todas), na memória e no disco."""
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                self._entries.pop(k, None)
+            if not self.directory:
+                return
+            if key is None:
+                paths = [
+                    os.path.join(self.directory, filename)
+                    for filename in os.listdir(self.directory)
+                    if filename.startswith(f'{self.name}-') and filename.endswith('.json')
+                ]
+            else:
+                paths = [self._path(key)]
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def invalidate_where(self, predicate):
+        """Descarta as chaves em memória para as quais `predicate(key)` é verdadeiro."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            self.invalidate(key)
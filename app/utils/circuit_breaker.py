@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Dependência externa marcada como indisponível: a chamada nem foi feita."""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f'{name} indisponível (circuito aberto, nova tentativa em {retry_after:.0f}s)')
+
+
+def is_dependency_failure(exc):
+    """Erros que indicam dependência fora do ar ou lenta (não erros do chamador)."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return False
+
+
+class CircuitBreaker:
+    """Circuit breaker por dependência externa.
+
+    - closed: chamadas passam; `failure_threshold` falhas seguidas abrem o circuito.
+    - open: chamadas falham na hora com CircuitOpenError por `recovery_timeout` segundos.
+    - half_open: uma única chamada de teste passa; sucesso fecha, falha reabre.
+
+    Uso:
+        with breaker:
+            response = requests.get(...)
+
+    GeneratorExit (consumidor abandonou um gerador dentro do bloco) é neutro:
+    não conta como sucesso nem como falha. Falhas fora do bloco (ex.: leitura
+    de um corpo em streaming) são registradas com `record_failure`.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30,
+                 is_failure=is_dependency_failure):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._stats = {
+            'calls': 0,
+            'failures': 0,
+            'rejected': 0,
+            'times_opened': 0,
+            'last_failure': None,
+            'last_failure_at': None,
+        }
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_progress = False
+        return self._state
+
+    def __enter__(self):
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._trial_in_progress):
+                self._stats['rejected'] += 1
+                retry_after = 0
+                if self._opened_at is not None:
+                    retry_after = max(0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+                raise CircuitOpenError(self.name, retry_after)
+            if state == HALF_OPEN:
+                self._trial_in_progress = True
+            self._stats['calls'] += 1
+        return self
+
+    def _on_failure(self, exc, trial):
+        self._failures += 1
+        self._stats['failures'] += 1
+        self._stats['last_failure'] = str(exc)[:500]
+        self._stats['last_failure_at'] = datetime.utcnow().isoformat()
+        if trial or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self._stats['times_opened'] += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    def record_failure(self, exc):
+        """Registra uma falha ocorrida depois do bloco `with` (ignora erros do chamador)."""
+        if not self._is_failure(exc):
+            return
+        with self._lock:
+            self._on_failure(exc, self._current_state() == HALF_OPEN)
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            trial = self._state == HALF_OPEN
+            self._trial_in_progress = False
+            if exc_type is not None and issubclass(exc_type, GeneratorExit):
+                # Consumidor parou de iterar: nada a concluir sobre a dependência
+                return False
+            if exc is not None and self._is_failure(exc):
+                self._on_failure(exc, trial)
+            elif exc is None or trial:
+                # Sucesso (ou erro do chamador, que prova que a dependência respondeu)
+                self._state = CLOSED
+                self._failures = 0
+            else:
+                self._failures = 0
+        return False
+
+    def call(self, fn, *args, **kwargs):
+        with self:
+            return fn(*args, **kwargs)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                **self._stats,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, failure_threshold=5, recovery_timeout=30):
+    """Breaker compartilhado (por worker) da dependência `name`."""
+    breaker = _breakers.get(name)
+    if breaker is not None:
+        return breaker
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, failure_threshold, recovery_timeout)
+        return _breakers[name]
+
+
+def get_breakers_metrics():
+    return {name: breaker.metrics() for name, breaker in list(_breakers.items())}
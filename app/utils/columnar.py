@@ -0,0 +1,121 @@
+import io
+import json
+import tempfile
+
+from sqlalchemy import types as sqltypes
+
+# Saída colunar (Arrow IPC stream e Parquet) montada direto dos lotes do
+# cursor. pyarrow é opcional: sem ele, `available()` é False e as rotas
+# respondem 406 para esses formatos.
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+COLUMNAR_FORMATS = {
+    'arrow': ARROW_STREAM_MIMETYPE,
+    'parquet': PARQUET_MIMETYPE,
+}
+
+# Parquet precisa do arquivo inteiro (rodapé no fim): até este tamanho fica em
+# memória, depois vai para disco
+_PARQUET_SPOOL_BYTES = 16 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def available():
+    return _pyarrow() is not None
+
+
+def _arrow_type(pa, sql_type):
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_(), bool
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64(), int
+    if isinstance(sql_type, (sqltypes.Float, sqltypes.Numeric)):
+        # Decimal vira float64 (uso analítico)
+        return pa.float64(), float
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp('us'), None
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32(), None
+    return pa.string(), str
+
+
+def _schema(pa, columns, metadata):
+    """Schema e conversores a partir de [(nome, tipo SQLAlchemy)]."""
+    fields, converters = [], []
+    for name, sql_type in columns:
+        arrow_type, converter = _arrow_type(pa, sql_type)
+        fields.append(pa.field(name, arrow_type))
+        converters.append(converter)
+    encoded = {key: json.dumps(value, default=str) for key, value in (metadata or {}).items()}
+    return pa.schema(fields, metadata=encoded or None), converters
+
+
+def _record_batch(pa, schema, converters, rows):
+    arrays = []
+    for index, (field, converter) in enumerate(zip(schema, converters)):
+        values = [row[index] for row in rows]
+        if converter is not None:
+            values = [
+                None if value is None else converter(value)
+                for value in values
+            ]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_arrow_stream(columns, batches, metadata=None):
+    """Bytes de um Arrow IPC stream, um record batch por lote de linhas.
+
+    `columns` é [(nome, tipo SQLAlchemy)]; `batches`, lotes de tuplas na
+    mesma ordem; `metadata` (dict) vai no schema, em JSON.
+    """
+    pa = _pyarrow()
+    schema, converters = _schema(pa, columns, metadata)
+    buffer = io.BytesIO()
+    writer = pa.ipc.new_stream(buffer, schema)
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    # Schema sai antes da consulta: o cliente recebe bytes na hora
+    yield drain()
+    for rows in batches:
+        if rows:
+            writer.write_batch(_record_batch(pa, schema, converters, rows))
+            yield drain()
+    writer.close()
+    yield drain()
+
+
+def iter_parquet(columns, batches, metadata=None):
+    """Bytes de um arquivo Parquet, com um row group por lote de linhas."""
+    pa = _pyarrow()
+    schema, converters = _schema(pa, columns, metadata)
+    with tempfile.SpooledTemporaryFile(max_size=_PARQUET_SPOOL_BYTES) as spool:
+        with pa.parquet.ParquetWriter(spool, schema, compression='snappy') as writer:
+            for rows in batches:
+                if rows:
+                    writer.write_batch(_record_batch(pa, schema, converters, rows))
+        spool.seek(0)
+        for chunk in iter(lambda: spool.read(_CHUNK_SIZE), b''):
+            yield chunk
+
+
+COLUMNAR_WRITERS = {
+    'arrow': iter_arrow_stream,
+    'parquet': iter_parquet,
+}
@@ -2,6 +2,9 @@ from flask import jsonify
 from werkzeug.exceptions import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.services.production_scope_service import ProductionScopeError
+from app.utils.circuit_breaker import CircuitOpenError
+
 def register_error_handlers(app):
     """Registrar handlers de erro globais"""
     
@@ -72,6 +75,26 @@ def register_error_handlers(app):
             'message': 'Ocorreu um erro ao processar sua solicitação'
         }), 500
     
+    @app.errorhandler(CircuitOpenError)
+    def handle_circuit_open(e):
+        """Handler para dependência externa com circuito aberto"""
+        app.logger.warning(f"Circuit open: {str(e)}")
+        response = jsonify({
+            'error': 'Serviço Indisponível',
+            'message': str(e)
+        })
+        response.headers['Retry-After'] = str(int(e.retry_after) + 1)
+        return response, 503
+    
+    @app.errorhandler(ProductionScopeError)
+    def handle_production_scope_error(e):
+        """Handler para recortes de produção inválidos (não libera a unidade toda)"""
+        app.logger.error(f"Production scopes error: {str(e)}")
+        return jsonify({
+            'error': 'Serviço Indisponível',
+            'message': 'Recortes de produção inválidos; contate o administrador'
+        }), 503
+    
     @app.errorhandler(Exception)
     def handle_generic_error(e):
         """Handler genérico para qualquer erro não tratado"""
@@ -0,0 +1,20 @@
+from sqlalchemy import select
+
+from app import db
+
+
+def is_int(value):
+    """Inteiro vindo do JSON (bool é subclasse de int, mas não conta)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_int_list(value):
+    """Lista de inteiros (ver `is_int`)."""
+    return isinstance(value, list) and all(is_int(item) for item in value)
+
+
+def existing_ids(column, ids):
+    """Subconjunto de ids que existe na tabela, em uma única consulta."""
+    if not ids:
+        return set()
+    return set(db.session.execute(select(column).where(column.in_(list(ids)))).scalars())
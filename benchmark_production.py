@@ -0,0 +1,368 @@
+"""
+Script para medir as calculadoras de /api/production em DWs sintéticos de tamanhos crescentes
+Execute: python benchmark_production.py [--sizes 100000,1000000] [--repeat 20] [--output benchmark.json]
+
+Para cada tamanho, gera (ou reaproveita) um DW com generate_synthetic_dw.py e
+roda, em um subprocesso próprio (memória limpa e DATABASE_URL_DW apontando para
+o arquivo), cada entrada de `_SUMMARY_CALCULATORS` e de `_DRILLDOWNS`, com os
+caches zerados a cada execução. A medida SSI roda nos três modos de
+SSI_META_SOURCE (dw, api e reconcile); api e reconcile buscam a meta no
+stand-in do Solução 360 (solucao360_standin.py, iniciado pelo benchmark) ou
+em --solucao360-url. Registra por consulta:
+  - latência (média, p50, p90, p95, p99, máx.), em ms
+  - instruções SQL executadas e linhas lidas (estimadas pelo plano: tabelas
+    lidas por SCAN contam inteiras; buscas por índice não são estimadas)
+  - pico de memória alocada em Python (tracemalloc) e o RSS máximo do processo
+
+O resultado vai para um JSON. Com --baseline, compara com um resultado anterior
+e sai com código 1 se alguma latência p50 piorar acima de --threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_PERCENTILES = (50, 90, 95, 99)
+
+# Modos da meta SSI medidos; 'dw' mantém o nome da consulta sem sufixo
+_SSI_META_SOURCES = ('dw', 'api', 'reconcile')
+_STANDIN_API_KEY = 'standin-api-key'
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * percentile / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def _latency_stats(samples):
+    stats = {
+        'mean_ms': statistics.fmean(samples),
+        'max_ms': max(samples),
+        'min_ms': min(samples),
+    }
+    for percentile in _PERCENTILES:
+        stats[f'p{percentile}_ms'] = _percentile(samples, percentile)
+    return {key: round(value, 3) for key, value in stats.items()}
+
+
+# ---------------------------------------------------------------------------
+# Subprocesso: roda as consultas contra um DW já gerado
+# ---------------------------------------------------------------------------
+
+def _benchmarks(production):
+    """[(nome, config, função)] de tudo que é medido; chaves novas entram sozinhas."""
+    benchmarks = []
+    for key, calculator in production._SUMMARY_CALCULATORS.items():
+        name = 'summary:' + '/'.join(part for part in key if part)
+        if calculator is production._calculate_ssi_consultas_exames:
+            for source in _SSI_META_SOURCES:
+                suffix = '' if source == 'dw' else f'[meta={source}]'
+                benchmarks.append((name + suffix, {'SSI_META_SOURCE': source}, calculator))
+        else:
+            benchmarks.append((name, {}, calculator))
+    for key in production._DRILLDOWNS:
+        name = 'drilldown:' + '/'.join(part for part in key if part)
+        benchmarks.append((name, {}, lambda key=key: production._load_drilldown(key, datetime.now().year)))
+    return benchmarks
+
+
+class _StatementCounter:
+    """Conta instruções e estima linhas lidas pelo EXPLAIN QUERY PLAN (SQLite)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.table_rows = {}
+        self.statements = 0
+        self.rows_scanned = 0
+        self._plans = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('EXPLAIN'):
+            return
+        self.statements += 1
+        if self.engine.dialect.name != 'sqlite':
+            return
+        key = (statement, tuple(parameters) if isinstance(parameters, (list, tuple)) else None)
+        if key not in self._plans:
+            plan = cursor.connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            scanned = []
+            for row in plan:
+                match = re.match(r'SCAN (?:TABLE )?(?:\w+\.)?(\w+)', row[-1])
+                if match:
+                    scanned.append(match.group(1))
+            self._plans[key] = scanned
+        for table in self._plans[key]:
+            if table not in self.table_rows:
+                self.table_rows[table] = cursor.connection.execute(
+                    f'SELECT COUNT(*) FROM dw.{table}'
+                ).fetchone()[0] if table.startswith('fato_') else 0
+            self.rows_scanned += self.table_rows[table]
+
+    def reset(self):
+        self.statements = 0
+        self.rows_scanned = 0
+
+
+def _run_worker(repeat, warmup, output):
+    from sqlalchemy import event
+
+    from app import create_app
+    from app.routes import production
+    from app.services.solucao360_service import PREVISAO_SSI, get_fonte
+    from app.utils.cache import TTLCache
+
+    app = create_app()
+    # Realizado STI do DW; a meta SSI do Solução 360 vem do stand-in
+    app.config['SSI_META_SOURCE'] = 'dw'
+    app.config['STI_REALIZADO_SOURCE'] = 'dw'
+
+    caches = [value for value in vars(production).values() if isinstance(value, TTLCache)]
+    caches.append(get_fonte(PREVISAO_SSI).cache)
+    counter = _StatementCounter(production.dw_engine)
+    event.listen(production.dw_engine, 'before_cursor_execute', counter)
+
+    results = {}
+    with app.app_context():
+        for name, overrides, run in _benchmarks(production):
+            app.config.update({'SSI_META_SOURCE': 'dw', **overrides})
+
+            def cold_run():
+                for cache in caches:
+                    cache.invalidate()
+                return run()
+
+            for _ in range(warmup):
+                cold_run()
+
+            counter.reset()
+            cold_run()
+            statements, rows_scanned = counter.statements, counter.rows_scanned
+
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cold_run()
+                samples.append((time.perf_counter() - started) * 1000)
+
+            tracemalloc.start()
+            cold_run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                **_latency_stats(samples),
+                'samples': repeat,
+                'statements': statements,
+                'rows_scanned': rows_scanned if production.dw_engine.dialect.name == 'sqlite' else None,
+                'peak_python_memory_bytes': peak,
+            }
+
+    payload = {
+        'results': results,
+        'table_rows': counter.table_rows,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+
+
+# ---------------------------------------------------------------------------
+# Processo principal: gera os DWs, dispara um subprocesso por tamanho
+# ---------------------------------------------------------------------------
+
+def _dw_path(workdir, rows, seed, base_year):
+    return os.path.join(workdir, f'dw_sintetico_{rows}_{seed}_{base_year}.db')
+
+
+def _ensure_dw(workdir, rows, seed, years, base_year):
+    path = _dw_path(workdir, rows, seed, base_year)
+    if os.path.exists(path):
+        print(f"   ♻️  Reaproveitando {path}")
+        return path
+    from generate_synthetic_dw import generate_synthetic_dw
+    generate_synthetic_dw(path, rows, seed, years, base_year=base_year)
+    return path
+
+
+def _start_standin():
+    """Sobe solucao360_standin.py em uma porta livre; retorna (processo, url)."""
+    import socket
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(_ROOT, 'solucao360_standin.py'), '--port', str(port),
+         '--api-key', _STANDIN_API_KEY],
+        cwd=_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + '/_standin/stats', timeout=1).close()
+            return process, url
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('Stand-in do Solução 360 não respondeu')
+
+
+def _run_size(dw_path, repeat, warmup, solucao360_url, solucao360_api_key):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    env = {
+        **os.environ,
+        'DATABASE_URL_DW': f'sqlite:///{os.path.abspath(dw_path)}',
+        # O benchmark não usa o banco da aplicação
+        'DATABASE_URL': 'sqlite://',
+        'SOLUCAO360_URL': solucao360_url,
+        # Meta SSI sempre buscada de novo (sem cópia em disco entre execuções)
+        'SOLUCAO360_CACHE_DIR': '',
+    }
+    if solucao360_api_key:
+        env['SOLUCAO360_API_KEY'] = solucao360_api_key
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', output,
+             '--repeat', str(repeat), '--warmup', str(warmup)],
+            cwd=_ROOT, env=env, check=True,
+        )
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(output)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_size(rows, payload):
+    print(f"\n📊 fato_producao_ebdr = {rows:,} linhas (RSS máx. {payload['max_rss_kb'] / 1024:.0f} MB)")
+    print(f"   {'consulta':<66} {'p50':>9} {'p95':>9} {'p99':>9} {'SQL':>4} {'linhas lidas':>13}")
+    for name, result in payload['results'].items():
+        rows_scanned = result['rows_scanned']
+        print(
+            f"   {name:<66} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+            f"{result['p99_ms']:>7.1f}ms {result['statements']:>4} "
+            f"{rows_scanned if rows_scanned is not None else '-':>13}"
+        )
+
+
+def _compare(report, baseline_path, threshold):
+    """Lista de regressões de p50 acima de `threshold` em relação ao baseline."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {size['rows']: size['results'] for size in json.load(f)['sizes']}
+    regressions = []
+    for size in report['sizes']:
+        previous = baseline.get(size['rows'], {})
+        for name, result in size['results'].items():
+            if name not in previous or not previous[name]['p50_ms']:
+                continue
+            change = result['p50_ms'] / previous[name]['p50_ms'] - 1
+            if change > threshold:
+                regressions.append((size['rows'], name, previous[name]['p50_ms'], result['p50_ms'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark das calculadoras de /api/production')
+    parser.add_argument('--sizes', default='100000,1000000',
+                        help='tamanhos de fato_producao_ebdr, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=20, help='execuções medidas por consulta')
+    parser.add_argument('--warmup', type=int, default=2, help='execuções descartadas por consulta')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=int, default=3)
+    # As calculadoras filtram o ano corrente: o DW precisa terminar nele
+    parser.add_argument('--base-year', type=int, default=datetime.now().year,
+                        help='último ano do DW gerado (padrão: o atual)')
+    parser.add_argument('--workdir', default='.benchmark', help='onde os DWs gerados ficam (e são reaproveitados)')
+    parser.add_argument('--output', default='benchmark_production.json')
+    parser.add_argument('--baseline', help='resultado anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='piora relativa de p50 considerada regressão (0.2 = 20%%)')
+    parser.add_argument('--solucao360-url',
+                        help='Solução 360 para a meta SSI nos modos api/reconcile '
+                             '(padrão: stand-in local iniciado pelo benchmark)')
+    parser.add_argument('--worker', metavar='OUTPUT', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _run_worker(args.repeat, args.warmup, args.worker)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print("⏱️  Benchmark das calculadoras de produção")
+    print(f"   Tamanhos: {', '.join(f'{size:,}' for size in sizes)} | {args.repeat} execuções por consulta")
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'years': args.years,
+        'base_year': args.base_year,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'sizes': [],
+    }
+    standin = None
+    if args.solucao360_url:
+        solucao360_url, solucao360_api_key = args.solucao360_url, None
+    else:
+        standin, solucao360_url = _start_standin()
+        solucao360_api_key = _STANDIN_API_KEY
+        print(f"   Meta SSI (api/reconcile) do stand-in em {solucao360_url}")
+    try:
+        for rows in sizes:
+            print(f"\n🏗️  DW com {rows:,} linhas")
+            dw_path = _ensure_dw(args.workdir, rows, args.seed, args.years, args.base_year)
+            payload = _run_size(dw_path, args.repeat, args.warmup, solucao360_url, solucao360_api_key)
+            report['sizes'].append({'rows': rows, 'dw': dw_path, **payload})
+            _print_size(rows, payload)
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Resultados gravados em {args.output}")
+
+    if args.baseline:
+        regressions = _compare(report, args.baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressões de p50 acima de {args.threshold:.0%}:")
+            for rows, name, before, after, change in regressions:
+                print(f"   {rows:,} linhas — {name}: {before:.1f}ms → {after:.1f}ms (+{change:.0%})")
+            return 1
+        print(f"\n✅ Sem regressões de p50 acima de {args.threshold:.0%} em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
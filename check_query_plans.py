@@ -0,0 +1,184 @@
+"""
+Script para verificar, pelo plano de execução, que as buscas do catálogo
+usam index seek (e não scan) nas tabelas de junção e em reports.step_id.
+Execute: python check_query_plans.py
+
+Suporta SQL Server (SHOWPLAN_XML), PostgreSQL (EXPLAIN JSON) e SQLite
+(EXPLAIN QUERY PLAN). Em tabelas quase vazias o otimizador pode preferir scan;
+rode contra um banco com volume realista.
+"""
+
+import json
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+from sqlalchemy import exists, select
+
+from app import create_app, db
+from app.models import Report, Step, Unit, User, UserUnit, report_units
+
+_SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+
+
+def _sample_ids():
+    step_id = db.session.execute(select(Step.id).limit(1)).scalar() or 1
+    unit_id = db.session.execute(select(Unit.id).limit(1)).scalar() or 1
+    user_id = db.session.execute(select(User.id).limit(1)).scalar() or 1
+    return step_id, unit_id, user_id
+
+
+def _checks(step_id, unit_id, user_id):
+    """(nome, statement, [(tabela, índice esperado — None aceita qualquer seek)])."""
+    return [
+        (
+            'reports por step e unidade',
+            select(Report.id).where(
+                Report.step_id == step_id,
+                exists().where(
+                    report_units.c.report_id == Report.id,
+                    report_units.c.unit_id == unit_id,
+                ),
+            ),
+            [('reports', 'ix_reports_step_id'), ('report_units', None)],
+        ),
+        (
+            'unit.reports',
+            select(Report.id)
+            .join(report_units, report_units.c.report_id == Report.id)
+            .where(report_units.c.unit_id == unit_id),
+            [('report_units', 'ix_report_units_unit_id_report_id')],
+        ),
+        (
+            'unit.users',
+            select(UserUnit.user_id).where(UserUnit.unit_id == unit_id),
+            [('user_units', 'ix_user_units_unit_id_user_id')],
+        ),
+        (
+            'pertinência usuário-unidade',
+            select(UserUnit.bi_filter_param).where(
+                UserUnit.user_id == user_id,
+                UserUnit.unit_id == unit_id,
+            ),
+            [('user_units', None)],
+        ),
+    ]
+
+
+def _compile(stmt):
+    return str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _plan_sqlite(conn, sql):
+    """Lista de (operação, tabela, índice) a partir do EXPLAIN QUERY PLAN."""
+    ops = []
+    for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}'):
+        detail = row[-1]
+        match = re.match(r'(SEARCH|SCAN) (\w+)(?: AS \w+)?(.*)', detail)
+        if not match:
+            continue
+        verb, table, rest = match.groups()
+        index = re.search(r'USING (?:COVERING )?INDEX (\w+)', rest)
+        if index:
+            index_name = index.group(1)
+        elif 'PRIMARY KEY' in rest:
+            index_name = 'PRIMARY KEY'
+        else:
+            index_name = None
+        op = 'seek' if verb == 'SEARCH' and index_name else 'scan'
+        ops.append((op, table, index_name))
+    return ops
+
+
+def _plan_mssql(conn, sql):
+    """Lista de (operação, tabela, índice) a partir do SHOWPLAN_XML."""
+    conn.exec_driver_sql('SET SHOWPLAN_XML ON')
+    try:
+        plan_xml = conn.exec_driver_sql(sql).scalar()
+    finally:
+        conn.exec_driver_sql('SET SHOWPLAN_XML OFF')
+
+    ops = []
+    for rel_op in ET.fromstring(plan_xml).iter(f'{_SHOWPLAN_NS}RelOp'):
+        physical = rel_op.get('PhysicalOp', '')
+        if 'Seek' not in physical and 'Scan' not in physical:
+            continue
+        obj = rel_op.find(f'./*/{_SHOWPLAN_NS}Object')
+        if obj is None:
+            continue
+        table = (obj.get('Table') or '').strip('[]')
+        index_name = (obj.get('Index') or '').strip('[]') or None
+        ops.append(('seek' if 'Seek' in physical else 'scan', table, index_name))
+    return ops
+
+
+def _plan_postgresql(conn, sql):
+    """Lista de (operação, tabela, índice) a partir do EXPLAIN (FORMAT JSON)."""
+    plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    ops = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', []))
+        node_type = node.get('Node Type', '')
+        if 'Scan' not in node_type:
+            continue
+        op = 'seek' if 'Index' in node_type else 'scan'
+        ops.append((op, node.get('Relation Name'), node.get('Index Name')))
+    return ops
+
+
+def _is_seek(ops, table, expected_index):
+    """True se a tabela só é acessada por seek (no índice esperado, se houver)."""
+    table_ops = [op for op in ops if op[1] == table]
+    if not table_ops or any(op[0] == 'scan' for op in table_ops):
+        return False
+    return expected_index is None or any(op[2] == expected_index for op in table_ops)
+
+
+_PLANNERS = {
+    'sqlite': _plan_sqlite,
+    'mssql': _plan_mssql,
+    'postgresql': _plan_postgresql,
+}
+
+
+def check_query_plans():
+    app = create_app()
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        planner = _PLANNERS.get(dialect)
+        if not planner:
+            print(f"❌ Dialeto não suportado: {dialect}")
+            return False
+
+        print(f"🔎 Verificando planos de execução ({dialect})...\n")
+        all_ok = True
+        with db.engine.connect() as conn:
+            for name, stmt, expectations in _checks(*_sample_ids()):
+                ops = planner(conn, _compile(stmt))
+                ok = all(_is_seek(ops, table, index) for table, index in expectations)
+                all_ok = all_ok and ok
+
+                status = '✅' if ok else '❌'
+                expected = ', '.join(
+                    f"{table} ({index or 'qualquer índice'})" for table, index in expectations
+                )
+                print(f"{status} {name} — esperado seek em {expected}")
+                for op, op_table, index_name in ops:
+                    print(f"     {op:<5} {op_table} {index_name or ''}")
+
+        print()
+        if all_ok:
+            print("✅ Todas as buscas usam index seek")
+        else:
+            print("❌ Há buscas sem index seek — verifique se a migration de índices foi aplicada")
+        return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
@@ -5,6 +5,7 @@ Execute: python clear_db.py
 
 from app import create_app, db
 from app.models import User, Unit, Step, Report, UserUnit
+from app.services.catalog_service import bump_catalog_version
 
 
 def clear_database():
@@ -44,6 +45,8 @@ def clear_database():
             print("   - Deletando users...")
             User.query.delete()
             
+            bump_catalog_version()
+            
             # Commit das mudanças
             db.session.commit()
             
@@ -22,6 +22,49 @@ class Config:
     POWERBI_TENANT_ID = os.getenv('POWERBI_TENANT_ID')
     POWERBI_AUTHORITY_URL = os.getenv('POWERBI_AUTHORITY_URL', 'https://login.microsoftonline.com/organizations')
     POWERBI_SCOPE = os.getenv('POWERBI_SCOPE', 'https://analysis.windows.net/powerbi/api/.default')
+    # API REST e endpoint de token: trocar pelos do powerbi_standin.py para
+    # testes de carga locais (POWERBI_TOKEN_URL vazio = MSAL com a authority)
+    POWERBI_API_URL = os.getenv('POWERBI_API_URL', 'https://api.powerbi.com/v1.0/myorg')
+    POWERBI_TOKEN_URL = os.getenv('POWERBI_TOKEN_URL')
+    # Validade (segundos) do cache de metadados de reports (embedUrl, datasetId)
+    POWERBI_METADATA_TTL_SECONDS = int(os.getenv('POWERBI_METADATA_TTL_SECONDS', 600))
+    # Timeout (segundos) das chamadas à API e circuit breaker: após N falhas
+    # seguidas, as chamadas falham na hora por RESET segundos
+    POWERBI_TIMEOUT_SECONDS = float(os.getenv('POWERBI_TIMEOUT_SECONDS', 30))
+    POWERBI_BREAKER_FAILURES = int(os.getenv('POWERBI_BREAKER_FAILURES', 5))
+    POWERBI_BREAKER_RESET_SECONDS = float(os.getenv('POWERBI_BREAKER_RESET_SECONDS', 60))
+
+    # Catálogo de navegação (steps/reports) em memória por worker:
+    # intervalo, em segundos, entre verificações da versão no banco
+    CATALOG_VERSION_CHECK_SECONDS = float(os.getenv('CATALOG_VERSION_CHECK_SECONDS', 5))
+    # max-age (segundos) do Cache-Control de /api/units/<id>/navigation
+    NAVIGATION_CACHE_MAX_AGE = int(os.getenv('NAVIGATION_CACHE_MAX_AGE', 60))
+
+    # Calculadoras de /api/production executadas em paralelo por requisição
+    PRODUCTION_MAX_WORKERS = int(os.getenv('PRODUCTION_MAX_WORKERS', 6))
+    # Validade (segundos) dos caches de /api/production: agregados EB, meta e
+    # realizado STI, e resultados de /summary e do drill-down
+    EB_CACHE_TTL_SECONDS = int(os.getenv('EB_CACHE_TTL_SECONDS', 300))
+    STI_CACHE_TTL_SECONDS = int(os.getenv('STI_CACHE_TTL_SECONDS', 300))
+    PRODUCTION_CACHE_TTL_SECONDS = int(os.getenv('PRODUCTION_CACHE_TTL_SECONDS', 300))
+
+    # JSON que mapeia UserUnit.bi_filter_param para o recorte das medidas de
+    # /api/production (valores de nm_unidade, cd_unidade, cd_filial...). Vazio =
+    # todos os usuários veem os números da unidade toda
+    PRODUCTION_SCOPES_FILE = os.getenv('PRODUCTION_SCOPES_FILE')
+
+    # Origem da meta SSI (SESI Saúde): api (Solução 360), dw
+    # (fato_producao_metaofertassi) ou reconcile (DW, comparado com a API)
+    SSI_META_SOURCE = os.getenv('SSI_META_SOURCE', 'api')
+    # Diferença relativa aceita entre as duas metas no modo reconcile
+    SSI_META_RECONCILE_TOLERANCE = float(os.getenv('SSI_META_RECONCILE_TOLERANCE', 0.01))
+
+    # Origem do realizado STI: dw (fato_producao_stisgt) ou planilha
+    # (relatorio_produção.xlsx enviado em POST /api/production/sti/workbook)
+    STI_REALIZADO_SOURCE = os.getenv('STI_REALIZADO_SOURCE', 'dw')
+    # Intervalo (segundos) entre verificações do upload ativo da planilha STI:
+    # um upload em outro worker (ou pelo CLI) chega aos caches deste em até N s
+    STI_WORKBOOK_CHECK_SECONDS = float(os.getenv('STI_WORKBOOK_CHECK_SECONDS', 5))
 
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
@@ -0,0 +1,562 @@
+"""
+Script para gerar um DW sintético (SQLite) com as nove tabelas fato_producao_*
+Execute: python generate_synthetic_dw.py [--output dw_sintetico.db] [--rows 100000] [--seed 42] [--base-year 2026]
+
+As tabelas têm exatamente as colunas documentadas em app/dw_models.py, com
+distribuições plausíveis de cursos, modalidades, status, itens e datas ao longo
+dos anos. Com a mesma semente e o mesmo --base-year, o arquivo gerado é sempre
+o mesmo. As calculadoras da API filtram o ano corrente: para dados "de hoje",
+passe --base-year com o ano atual.
+
+Para usar na aplicação:
+    DATABASE_URL_DW=sqlite:///dw_sintetico.db
+(o arquivo é anexado como o schema "dw" — ver app/dw_models.py)
+
+--rows é o número de linhas da maior tabela (fato_producao_ebdr); as demais
+seguem proporções fixas. Use --table-rows tabela=N para sobrepor uma tabela.
+--scopes-file grava um PRODUCTION_SCOPES_FILE que mapeia os bi_filter_param do
+seed_db.py para as unidades sintéticas.
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+_BATCH_SIZE = 50_000
+
+# Último ano dos dados (--base-year); fixo para que a semente reproduza o arquivo
+_BASE_YEAR = 2026
+
+# Medidas fracionárias; as demais nr_*/qt_* são contagens
+_FLOAT_COLUMNS = ('qt_dehorasensaioscalibracoes',)
+
+# Colunas de cada tabela, na ordem de app/dw_models.py
+_TABLES = {
+    'fato_producao_ebdr': [
+        'cd_filial', 'cd_unidade', 'dt_matricula', 'dt_inicial', 'dt_final', 'nr_matricula',
+        'cd_turma', 'nr_matricula_tuma', 'cd_centro', 'cd_curso', 'nm_curso', 'cd_modalidade_curso',
+        'nm_modalidade', 'nm_mediacao', 'nm_situacao_matricula', 'nm_financiamento', 'nr_carga_horaria',
+        'nm_periodo_letivo', 'nm_industria', 'dt_aula', 'nm_aluno', 'nm_fonte', 'dt_carga',
+    ],
+    'fato_producao_metaofertaeb': [
+        'cd_ofertaid', 'nm_programaestrategico', 'dt_calendario', 'nm_modalidade', 'qt_alunos',
+        # Usada pelo cálculo de hora-aluno (SUM(nr_producao)), embora não listada no modelo
+        'nr_producao',
+    ],
+    'fato_producao_metaproducaoep': [
+        'cd_producaoid', 'nm_unidade', 'nm_area', 'nm_curso', 'nm_modalidade', 'nm_turma',
+        'nm_municipio', 'cd_turma', 'tp_matricula', 'nm_programaestrategico', 'dt_inicio', 'dt_termino',
+        'nr_horaalunototal', 'dt_mesreferencia', 'nr_horaalunomensalalocada', 'dt_carga',
+    ],
+    'fato_producao_epdr': [
+        'cd_filial', 'nm_unidade', 'dt_matricula', 'dt_inicial', 'dt_final', 'nr_matricula',
+        'cd_turma', 'cd_centro', 'cd_curso', 'nm_curso', 'cd_modalidadecurso', 'nm_modalidade',
+        'nm_financiamento', 'nr_cargahoraria', 'nr_periodoletivo', 'nm_industria', 'nm_aluno', 'nm_fonte',
+        'cd_area', 'nm_area', 'nm_mediacaoturma', 'nm_mediacaosolucaointegradora', 'st_matricula',
+        'st_resultado', 'cd_financiamento', 'nr_cargahorariacurso', 'cd_matriculaturma', 'dt_data',
+        'ds_aplicacaooferta', 'cd_cnpjempatendida', 'dt_carga',
+    ],
+    'fato_producao_metaofertassi': [
+        'cd_ofertaid', 'nm_unidade', 'cd_produto', 'nm_produto', 'nm_origemoferta', 'fl_avender',
+        'fl_producao', 'nr_producaototal', 'dt_inicialano', 'dt_finalano', 'dt_iniciogeral', 'dt_finalgeral',
+        'tp_mediacao', 'nm_situacaooferta', 'tp_financiamento', 'nm_programaestrategico', 'nm_municipio',
+        'vl_oferta', 'vl_custotoalano', 'vl_receitatotalano', 'vl_custototal', 'vl_receitatotal',
+        'pc_margemcontribuicao', 'vl_resultado', 'dt_calendario', 'vl_receita', 'nr_producao', 'dt_carga',
+    ],
+    'fato_producao_saudecomplementar': [
+        'sk_saudecomplementar', 'nk_idlanc', 'cd_cnpj', 'nm_razaosocial', 'nr_telefone', 'nm_email',
+        'cd_convenio', 'cd_api', 'nm_item', 'cd_filial', 'cd_unidadeorg', 'cd_centro', 'cd_contabil',
+        'nm_convenio', 'nm_paciente', 'cd_cpf', 'dt_nasc', 'nm_postocoleta', 'qt_qtde', 'vl_valor',
+        'nr_honorarioexecutante', 'nr_honorariosolicitante', 'nm_responsavel', 'nr_atend', 'dt_data',
+        'nr_medicoexecutante', 'nm_medicoexecutante', 'nr_medicosolicitante', 'nm_medico_solicitante',
+        'tp_type', 'cd_unidade', 'cd_vendaid', 'fl_pendente', 'st_status', 'tp_convenio', 'nm_obsatend',
+        'nr_graurisco', 'ds_portesistemafiea', 'nr_porteestabelecimento', 'nr_portereceita',
+        'fl_contribuinte', 'fl_industria', 'qt_empregados', 'dt_carga', 'nm_sindicato', 'nm_entidade',
+        'cd_entidade', 'nm_classe', 'nm_produto', 'nm_plano', 'nm_naturezaproduto',
+    ],
+    'fato_producao_saudeocupacional': [
+        'sk_saudeocupacional', 'nk_idlanc', 'cd_cnpj', 'nm_razaosocial', 'nr_telefone', 'nm_email',
+        'cd_convenio', 'cd_api', 'nm_item', 'cd_filial', 'cd_unidadeorg', 'cd_centro', 'cd_contabil',
+        'nm_convenio', 'nm_paciente', 'cd_cpf', 'dt_nasc', 'nm_postocoleta', 'qt_qtde', 'vl_valor',
+        'nr_honorarioexecutante', 'nr_honorariosolicitante', 'nm_responsavel', 'nr_atend', 'dt_data',
+        'nr_medicoexecutante', 'nm_medicoexecutante', 'nr_medicosolicitante', 'nm_medico_solicitante',
+        'tp_type', 'cd_unidade', 'cd_vendaid', 'fl_pendente', 'st_status', 'tp_convenio', 'nm_obsatend',
+        'nr_graurisco', 'ds_portesistemafiea', 'nr_porteestabelecimento', 'nr_portereceita',
+        'fl_contribuinte', 'fl_industria', 'qt_empregados', 'dt_carga', 'cd_sindicato',
+        'nm_razaosocialsindicato', 'nm_entidade', 'cd_entidade', 'nm_classe', 'nm_produto', 'nm_plano',
+        'nm_naturezaproduto',
+    ],
+    'fato_producao_metaofertasti': [
+        'cd_ofertaid', 'nm_unidade', 'cd_produto', 'nm_produto', 'nm_origemoferta', 'fl_avender',
+        'fl_producao', 'fl_atendimento', 'nr_producaototal', 'dt_inicialano', 'dt_finalano', 'dt_iniciogeral',
+        'dt_finalgeral', 'tp_mediacao', 'nm_situacaooferta', 'tp_financiamento', 'nm_programaestrategico',
+        'nm_municipio', 'vl_oferta', 'vl_custotoalano', 'vl_receitatotalano', 'vl_custototal',
+        'vl_receitatotal', 'pc_margemcontribuicao', 'vl_resultado', 'cd_naturezaproduto',
+        'nm_naturezaproduto', 'cd_naturezaprodutosuperior', 'nm_naturezaprodutosuperior',
+        'dt_calendario', 'vl_receita', 'nr_producao', 'nr_atendimento', 'dt_carga',
+    ],
+    'fato_producao_stisgt': [
+        'cd_idatendimento', 'cd_idproposta', 'cd_cpfcnpj', 'nm_tituloatendimento',
+        'vl_totalfaturamento', 'nm_fontepagadora', 'ds_produtocategoria', 'ds_produtolinha', 'nm_produto',
+        'dt_apropriacao', 'qt_dehorasensaioscalibracoes', 'nm_unidadeoperacional',
+        'st_statusatendimento', 'nm_titulo', 'dt_emissao', 'dt_conclusao', 'vl_producaoestimada',
+        'vl_receitaestimada', 'nm_agenciafomento', 'nm_fantasia', 'nm_razao_social', 'qt_funcionarios',
+        'ds_porte_cliente', 'dt_carga',
+    ],
+}
+
+# Linhas de cada tabela em relação a --rows (fato_producao_ebdr = 1)
+_ROW_RATIOS = {
+    'fato_producao_ebdr': 1.0,
+    'fato_producao_metaofertaeb': 0.002,
+    'fato_producao_metaproducaoep': 0.05,
+    'fato_producao_epdr': 0.6,
+    'fato_producao_metaofertassi': 0.01,
+    'fato_producao_saudecomplementar': 0.3,
+    'fato_producao_saudeocupacional': 0.5,
+    'fato_producao_metaofertasti': 0.005,
+    'fato_producao_stisgt': 0.05,
+}
+_MIN_ROWS = 50
+
+# Unidades sintéticas: (cd_unidade, cd_filial, nm_unidade, municipio, peso)
+_EB_UNIDADES = [
+    ('101', '1', 'Escola SESI Centro', 'Maceió', 5),
+    ('102', '1', 'Escola SESI Benedito Bentes', 'Maceió', 4),
+    ('103', '2', 'Escola SESI Arapiraca', 'Arapiraca', 3),
+    ('104', '1', 'Escola SESI Jaraguá', 'Maceió', 2),
+]
+_EP_UNIDADES = [
+    ('201', '3', 'Senai Poço', 'Maceió', 5),
+    ('202', '3', 'Senai Benedito Bentes', 'Maceió', 3),
+    ('203', '4', 'Senai Arapiraca', 'Arapiraca', 3),
+    ('204', '3', 'Cep - Jackson Monteiro Ferreira', 'Maceió', 1),
+    ('205', '4', 'Cep - Napoleão Barbosa', 'Arapiraca', 1),
+]
+_SAUDE_UNIDADES = [
+    ('301', '5', 'SESI Saúde Cambona', 'Maceió', 5),
+    ('302', '5', 'SESI Saúde Tabuleiro', 'Maceió', 3),
+    ('303', '6', 'SESI Saúde Arapiraca', 'Arapiraca', 2),
+]
+_STI_UNIDADES = [
+    ('401', '7', 'Instituto SENAI de Tecnologia', 'Maceió', 5),
+    ('201', '3', 'Senai Poço', 'Maceió', 2),
+    ('203', '4', 'Senai Arapiraca', 'Arapiraca', 1),
+]
+
+_EB_CURSOS = [
+    ('Ensino Fundamental - Anos Iniciais', 'Ensino Fundamental', 30),
+    ('Ensino Fundamental - Anos Finais', 'Ensino Fundamental', 30),
+    ('Novo Ensino Médio - Formação Geral Básica', 'Ensino Médio', 12),
+    ('Novo Ensino Médio - Matemática', 'Ensino Médio', 5),
+    ('Novo Ensino Médio - Ciências da Natureza', 'Ensino Médio', 5),
+    ('Novo Ensino Médio - Formação Técnica e Profissional', 'Ensino Médio', 4),
+    ('Ensino Médio - Linguagens+Humanas - Design e Cultura Maker', 'Ensino Médio', 3),
+    ('Ensino Médio - Matemática+Humanas+Linguagens - Análise de Dados e Programação', 'Ensino Médio', 3),
+    ('Ensino Médio - Matemática+Natureza - Biotecnologia e Saúde', 'Ensino Médio', 3),
+    ('Educação de Jovens e Adultos - Ensino Fundamental', 'EJA', 3),
+    ('Educação Continuada - Robótica', 'Educação Continuada', 2),
+]
+_EB_MODALIDADES_META = (['Ensino Fundamental', 'Ensino Médio', 'EJA', 'Educação Continuada'], [45, 40, 10, 5])
+
+_EP_AREAS = {
+    'Metalmecânica': ['Mecânico de Usinagem', 'Soldador', 'Técnico em Mecânica'],
+    'Eletroeletrônica': ['Eletricista Industrial', 'Técnico em Eletrotécnica', 'Instalador de Sistemas Fotovoltaicos'],
+    'Tecnologia da Informação': ['Técnico em Desenvolvimento de Sistemas', 'Programador Web', 'Operador de Computador'],
+    'Construção Civil': ['Pedreiro', 'Eletricista Predial', 'Técnico em Edificações'],
+    'Alimentos e Bebidas': ['Padeiro e Confeiteiro', 'Técnico em Alimentos'],
+    'Gestão': ['Assistente Administrativo', 'Técnico em Logística', 'Almoxarife'],
+}
+_EP_MODALIDADES = (['Aprendizagem Industrial', 'Qualificação Profissional', 'Habilitação Técnica',
+                    'Aperfeiçoamento Profissional'], [35, 35, 20, 10])
+
+_SAUDE_ITENS = (
+    ['CONSULTA CLINICA', 'EXAME ADMISSIONAL', 'EXAME PERIODICO', 'AUDIOMETRIA', 'ESPIROMETRIA',
+     'HEMOGRAMA COMPLETO', 'ACUIDADE VISUAL', 'ELETROCARDIOGRAMA', 'CONSULTA ODONTOLOGICA',
+     'PRE-CONSULTA', 'VACINA H1N1 MONODOSE - 2023', 'VACINA H1N1 MONODOSE - 2024',
+     'VACINA H1N1 MONODOSE - 2025'],
+    [20, 14, 16, 8, 5, 10, 6, 6, 5, 6, 1, 1, 2],
+)
+_SAUDE_STATUS = (['LANCADO', 'CANCELADO', 'PENDENTE', 'ESTORNADO'], [88, 6, 4, 2])
+
+# Produtos SSI (cd_produto, nm_produto): os de prefixo "103" entram na meta
+_SSI_PRODUTOS = [
+    ('10301', 'Exames Ocupacionais'), ('10302', 'Consultas Médicas'), ('10303', 'Exames Complementares'),
+    ('10304', 'Odontologia'), ('10305', 'Vacinação'), ('10201', 'Programas de Promoção da Saúde'),
+    ('10401', 'Ginástica na Empresa'),
+]
+
+_STI_NATUREZAS = (['Consultoria', 'Metrologia', 'Serviços Técnicos Especializados', 'Inovação'], [40, 35, 15, 10])
+_STI_STATUS = (['Concluído', 'Em execução', 'Cancelado'], [70, 25, 5])
+
+_PRIMEIROS_NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique',
+                    'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael']
+_SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Almeida',
+               'Ferreira', 'Rodrigues', 'Barbosa', 'Cavalcante']
+_EMPRESAS = ['Braskem', 'Usina Caeté', 'Coruripe', 'Sococo', 'Mendo Sampaio', 'Vale Verde Alimentos',
+             'Metalúrgica Alagoana', 'Construtora Litoral', 'Cerâmica Pajuçara', 'Laticínios Sertão']
+
+_PORTES = ['Micro', 'Pequena', 'Média', 'Grande']
+
+# bi_filter_param do seed_db.py → unidade sintética (ver --scopes-file)
+_SEED_SCOPES = {
+    'SESI Educação Básica': {
+        '0': None,
+        '3': {'cd_unidade': ['101']},
+        '5': {'cd_unidade': ['102']},
+    },
+    'SESI Saúde': {
+        '0': None,
+        # nm_unidade recorta a meta do DW (metaofertassi não tem cd_unidade)
+        '2': {'cd_unidade': ['301'], 'nm_unidade': ['SESI Saúde Cambona']},
+        '7': {'cd_unidade': ['302'], 'nm_unidade': ['SESI Saúde Tabuleiro']},
+        '8': {'cd_unidade': ['303'], 'nm_unidade': ['SESI Saúde Arapiraca']},
+    },
+    'SENAI Educação Profissional e STI': {
+        '0': None,
+        '1': {'nm_unidade': ['Senai Poço'], 'nm_unidadeoperacional': ['Senai Poço']},
+        '4': {'nm_unidade': ['Senai Arapiraca'], 'nm_unidadeoperacional': ['Senai Arapiraca']},
+        '6': {'nm_unidade': ['Senai Benedito Bentes']},
+    },
+}
+
+
+def _sql_type(column):
+    """Tipo SQL pela convenção de prefixos do DW."""
+    if column == 'dt_carga':
+        return 'DATETIME'
+    if column.startswith('dt_'):
+        return 'DATE'
+    if column == 'nr_telefone':
+        return 'VARCHAR(255)'
+    if column in _FLOAT_COLUMNS or column.startswith('pc_'):
+        return 'FLOAT'
+    if column.startswith(('sk_', 'nk_', 'fl_', 'nr_', 'qt_')):
+        return 'INTEGER'
+    # Valores monetários: únicas colunas DECIMAL (chegam como Decimal do driver)
+    if column.startswith('vl_'):
+        return 'DECIMAL(18, 2)'
+    return 'VARCHAR(255)'
+
+
+class _Gen:
+    """Geradores de colunas: cada método devolve uma lista de `n` valores."""
+
+    def __init__(self, rng, years):
+        self.rng = rng
+        self.years = years
+        start, end = date(years[0], 1, 1), date(years[-1], 12, 31)
+        self.days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+        # Metas são do ano vigente (as calculadoras de EB, EP e STI não filtram ano)
+        self.current_months = [date(years[-1], m, 1).isoformat() for m in range(1, 13)]
+        carga = datetime(years[-1], 1, 1)
+        self.carga = [(carga + timedelta(hours=6 + 24 * i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(365)]
+
+    def choice(self, values, weights=None, n=0):
+        return self.rng.choices(values, weights, k=n)
+
+    def ints(self, lo, hi, n):
+        return self.rng.choices(range(lo, hi + 1), k=n)
+
+    def numbers(self, lo, hi, n, step=1):
+        values = [lo + step * i for i in range(int((hi - lo) / step) + 1)]
+        return self.rng.choices(values, k=n)
+
+    def dates(self, n):
+        return self.rng.choices(self.days, k=n)
+
+    def months(self, n):
+        return self.rng.choices(self.current_months, k=n)
+
+    def names(self, n):
+        first = self.rng.choices(_PRIMEIROS_NOMES, k=n)
+        last = self.rng.choices(_SOBRENOMES, k=n)
+        return [f'{a} {b}' for a, b in zip(first, last)]
+
+    def codes(self, prefix, count, n):
+        return [f'{prefix}{i}' for i in self.rng.choices(range(1, count + 1), k=n)]
+
+    def default(self, column, n):
+        """Valor genérico por prefixo para colunas sem regra própria."""
+        sql_type = _sql_type(column)
+        if column == 'dt_carga':
+            return self.rng.choices(self.carga, k=n)
+        if sql_type == 'DATE':
+            return self.dates(n)
+        if column.startswith('fl_'):
+            return self.ints(0, 1, n)
+        if sql_type == 'INTEGER':
+            return self.ints(1, 500, n)
+        if sql_type == 'FLOAT' or sql_type.startswith('DECIMAL'):
+            return self.numbers(0, 5000, n, step=0.5)
+        if column.startswith('cd_'):
+            return self.codes('', 999, n)
+        return self.codes(f'{column[3:].capitalize()} ', 20, n)
+
+
+def _units(gen, units, n):
+    """(cd_unidade, cd_filial, nm_unidade, municipio) sorteados pelos pesos."""
+    return gen.choice([u[:4] for u in units], [u[4] for u in units], n)
+
+
+def _ebdr(gen, n, offset):
+    units = _units(gen, _EB_UNIDADES, n)
+    cursos = gen.choice([c[:2] for c in _EB_CURSOS], [c[2] for c in _EB_CURSOS], n)
+    inicial = gen.dates(n)
+    return {
+        'cd_unidade': [u[0] for u in units],
+        'cd_filial': [u[1] for u in units],
+        'nm_curso': [c[0] for c in cursos],
+        'nm_modalidade': [c[1] for c in cursos],
+        # Um aluno aparece em várias aulas: matrículas se repetem
+        'nr_matricula': [offset // 25 + i for i in gen.ints(1, max(n // 25, 1), n)],
+        'dt_inicial': inicial,
+        'dt_matricula': inicial,
+        'dt_aula': gen.dates(n),
+        'nr_carga_horaria': gen.choice([1, 2, 3, 4], [10, 50, 20, 20], n),
+        'nm_situacao_matricula': gen.choice(['Matriculado', 'Concluído', 'Transferido', 'Evadido'],
+                                            [80, 10, 6, 4], n),
+        'nm_mediacao': gen.choice(['Presencial', 'Semipresencial', 'A distância'], [85, 10, 5], n),
+        'nm_financiamento': gen.choice(['Gratuidade Regimental', 'Pago pela Empresa', 'Pago pelo Aluno'],
+                                       [50, 30, 20], n),
+        'nm_periodo_letivo': [d[:4] for d in inicial],
+        'nm_aluno': gen.names(n),
+        'nm_industria': gen.choice(['Sim', 'Não'], [60, 40], n),
+    }
+
+
+def _metaofertaeb(gen, n, offset):
+    modalidades, pesos = _EB_MODALIDADES_META
+    return {
+        # As ofertas 9340 e 9341 são excluídas pelo Power Query
+        'cd_ofertaid': [str(9000 + (offset + i) % 400) for i in range(n)],
+        'nm_modalidade': gen.choice(modalidades, pesos, n),
+        'qt_alunos': gen.ints(40, 440, n),
+        'nr_producao': gen.numbers(100, 700, n, step=10),
+        'dt_calendario': gen.months(n),
+        'nm_programaestrategico': gen.choice(['Educação Básica', 'EBEP', 'Novo Ensino Médio'], None, n),
+    }
+
+
+def _ep_cursos(gen, n):
+    areas = list(_EP_AREAS)
+    chosen = gen.choice(areas, [5, 4, 4, 3, 2, 3], n)
+    return chosen, [gen.rng.choice(_EP_AREAS[area]) for area in chosen]
+
+
+def _metaproducaoep(gen, n, offset):
+    units = _units(gen, _EP_UNIDADES, n)
+    areas, cursos = _ep_cursos(gen, n)
+    modalidades, pesos = _EP_MODALIDADES
+    return {
+        'cd_producaoid': [str(offset + i + 1) for i in range(n)],
+        'nm_unidade': [u[2] for u in units],
+        'nm_municipio': [u[3] for u in units],
+        'nm_area': areas,
+        'nm_curso': cursos,
+        'nm_modalidade': gen.choice(modalidades, pesos, n),
+        'nr_horaalunomensalalocada': gen.numbers(2, 30, n),
+        'nr_horaalunototal': gen.numbers(20, 400, n, step=10),
+        'dt_mesreferencia': gen.months(n),
+    }
+
+
+def _epdr(gen, n, offset):
+    units = _units(gen, _EP_UNIDADES, n)
+    areas, cursos = _ep_cursos(gen, n)
+    modalidades, pesos = _EP_MODALIDADES
+    return {
+        'cd_filial': [u[1] for u in units],
+        'nm_unidade': [u[2] for u in units],
+        'nm_area': areas,
+        'nm_curso': cursos,
+        'nm_modalidade': gen.choice(modalidades, pesos, n),
+        'nr_matricula': [offset // 6 + i for i in gen.ints(1, max(n // 6, 1), n)],
+        'dt_inicial': gen.dates(n),
+        'dt_data': gen.dates(n),
+        'nr_cargahoraria': gen.choice([2, 3, 4, 8], [20, 30, 40, 10], n),
+        'st_matricula': gen.choice(['Ativa', 'Concluída', 'Cancelada'], [75, 20, 5], n),
+        'st_resultado': gen.choice(['Cursando', 'Aprovado', 'Reprovado', 'Evadido'], [70, 22, 3, 5], n),
+        'nm_aluno': gen.names(n),
+        'cd_cnpjempatendida': gen.codes('0', 9999, n),
+    }
+
+
+def _metaofertassi(gen, n, offset):
+    units = _units(gen, _SAUDE_UNIDADES, n)
+    produtos = gen.choice(_SSI_PRODUTOS, [20, 20, 15, 10, 10, 15, 10], n)
+    return {
+        'cd_ofertaid': [str(offset + i + 1) for i in range(n)],
+        'nm_unidade': [u[2] for u in units],
+        'nm_municipio': [u[3] for u in units],
+        'cd_produto': [p[0] for p in produtos],
+        'nm_produto': [p[1] for p in produtos],
+        'nr_producao': gen.numbers(5, 70, n, step=5),
+        'dt_calendario': gen.months(n),
+        'nm_situacaooferta': gen.choice(['Aprovada', 'Em elaboração', 'Cancelada'], [85, 10, 5], n),
+    }
+
+
+def _saude(sk_column):
+    def rows(gen, n, offset):
+        units = _units(gen, _SAUDE_UNIDADES, n)
+        itens, pesos = _SAUDE_ITENS
+        status, status_pesos = _SAUDE_STATUS
+        return {
+            sk_column: [offset + i + 1 for i in range(n)],
+            # Alguns lançamentos sem id (descartados pelo Power Query)
+            'nk_idlanc': [None if x < 2 else offset + i + 1
+                          for i, x in enumerate(gen.ints(0, 99, n))],
+            'cd_unidade': [u[0] for u in units],
+            'cd_filial': [u[1] for u in units],
+            'nm_postocoleta': [u[2] for u in units],
+            'nm_item': gen.choice(itens, pesos, n),
+            'st_status': gen.choice(status, status_pesos, n),
+            'qt_qtde': gen.choice([1, 2, 3], [90, 8, 2], n),
+            'vl_valor': gen.numbers(15, 350, n, step=5),
+            'dt_data': gen.dates(n),
+            'nm_paciente': gen.names(n),
+            'nm_razaosocial': gen.choice(_EMPRESAS, None, n),
+            'ds_portesistemafiea': gen.choice(_PORTES, [40, 30, 20, 10], n),
+        }
+    return rows
+
+
+def _metaofertasti(gen, n, offset):
+    units = _units(gen, _STI_UNIDADES, n)
+    naturezas, pesos = _STI_NATUREZAS
+    superior = gen.choice(naturezas, pesos, n)
+    return {
+        'cd_ofertaid': [str(offset + i + 1) for i in range(n)],
+        'nm_unidade': [u[2] for u in units],
+        'nm_municipio': [u[3] for u in units],
+        'nm_naturezaprodutosuperior': superior,
+        'nm_naturezaproduto': superior,
+        'nr_producao': gen.numbers(10, 1200, n, step=5),
+        'dt_calendario': gen.months(n),
+    }
+
+
+def _stisgt(gen, n, offset):
+    units = _units(gen, _STI_UNIDADES, n)
+    naturezas, pesos = _STI_NATUREZAS
+    return {
+        'cd_idatendimento': [str(offset + i + 1) for i in range(n)],
+        'nm_unidadeoperacional': [u[2] for u in units],
+        'ds_produtocategoria': gen.choice(naturezas, pesos, n),
+        'dt_apropriacao': gen.dates(n),
+        'qt_dehorasensaioscalibracoes': gen.numbers(1, 400, n, step=0.5),
+        'vl_totalfaturamento': gen.numbers(100, 50000, n, step=50),
+        'st_statusatendimento': gen.choice(*_STI_STATUS, n),
+        'nm_razao_social': gen.choice(_EMPRESAS, None, n),
+        'ds_porte_cliente': gen.choice(_PORTES, [35, 30, 20, 15], n),
+    }
+
+
+_GENERATORS = {
+    'fato_producao_ebdr': _ebdr,
+    'fato_producao_metaofertaeb': _metaofertaeb,
+    'fato_producao_metaproducaoep': _metaproducaoep,
+    'fato_producao_epdr': _epdr,
+    'fato_producao_metaofertassi': _metaofertassi,
+    'fato_producao_saudecomplementar': _saude('sk_saudecomplementar'),
+    'fato_producao_saudeocupacional': _saude('sk_saudeocupacional'),
+    'fato_producao_metaofertasti': _metaofertasti,
+    'fato_producao_stisgt': _stisgt,
+}
+
+
+def _row_counts(rows, overrides):
+    counts = {table: max(int(rows * ratio), _MIN_ROWS) for table, ratio in _ROW_RATIOS.items()}
+    counts.update(overrides)
+    return counts
+
+
+def _generate_table(conn, table, count, seed, years):
+    columns = _TABLES[table]
+    ddl = ', '.join(f'{column} {_sql_type(column)}' for column in columns)
+    conn.execute(f'DROP TABLE IF EXISTS {table}')
+    conn.execute(f'CREATE TABLE {table} ({ddl})')
+
+    # Semente por tabela: mudar o tamanho de uma não altera as outras
+    gen = _Gen(random.Random(f'{seed}:{table}'), years)
+    insert = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+    for offset in range(0, count, _BATCH_SIZE):
+        n = min(_BATCH_SIZE, count - offset)
+        values = _GENERATORS[table](gen, n, offset)
+        data = [values[column] if column in values else gen.default(column, n) for column in columns]
+        conn.executemany(insert, zip(*data))
+    conn.commit()
+
+
+def generate_synthetic_dw(output, rows, seed, years, overrides=None, scopes_file=None, base_year=_BASE_YEAR):
+    counts = _row_counts(rows, overrides or {})
+    year_range = list(range(base_year - years + 1, base_year + 1))
+
+    print("🏗️  Gerando DW sintético...")
+    print(f"   Arquivo: {output}")
+    print(f"   Semente: {seed} | Anos: {year_range[0]}–{year_range[-1]}")
+
+    if os.path.exists(output):
+        os.remove(output)
+    conn = sqlite3.connect(output)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+
+    started = time.monotonic()
+    for table, count in counts.items():
+        table_started = time.monotonic()
+        _generate_table(conn, table, count, seed, year_range)
+        print(f"   ✓ {table}: {count:,} linhas ({time.monotonic() - table_started:.1f}s)")
+    conn.execute('ANALYZE')
+    conn.close()
+
+    if scopes_file:
+        with open(scopes_file, 'w', encoding='utf-8') as f:
+            json.dump(_SEED_SCOPES, f, ensure_ascii=False, indent=2)
+        print(f"   ✓ Recortes por usuário (PRODUCTION_SCOPES_FILE): {scopes_file}")
+
+    print(f"\n✅ DW sintético gerado em {time.monotonic() - started:.1f}s")
+    print(f"   DATABASE_URL_DW=sqlite:///{os.path.abspath(output)}")
+    return counts
+
+
+def _parse_overrides(values):
+    overrides = {}
+    for value in values or []:
+        table, _, count = value.partition('=')
+        if table not in _TABLES or not count.isdigit():
+            raise argparse.ArgumentTypeError(f'--table-rows inválido: {value}')
+        overrides[table] = int(count)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera um DW sintético (SQLite) com as tabelas fato_producao_*')
+    parser.add_argument('--output', default='dw_sintetico.db', help='arquivo SQLite de saída')
+    parser.add_argument('--rows', type=int, default=100_000,
+                        help='linhas de fato_producao_ebdr; as demais tabelas são proporcionais')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=int, default=3, help='anos de dados, até --base-year')
+    parser.add_argument('--base-year', type=int, default=_BASE_YEAR,
+                        help=f'último ano dos dados (padrão {_BASE_YEAR}; a API filtra o ano corrente)')
+    parser.add_argument('--table-rows', action='append', metavar='TABELA=N',
+                        help='sobrepõe o número de linhas de uma tabela (pode repetir)')
+    parser.add_argument('--scopes-file', help='grava o JSON de recortes dos usuários do seed_db.py')
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = _parse_overrides(args.table_rows)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    generate_synthetic_dw(args.output, args.rows, args.seed, args.years, overrides, args.scopes_file,
+                          args.base_year)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+"""
+Hooks do gunicorn (carregado automaticamente do diretório corrente)
+Execute: gunicorn -w 4 -b 0.0.0.0:5000 run:app
+"""
+
+
+def post_fork(server, worker):
+    # Login no Solução 360 e refresher do token em cada worker, antes do
+    # tráfego; roda após o fork, então também funciona com --preload
+    from app.services.solucao360_service import init_client
+    init_client()
@@ -0,0 +1,346 @@
+"""
+Script para teste de carga da API reproduzindo sessões reais do painel
+Execute: python load_test.py [--base-url http://localhost:5000] [--concurrency 20] [--duration 60]
+
+Cada usuário virtual repete sessões com os usuários do seed_db.py, como o
+frontend faz ao abrir o painel:
+  login → /api/auth/me → /api/steps → (admin: /api/units) → para uma unidade
+  do usuário, os reports de cada step → embed-config de alguns reports →
+  /api/production/summary/all
+
+Para medir só a API (sem Azure AD, Power BI ou Solução 360 reais), suba a
+aplicação com o DW sintético e os stand-ins — ver README, "Teste de carga".
+Com --standin, as estatísticas dos stand-ins são zeradas antes e anexadas ao
+resultado (chamadas ao token do Power BI mostram se o cache está funcionando).
+
+Ao final, imprime por endpoint: requisições, throughput, latência (p50, p90,
+p95, p99, máx.) e taxa de erro, e grava tudo em JSON. /summary/all responde 200
+mesmo quando uma calculadora falha (o erro vai em `measures`); essas respostas
+contam como erro, com o status "200:measure_error". Com --baseline, compara
+com um resultado anterior e sai com código 1 se algum p95 piorar acima de
+--threshold ou a taxa de erro subir.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from benchmark_production import _git_commit, _latency_stats
+
+# Usuários criados pelo seed_db.py
+SEED_USERS = {
+    'senai.poco': '2468',
+    'sesi.saude.cambona': '9012',
+    'sesi.centro': '1243',
+    'sesi.senai.arapiraca': '7890',
+    'sesi.senai.benedito': '5678',
+    'sesi.saude.tabuleiro': '3456',
+    'diretoria': '1357',
+}
+
+
+def _summary_failed(response):
+    """True se alguma medida de /summary/all falhou (erro com `details` no payload)."""
+    try:
+        measures = response.json().get('measures') or []
+    except ValueError:
+        return True
+    return any('details' in measure for measure in measures)
+
+
+class _Recorder:
+    """Amostras de um usuário virtual, agrupadas pelo endpoint (rota sem ids)."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.sessions = 0
+        self.failed_sessions = 0
+
+    def request(self, http, method, endpoint, url, payload_failed=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = http.request(method, url, **kwargs)
+            response.content  # latência inclui o corpo inteiro
+            status = str(response.status_code)
+            if payload_failed and response.ok and payload_failed(response):
+                status += ':measure_error'
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][status] += 1
+        return response
+
+
+class _Session:
+    """Uma sessão do painel para um usuário do seed."""
+
+    def __init__(self, base_url, recorder, rng, options):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.rng = rng
+        self.options = options
+
+    def _think(self):
+        if self.options.think_ms:
+            time.sleep(self.rng.uniform(0, self.options.think_ms) / 1000)
+
+    def _call(self, http, method, endpoint, path, **kwargs):
+        response = self.recorder.request(
+            http, method, endpoint, self.base_url + path, timeout=self.options.timeout, **kwargs,
+        )
+        self._think()
+        if response is None or not response.ok:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def run(self, username, password):
+        """True se a sessão chegou ao fim (erros de endpoints isolados não a interrompem)."""
+        with requests.Session() as http:
+            login = self._call(http, 'POST', 'POST /api/auth/login', '/api/auth/login',
+                               json={'username': username, 'password': password})
+            if not login:
+                return False
+            http.headers['Authorization'] = f"Bearer {login['access_token']}"
+
+            me = self._call(http, 'GET', 'GET /api/auth/me', '/api/auth/me')
+            steps = self._call(http, 'GET', 'GET /api/steps', '/api/steps')
+            if me is None or steps is None:
+                return False
+
+            units = me.get('units') or []
+            if me.get('role') == 'admin':
+                units = self._call(http, 'GET', 'GET /api/units', '/api/units') or units
+            if not units:
+                return True
+            unit = self.rng.choice(units)
+            # Admin sem bi_filter_param não gera embed token (a API responde 400)
+            can_embed = not self.options.no_embed and bool(unit.get('bi_filter_param'))
+
+            for step in steps:
+                listing = self._call(
+                    http, 'GET', 'GET /api/steps/{step}/units/{unit}/reports',
+                    f"/api/steps/{step['step_number']}/units/{unit['id']}/reports",
+                )
+                if not listing or not can_embed:
+                    continue
+                reports = listing.get('reports') or []
+                for report in self.rng.sample(reports, min(self.options.embeds_per_step, len(reports))):
+                    self._call(
+                        http, 'GET', 'GET /api/reports/{id}/embed-config',
+                        f"/api/reports/{report['id']}/embed-config", params={'unit_id': unit['id']},
+                    )
+
+            if not self.options.no_production:
+                self._call(http, 'GET', 'GET /api/production/summary/all',
+                           '/api/production/summary/all', params={'unit_id': unit['id']},
+                           payload_failed=_summary_failed)
+        return True
+
+
+def _virtual_user(index, users, deadline, max_sessions, counter, recorder, options):
+    rng = random.Random(f'{options.seed}:{index}')
+    session = _Session(options.base_url, recorder, rng, options)
+    # Cada usuário virtual começa em um usuário diferente do seed
+    offset = index
+    while time.monotonic() < deadline:
+        with counter['lock']:
+            if max_sessions and counter['started'] >= max_sessions:
+                return
+            counter['started'] += 1
+        username = users[offset % len(users)]
+        offset += 1
+        recorder.sessions += 1
+        try:
+            completed = session.run(username, SEED_USERS[username])
+        except Exception:
+            completed = False
+        if not completed:
+            recorder.failed_sessions += 1
+
+
+def _merge(recorders, elapsed):
+    samples = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    for recorder in recorders:
+        for endpoint, values in recorder.samples.items():
+            samples[endpoint].extend(values)
+        for endpoint, counts in recorder.statuses.items():
+            for status, count in counts.items():
+                statuses[endpoint][status] += count
+
+    endpoints = {}
+    for endpoint in sorted(samples):
+        total = len(samples[endpoint])
+        errors = sum(
+            count for status, count in statuses[endpoint].items()
+            if not status.isdigit() or int(status) >= 400
+        )
+        endpoints[endpoint] = {
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2),
+            'error_rate': round(errors / total, 4),
+            'statuses': dict(statuses[endpoint]),
+            **_latency_stats(samples[endpoint]),
+        }
+
+    all_samples = [value for values in samples.values() for value in values]
+    total_errors = sum(round(entry['error_rate'] * entry['requests']) for entry in endpoints.values())
+    overall = {
+        'requests': len(all_samples),
+        'throughput_rps': round(len(all_samples) / elapsed, 2),
+        'error_rate': round(total_errors / len(all_samples), 4) if all_samples else 0.0,
+        **(_latency_stats(all_samples) if all_samples else {}),
+    }
+    return endpoints, overall
+
+
+def _standin_stats(urls, reset=False):
+    stats = {}
+    for url in urls:
+        try:
+            if reset:
+                requests.post(f"{url.rstrip('/')}/_standin/reset", timeout=5)
+            else:
+                stats[url] = requests.get(f"{url.rstrip('/')}/_standin/stats", timeout=5).json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️  Stand-in {url} indisponível: {e}")
+    return stats
+
+
+def _print_report(report):
+    print(f"\n📊 {report['sessions']:,} sessões ({report['failed_sessions']:,} interrompidas) em "
+          f"{report['elapsed_seconds']:.1f}s com {report['concurrency']} usuários virtuais")
+    print(f"   {'endpoint':<46} {'req':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>7}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['overall'])]
+    for endpoint, entry in rows:
+        if not entry['requests']:
+            continue
+        print(
+            f"   {endpoint:<46} {entry['requests']:>7} {entry['throughput_rps']:>8.1f} "
+            f"{entry['p50_ms']:>7.1f}ms {entry['p95_ms']:>7.1f}ms {entry['p99_ms']:>7.1f}ms "
+            f"{entry['error_rate']:>7.1%}"
+        )
+
+
+def _compare(report, baseline_path, threshold):
+    """Regressões de p95 (acima de `threshold`) e de taxa de erro em relação ao baseline."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['endpoints']
+    regressions = []
+    for endpoint, entry in report['endpoints'].items():
+        previous = baseline.get(endpoint)
+        if not previous:
+            continue
+        if previous['p95_ms'] and entry['p95_ms'] / previous['p95_ms'] - 1 > threshold:
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']:.1f}ms → {entry['p95_ms']:.1f}ms")
+        if entry['error_rate'] > previous['error_rate']:
+            regressions.append(f"{endpoint}: erros {previous['error_rate']:.1%} → {entry['error_rate']:.1%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga com sessões do painel')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--users', default=','.join(SEED_USERS),
+                        help='usuários do seed_db.py, separados por vírgula')
+    parser.add_argument('--concurrency', type=int, default=10, help='usuários virtuais simultâneos')
+    parser.add_argument('--duration', type=float, default=60, help='duração em segundos')
+    parser.add_argument('--sessions', type=int, default=0, help='para após N sessões (0 = só pela duração)')
+    parser.add_argument('--ramp-up', type=float, default=0, help='segundos para subir todos os usuários virtuais')
+    parser.add_argument('--think-ms', type=float, default=0, help='pausa aleatória (0 a N ms) entre requisições')
+    parser.add_argument('--embeds-per-step', type=int, default=1, help='embed-configs por step visitado')
+    parser.add_argument('--no-embed', action='store_true', help='não pedir embed-config')
+    parser.add_argument('--no-production', action='store_true', help='não pedir /api/production/summary/all')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--standin', action='append', default=[],
+                        help='URL de um stand-in (powerbi_standin.py, solucao360_standin.py); repetível')
+    parser.add_argument('--label', help='identificação da rodada no JSON (ex.: "gunicorn -w 4")')
+    parser.add_argument('--output', default='load_test.json')
+    parser.add_argument('--baseline', help='resultado anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='piora relativa de p95 considerada regressão (0.2 = 20%%)')
+    options = parser.parse_args(argv)
+
+    users = [user.strip() for user in options.users.split(',') if user.strip()]
+    unknown = [user for user in users if user not in SEED_USERS]
+    if unknown:
+        parser.error(f"usuários fora do seed_db.py: {', '.join(unknown)}")
+
+    try:
+        requests.get(f"{options.base_url.rstrip('/')}/health", timeout=5).raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ API indisponível em {options.base_url}: {e}")
+        return 1
+
+    print("🚦 Teste de carga do painel")
+    print(f"   {options.base_url} | {options.concurrency} usuários virtuais | {options.duration:.0f}s"
+          + (f" ou {options.sessions} sessões" if options.sessions else ""))
+    _standin_stats(options.standin, reset=True)
+
+    recorders = [_Recorder() for _ in range(options.concurrency)]
+    counter = {'lock': threading.Lock(), 'started': 0}
+    started = time.monotonic()
+    deadline = started + options.duration
+    threads = []
+    for index, recorder in enumerate(recorders):
+        thread = threading.Thread(
+            target=_virtual_user,
+            args=(index, users, deadline, options.sessions, counter, recorder, options),
+            daemon=True,
+        )
+        threads.append(thread)
+        thread.start()
+        if options.ramp_up and options.concurrency > 1:
+            time.sleep(options.ramp_up / (options.concurrency - 1))
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints, overall = _merge(recorders, elapsed)
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'label': options.label,
+        'git_commit': _git_commit(),
+        'base_url': options.base_url,
+        'users': users,
+        'concurrency': options.concurrency,
+        'think_ms': options.think_ms,
+        'embeds_per_step': 0 if options.no_embed else options.embeds_per_step,
+        'elapsed_seconds': round(elapsed, 3),
+        'sessions': sum(recorder.sessions for recorder in recorders),
+        'failed_sessions': sum(recorder.failed_sessions for recorder in recorders),
+        'overall': overall,
+        'endpoints': endpoints,
+        'standins': _standin_stats(options.standin),
+    }
+    _print_report(report)
+
+    with open(options.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Resultados gravados em {options.output}")
+
+    if options.baseline:
+        regressions = _compare(report, options.baseline, options.threshold)
+        if regressions:
+            print("\n❌ Regressões em relação ao baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"\n✅ Sem regressões em relação a {options.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
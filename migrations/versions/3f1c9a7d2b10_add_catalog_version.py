@@ -0,0 +1,41 @@
+"""add catalog_version
+
+Revision ID: 3f1c9a7d2b10
+Revises: e41f0b7c2a93
+Create Date: 2026-10-19 09:00:00.000000
+
+Tabela de linha única usada pelo catálogo de navegação em memória
+(app/services/catalog_service.py) para detectar escritas feitas por outros
+workers.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b10'
+down_revision = 'e41f0b7c2a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('catalog_version'):
+        return
+
+    catalog_version = op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('catalog_version'):
+        op.drop_table('catalog_version')
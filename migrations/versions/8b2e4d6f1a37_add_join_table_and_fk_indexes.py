@@ -0,0 +1,55 @@
+"""add join-table and FK indexes
+
+Revision ID: 8b2e4d6f1a37
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-19 10:00:00.000000
+
+As PKs compostas de report_units e user_units começam por report_id/user_id,
+então buscas por unidade (unit.reports, unit.users, Report.units.any(...))
+não conseguem usá-las; reports.step_id não tinha índice. Índices já
+existentes são ignorados; tabela ausente é erro (esquema inicial não aplicado).
+Verifique os planos com `python check_query_plans.py`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a37'
+down_revision = '3f1c9a7d2b10'
+branch_labels = None
+depends_on = None
+
+
+_INDEXES = [
+    ('ix_report_units_unit_id_report_id', 'report_units', ['unit_id', 'report_id']),
+    ('ix_user_units_unit_id_user_id', 'user_units', ['unit_id', 'user_id']),
+    ('ix_reports_step_id', 'reports', ['step_id']),
+]
+
+
+def _existing_indexes(inspector, table):
+    if not inspector.has_table(table):
+        raise RuntimeError(
+            f"Tabela '{table}' não existe: aplique o esquema inicial "
+            "(revisão e41f0b7c2a93) antes desta migration"
+        )
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in _INDEXES:
+        existing = _existing_indexes(inspector, table)
+        if name in existing:
+            continue
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, _ in reversed(_INDEXES):
+        existing = _existing_indexes(inspector, table)
+        if name in existing:
+            op.drop_index(name, table_name=table)
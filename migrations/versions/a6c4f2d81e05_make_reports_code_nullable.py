@@ -0,0 +1,31 @@
+"""make reports.code nullable
+
+Revision ID: a6c4f2d81e05
+Revises: d7e2a4b9c613
+Create Date: 2026-10-19 13:00:00.000000
+
+Reports criados pela sincronização com o Power BI ficam sem code (NULL) até
+o admin defini-lo, em vez de gravar string vazia.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c4f2d81e05'
+down_revision = 'd7e2a4b9c613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.alter_column('code', existing_type=sa.String(length=120), nullable=True)
+    op.execute("UPDATE reports SET code = NULL WHERE code = ''")
+
+
+def downgrade():
+    op.execute("UPDATE reports SET code = '' WHERE code IS NULL")
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.alter_column('code', existing_type=sa.String(length=120), nullable=False)
@@ -0,0 +1,45 @@
+"""add reports.is_orphan
+
+Revision ID: c5d83e1f9a42
+Revises: 8b2e4d6f1a37
+Create Date: 2026-10-19 11:00:00.000000
+
+Flag mantida pela sincronização com o Power BI (flask sync-reports /
+POST /api/reports/sync) para reports que não existem mais no workspace.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d83e1f9a42'
+down_revision = '8b2e4d6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(inspector, table, column):
+    if not inspector.has_table(table):
+        raise RuntimeError(
+            f"Tabela '{table}' não existe: aplique o esquema inicial "
+            "(revisão e41f0b7c2a93) antes desta migration"
+        )
+    return any(c['name'] == column for c in inspector.get_columns(table))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if _has_column(inspector, 'reports', 'is_orphan'):
+        return
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.add_column(
+            sa.Column('is_orphan', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if _has_column(inspector, 'reports', 'is_orphan'):
+        with op.batch_alter_table('reports') as batch_op:
+            batch_op.drop_column('is_orphan')
@@ -0,0 +1,79 @@
+"""add sti workbook tables
+
+Revision ID: d7e2a4b9c613
+Revises: c5d83e1f9a42
+Create Date: 2026-10-19 12:00:00.000000
+
+Uploads da planilha de produção STI (relatorio_produção.xlsx) e suas linhas
+normalizadas, usadas como realizado STI com STI_REALIZADO_SOURCE=planilha.
+Tabelas já existentes são ignoradas. A FK uploaded_by -> users.id depende do
+esquema inicial (e41f0b7c2a93, ancestral desta revisão); sem a tabela users a
+migration falha antes de criar qualquer coisa (o mssql rejeitaria a FK).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e2a4b9c613'
+down_revision = 'c5d83e1f9a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('users'):
+        raise RuntimeError(
+            "Tabela 'users' não existe: aplique o esquema inicial "
+            "(revisão e41f0b7c2a93) antes desta migration"
+        )
+
+    if not inspector.has_table('sti_workbook_uploads'):
+        op.create_table(
+            'sti_workbook_uploads',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('file_hash', sa.String(length=64), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=True),
+            sa.Column('sheet_name', sa.String(length=120), nullable=True),
+            sa.Column('row_count', sa.Integer(), nullable=False),
+            sa.Column('rejected_count', sa.Integer(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column('uploaded_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['uploaded_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('file_hash'),
+        )
+
+    if not inspector.has_table('sti_production_rows'):
+        op.create_table(
+            'sti_production_rows',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('upload_id', sa.Integer(), nullable=False),
+            sa.Column('cd_idatendimento', sa.String(length=60), nullable=True),
+            sa.Column('ds_produtocategoria', sa.String(length=120), nullable=False),
+            sa.Column('nm_produto', sa.String(length=255), nullable=True),
+            sa.Column('nm_unidadeoperacional', sa.String(length=255), nullable=True),
+            sa.Column('dt_apropriacao', sa.Date(), nullable=False),
+            sa.Column('qt_dehorasensaioscalibracoes', sa.Numeric(18, 4), nullable=False),
+            sa.Column('vl_totalfaturamento', sa.Numeric(18, 2), nullable=False),
+            sa.ForeignKeyConstraint(['upload_id'], ['sti_workbook_uploads.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(
+            'ix_sti_production_rows_upload_categoria_data',
+            'sti_production_rows',
+            ['upload_id', 'ds_produtocategoria', 'dt_apropriacao'],
+            unique=False,
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('sti_production_rows'):
+        op.drop_index('ix_sti_production_rows_upload_categoria_data', table_name='sti_production_rows')
+        op.drop_table('sti_production_rows')
+    if inspector.has_table('sti_workbook_uploads'):
+        op.drop_table('sti_workbook_uploads')
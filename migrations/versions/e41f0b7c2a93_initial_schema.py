@@ -0,0 +1,105 @@
+"""initial schema
+
+Revision ID: e41f0b7c2a93
+Revises:
+Create Date: 2026-10-19 08:00:00.000000
+
+Esquema inicial (users, units, user_units, steps, reports, report_units).
+Bancos já criados antes desta revisão (via `flask db migrate` local ou
+`db.create_all()`) devem ser marcados com `flask db stamp e41f0b7c2a93`
+antes do `flask db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41f0b7c2a93'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'units',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    op.create_table(
+        'steps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('step_number', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('step_number'),
+    )
+
+    op.create_table(
+        'user_units',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('bi_filter_param', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['unit_id'], ['units.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'unit_id'),
+    )
+
+    op.create_table(
+        'reports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('step_id', sa.Integer(), nullable=True),
+        sa.Column('report_id', sa.String(length=120), nullable=False),
+        sa.Column('workspace_id', sa.String(length=120), nullable=False),
+        sa.Column('dataset_id', sa.String(length=120), nullable=True),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('code', sa.String(length=120), nullable=False),
+        sa.Column('embed_url', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['step_id'], ['steps.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('report_id'),
+    )
+
+    op.create_table(
+        'report_units',
+        sa.Column('report_id', sa.Integer(), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['report_id'], ['reports.id']),
+        sa.ForeignKeyConstraint(['unit_id'], ['units.id']),
+        sa.PrimaryKeyConstraint('report_id', 'unit_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('report_units')
+    op.drop_table('reports')
+    op.drop_table('user_units')
+    op.drop_table('steps')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_table('units')
+    op.drop_table('users')
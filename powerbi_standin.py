@@ -0,0 +1,296 @@
+"""
+Script para subir um stand-in local da API REST do Power BI (e do token do Azure AD)
+Execute: python powerbi_standin.py [--port 5101] [--latency-ms 80] [--rate-429 0.05]
+
+Implementa só o que o PowerBIService usa, para testar o fluxo de embed sob
+carga sem sair da máquina:
+  - POST /<tenant>/oauth2/v2.0/token            (client_credentials)
+  - GET  /v1.0/myorg/groups
+  - GET  /v1.0/myorg/groups/<workspace>/reports
+  - GET  /v1.0/myorg/groups/<workspace>/reports/<report>
+  - GET  /v1.0/myorg/reports/<report>
+  - POST /v1.0/myorg/GenerateToken              (com o erro de effective identity)
+
+Qualquer report id é aceito (os do seed_db.py inclusive): datasetId e embedUrl
+são derivados do id. O workspace do seed_db.py lista exatamente os reports do
+seed (mesmos ids e nomes), para que uma sincronização contra o stand-in não
+marque o catálogo semeado como órfão; os demais workspaces listam
+--reports-per-workspace reports sintéticos. Uma fração dos datasets
+(--rls-ratio) tem RLS; os demais recusam `identities` com o mesmo erro da API
+real ("shouldn't have effective identity"), o que exercita o retry do serviço.
+
+Latência (--latency-ms + até --jitter-ms), 429 com Retry-After (--rate-429) e
+500 (--error-rate) são injetados em todas as rotas acima. Para apontar a
+aplicação para o stand-in:
+
+    POWERBI_API_URL=http://localhost:5101/v1.0/myorg
+    POWERBI_TOKEN_URL=http://localhost:5101/standin-tenant/oauth2/v2.0/token
+
+Rotas de controle (sem injeção):
+  - GET   /_standin/stats   chamadas, 429/500 injetados e tokens emitidos por rota
+  - POST  /_standin/reset   zera as estatísticas
+  - PATCH /_standin/config  altera latency_ms, jitter_ms, rate_429, error_rate,
+                            retry_after, token_ttl ou rls_ratio em execução
+"""
+
+import argparse
+import hashlib
+import random
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify, request
+
+# Mesmo workspace e reports criados pelo seed_db.py
+from seed_db import REPORTS_DATA as SEED_REPORTS, WORKSPACE_ID as SEED_WORKSPACE_ID
+
+_SEED_REPORT_NAMES = {report['id']: report['name'] for report in SEED_REPORTS}
+
+_NAMESPACE = uuid.UUID("5f0c6d1e-7f43-4c55-9a36-1f0f2d1b7c42")
+_RUNTIME_OPTIONS = ('latency_ms', 'jitter_ms', 'rate_429', 'error_rate', 'retry_after', 'token_ttl', 'rls_ratio')
+
+
+def _derived_id(kind, value):
+    return str(uuid.uuid5(_NAMESPACE, f'{kind}:{value}'))
+
+
+def _fraction(value):
+    """Valor estável em [0, 1) para um id (não depende de PYTHONHASHSEED)."""
+    return int(hashlib.sha256(value.encode()).hexdigest()[:8], 16) / 0x100000000
+
+
+def _pbi_error(status, code, message=None):
+    error = {'code': code}
+    if message:
+        error['message'] = message
+    return jsonify({'error': error}), status
+
+
+class _Standin:
+    """Estado do stand-in: opções, tokens emitidos e estatísticas por rota."""
+
+    def __init__(self, args):
+        self.options = {name: getattr(args, name) for name in _RUNTIME_OPTIONS}
+        self.workspaces = [SEED_WORKSPACE_ID] + [
+            _derived_id('workspace', index) for index in range(1, args.workspaces)
+        ]
+        self.reports_per_workspace = args.reports_per_workspace
+        self._random = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stats = {}
+
+    def count(self, endpoint, field='calls'):
+        with self._lock:
+            entry = self.stats.setdefault(endpoint, {'calls': 0, 'injected_429': 0, 'injected_500': 0})
+            entry[field] = entry.get(field, 0) + 1
+
+    def draw(self):
+        """(atraso em segundos, sorteio para 429, sorteio para 500)."""
+        with self._lock:
+            jitter = self._random.uniform(0, self.options['jitter_ms']) if self.options['jitter_ms'] else 0
+            return (self.options['latency_ms'] + jitter) / 1000, self._random.random(), self._random.random()
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._tokens[token] = time.time() + self.options['token_ttl']
+        return token
+
+    def token_state(self, token):
+        """None (válido), 'missing' ou 'expired'."""
+        with self._lock:
+            expiry = self._tokens.get(token)
+        if expiry is None:
+            return 'missing'
+        return 'expired' if time.time() >= expiry else None
+
+    def report(self, workspace_id, report_id):
+        dataset_id = _derived_id('dataset', report_id)
+        return {
+            'id': report_id,
+            'reportType': 'PowerBIReport',
+            'name': _SEED_REPORT_NAMES.get(report_id, f'Report {report_id[:8]}'),
+            'webUrl': f'https://app.powerbi.com/groups/{workspace_id}/reports/{report_id}',
+            'embedUrl': f'https://app.powerbi.com/reportEmbed?reportId={report_id}&groupId={workspace_id}',
+            'isFromPbix': True,
+            'isOwnedByMe': False,
+            'datasetId': dataset_id,
+            'datasetWorkspaceId': workspace_id,
+        }
+
+    def reports(self, workspace_id):
+        if workspace_id == SEED_WORKSPACE_ID:
+            return [self.report(workspace_id, report['id']) for report in SEED_REPORTS]
+        return [
+            self.report(workspace_id, _derived_id(f'report:{workspace_id}', index))
+            for index in range(self.reports_per_workspace)
+        ]
+
+    def has_rls(self, dataset_id):
+        return _fraction(dataset_id) < self.options['rls_ratio']
+
+
+def create_standin_app(args):
+    app = Flask(__name__)
+    standin = _Standin(args)
+    app.config['STANDIN'] = standin
+
+    @app.before_request
+    def inject_faults():
+        if request.path.startswith('/_standin') or request.url_rule is None:
+            return None
+        endpoint = request.url_rule.endpoint
+        standin.count(endpoint)
+        delay, draw_429, draw_500 = standin.draw()
+        if delay:
+            time.sleep(delay)
+        if draw_429 < standin.options['rate_429']:
+            standin.count(endpoint, 'injected_429')
+            response, status = _pbi_error(429, 'TooManyRequests', 'Rate limit exceeded (stand-in)')
+            response.headers['Retry-After'] = str(standin.options['retry_after'])
+            return response, status
+        if draw_500 < standin.options['error_rate']:
+            standin.count(endpoint, 'injected_500')
+            return _pbi_error(500, 'InternalServerError', 'Injected failure (stand-in)')
+        if request.path.startswith('/v1.0/'):
+            header = request.headers.get('Authorization', '')
+            token = header[7:] if header.startswith('Bearer ') else ''
+            state = standin.token_state(token)
+            if state == 'expired':
+                return _pbi_error(403, 'TokenExpired', 'Access token has expired, resubmit with a new access token')
+            if state == 'missing':
+                return _pbi_error(403, 'PowerBINotAuthorizedException')
+        return None
+
+    @app.route('/<tenant>/oauth2/v2.0/token', methods=['POST'])
+    def token(tenant):
+        if request.form.get('grant_type') != 'client_credentials':
+            return jsonify({
+                'error': 'unsupported_grant_type',
+                'error_description': 'AADSTS70003: grant_type must be client_credentials (stand-in)',
+            }), 400
+        if not request.form.get('client_id') or not request.form.get('client_secret'):
+            return jsonify({
+                'error': 'invalid_client',
+                'error_description': 'AADSTS7000216: client_id and client_secret are required (stand-in)',
+            }), 401
+        standin.count('token', 'tokens_issued')
+        return jsonify({
+            'token_type': 'Bearer',
+            'expires_in': standin.options['token_ttl'],
+            'ext_expires_in': standin.options['token_ttl'],
+            'access_token': standin.issue_token(),
+        })
+
+    @app.route('/v1.0/myorg/groups', methods=['GET'])
+    def groups():
+        return jsonify({'value': [
+            {'id': workspace_id, 'isReadOnly': False, 'isOnDedicatedCapacity': True,
+             'name': 'Workspace seed' if workspace_id == SEED_WORKSPACE_ID else f'Workspace {workspace_id[:8]}'}
+            for workspace_id in standin.workspaces
+        ]})
+
+    @app.route('/v1.0/myorg/groups/<workspace_id>/reports', methods=['GET'])
+    def group_reports(workspace_id):
+        if workspace_id not in standin.workspaces:
+            return _pbi_error(404, 'ItemNotFound', f"Couldn't find workspace {workspace_id}")
+        return jsonify({'value': standin.reports(workspace_id)})
+
+    @app.route('/v1.0/myorg/groups/<workspace_id>/reports/<report_id>', methods=['GET'])
+    def group_report(workspace_id, report_id):
+        return jsonify(standin.report(workspace_id, report_id))
+
+    @app.route('/v1.0/myorg/reports/<report_id>', methods=['GET'])
+    def my_report(report_id):
+        return jsonify(standin.report(SEED_WORKSPACE_ID, report_id))
+
+    @app.route('/v1.0/myorg/GenerateToken', methods=['POST'])
+    def generate_token():
+        payload = request.get_json(silent=True) or {}
+        if not payload.get('reports'):
+            return _pbi_error(400, 'InvalidRequest', 'reports is required')
+        dataset_ids = [dataset['id'] for dataset in payload.get('datasets', [])]
+        if payload.get('identities'):
+            for dataset_id in dataset_ids:
+                if not standin.has_rls(dataset_id):
+                    return _pbi_error(
+                        400, 'InvalidRequest',
+                        f"Creating embed token for accessing dataset {dataset_id} shouldn't have effective identity",
+                    )
+        standin.count('generate_token', 'tokens_issued')
+        return jsonify({
+            'token': 'H4sI' + secrets.token_urlsafe(96),
+            'tokenId': str(uuid.uuid4()),
+            'expiration': (datetime.utcnow() + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+
+    @app.route('/_standin/stats', methods=['GET'])
+    def stats():
+        with standin._lock:
+            endpoints = {name: dict(entry) for name, entry in standin.stats.items()}
+        return jsonify({
+            'since': datetime.fromtimestamp(standin.started_at).isoformat(timespec='seconds'),
+            'options': standin.options,
+            'endpoints': endpoints,
+        })
+
+    @app.route('/_standin/reset', methods=['POST'])
+    def reset():
+        standin.reset()
+        return jsonify({'message': 'Estatísticas zeradas'})
+
+    @app.route('/_standin/config', methods=['PATCH'])
+    def update_config():
+        data = request.get_json(silent=True) or {}
+        unknown = sorted(set(data) - set(_RUNTIME_OPTIONS))
+        if unknown:
+            return jsonify({'error': f'Opções desconhecidas: {", ".join(unknown)}'}), 400
+        try:
+            changes = {name: type(standin.options[name])(value) for name, value in data.items()}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Valores inválidos'}), 400
+        with standin._lock:
+            standin.options.update(changes)
+        return jsonify({'options': standin.options})
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stand-in local da API REST do Power BI')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latência fixa por chamada')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='latência extra aleatória (0 a N ms)')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='fração das chamadas respondidas com 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After (segundos) dos 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fração das chamadas respondidas com 500')
+    parser.add_argument('--token-ttl', type=int, default=3599, help='expires_in (segundos) do access token')
+    parser.add_argument('--rls-ratio', type=float, default=0.5,
+                        help='fração dos datasets com RLS (os demais recusam effective identity)')
+    parser.add_argument('--workspaces', type=int, default=1, help='workspaces em /groups (o 1º é o do seed_db.py)')
+    parser.add_argument('--reports-per-workspace', type=int, default=20,
+                        help='reports sintéticos por workspace (o do seed_db.py lista os reports do seed)')
+    parser.add_argument('--seed', type=int, default=42, help='semente dos sorteios de latência e falhas')
+    args = parser.parse_args(argv)
+
+    app = create_standin_app(args)
+    print("🧪 Stand-in do Power BI")
+    print(f"   POWERBI_API_URL=http://{args.host}:{args.port}/v1.0/myorg")
+    print(f"   POWERBI_TOKEN_URL=http://{args.host}:{args.port}/standin-tenant/oauth2/v2.0/token")
+    print(f"   Latência {args.latency_ms:.0f}ms (+{args.jitter_ms:.0f}ms) | 429 {args.rate_429:.0%} | "
+          f"500 {args.error_rate:.0%} | RLS {args.rls_ratio:.0%}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
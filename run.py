@@ -16,6 +16,11 @@ def make_shell_context():
     }
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento: login no Solução 360 antes do tráfego
+    # (no gunicorn, pelo post_fork de gunicorn.conf.py)
+    from app.services.solucao360_service import init_client
+    init_client()
+
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,376 @@
+"""
+Script para subir um stand-in local do Solução 360 (login e fontes de dados)
+Execute: python solucao360_standin.py [--port 5102] [--rows 50000] [--recordings gravacoes/]
+
+Implementa o que o Solucao360Client usa:
+  - POST /seguranca/tokens                          (login email+senha → token)
+  - GET|POST /tools/fontes-dados/<codigo>/executar  (linhas da fonte de dados)
+
+As linhas vêm de uma gravação, se houver `<codigo>_<EmpresaAnoFiscalId>.json`
+ou `<codigo>.json` em --recordings (o corpo é devolvido byte a byte; com --rows,
+as linhas gravadas se repetem até o tamanho pedido), ou são sintéticas e
+determinísticas pela semente, código e ano fiscal, no formato da previsão SSI
+(Produto, NomeProduto, ProducaoJaneiro..ProducaoDezembro com os dois nomes de
+março). O corpo sai em pedaços (--chunk-rows linhas, com --chunk-delay-ms entre
+eles), para exercitar o parse em streaming.
+
+Tokens: a API key (--api-key) e os tokens de login valem nas fontes de dados
+(com --strict-api-key, tokens de login recebem o 400 "Token inválido." da API
+real). Tokens de login expiram em --token-ttl segundos; --expire-rate responde
+401 em uma fração das chamadas e invalida o token, como uma expiração antes da
+hora. Para apontar a aplicação para o stand-in:
+
+    SOLUCAO360_URL=http://localhost:5102
+
+Para gravar uma resposta real (usa as credenciais SOLUCAO360_* do .env):
+
+    python solucao360_standin.py record --codigo CDS_RELORC_OFERTA_004 --recordings gravacoes/
+
+Rotas de controle:
+  - GET   /_standin/stats          chamadas, logins, linhas/bytes servidos e falhas por rota
+  - POST  /_standin/reset          zera as estatísticas
+  - POST  /_standin/expire-tokens  invalida todos os tokens de login emitidos
+  - PATCH /_standin/config         altera latency_ms, jitter_ms, rows, chunk_rows,
+                                   chunk_delay_ms, error_rate, expire_rate ou token_ttl
+"""
+
+import argparse
+import json
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+LOGIN_PATH = '/seguranca/tokens'
+
+_RUNTIME_OPTIONS = (
+    'latency_ms', 'jitter_ms', 'rows', 'chunk_rows', 'chunk_delay_ms',
+    'error_rate', 'expire_rate', 'token_ttl',
+)
+_FILE_CHUNK_SIZE = 64 * 1024
+
+_MONTHS = ('Janeiro', 'Fevereiro', None, 'Abril', 'Maio', 'Junho', 'Julho',
+           'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+# Produtos da previsão SSI: prefixo 103 (entram no filtro do Power Query) e
+# alguns nomes que o filtro exclui
+_NOMES_PRODUTO = (
+    'EXAME CLÍNICO OCUPACIONAL', 'AUDIOMETRIA', 'ESPIROMETRIA', 'ACUIDADE VISUAL',
+    'CONSULTA ODONTOLÓGICA', 'ELETROCARDIOGRAMA', 'HEMOGRAMA COMPLETO',
+    'GINÁSTICA LABORAL', 'QUICK MASSAGE', 'PILATES SOLO',
+    'PCMSO - PROGRAMA DE CONTROLE MÉDICO DE SAÚDE OCUPACIONAL',
+)
+_UNIDADES = ('SESI CAMBONA', 'SESI TABULEIRO', 'SESI CENTRO', 'SESI ARAPIRACA', 'SESI BENEDITO BENTES')
+
+
+def _synthetic_row(rng, index, codigo, empresa_ano_fiscal_id):
+    produto = f"103{rng.randrange(1, 60):03d}" if rng.random() < 0.8 else f"2{rng.randrange(10, 99)}{rng.randrange(100, 999)}"
+    row = {
+        'CodigoOferta': f'{codigo}-{empresa_ano_fiscal_id}-{index}',
+        'Unidade': rng.choice(_UNIDADES),
+        'Produto': produto,
+        'NomeProduto': rng.choice(_NOMES_PRODUTO),
+    }
+    for month in _MONTHS:
+        value = round(rng.uniform(0, 400), 2) if rng.random() < 0.85 else rng.choice((None, ''))
+        if month is not None:
+            row[f'Producao{month}'] = value
+            continue
+        # Março chega como ProducaoMarco, ProducaoMarço ou os dois
+        variant = rng.random()
+        if variant < 0.45:
+            row['ProducaoMarco'] = value
+        elif variant < 0.9:
+            row['ProducaoMarço'] = value
+        else:
+            row['ProducaoMarco'] = value
+            row['ProducaoMarço'] = value
+    return row
+
+
+class _Standin:
+    """Estado do stand-in: opções, tokens emitidos, gravações e estatísticas."""
+
+    def __init__(self, args):
+        self.options = {name: getattr(args, name) for name in _RUNTIME_OPTIONS}
+        self.seed = args.seed
+        self.api_key = args.api_key
+        self.strict_api_key = args.strict_api_key
+        self.recordings = args.recordings
+        self._random = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._recorded_rows = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stats = {}
+
+    def count(self, endpoint, field='calls', amount=1):
+        with self._lock:
+            entry = self.stats.setdefault(endpoint, {'calls': 0})
+            entry[field] = entry.get(field, 0) + amount
+
+    def draw(self):
+        with self._lock:
+            return self._random.random()
+
+    def delay(self):
+        with self._lock:
+            jitter = self._random.uniform(0, self.options['jitter_ms']) if self.options['jitter_ms'] else 0
+        return (self.options['latency_ms'] + jitter) / 1000
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._tokens[token] = time.time() + self.options['token_ttl']
+        return token
+
+    def revoke(self, token=None):
+        with self._lock:
+            if token is None:
+                revoked = len(self._tokens)
+                self._tokens.clear()
+                return revoked
+            return 1 if self._tokens.pop(token, None) else 0
+
+    def token_kind(self, token):
+        """'api_key', 'login', 'expired' ou None (desconhecido)."""
+        if self.api_key and token == self.api_key:
+            return 'api_key'
+        with self._lock:
+            expiry = self._tokens.get(token)
+        if expiry is None:
+            return None
+        return 'login' if time.time() < expiry else 'expired'
+
+    def recording_path(self, codigo, empresa_ano_fiscal_id):
+        if not self.recordings:
+            return None
+        for name in (f'{codigo}_{empresa_ano_fiscal_id}.json', f'{codigo}.json'):
+            path = os.path.join(self.recordings, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def recorded_rows(self, path):
+        with self._lock:
+            rows = self._recorded_rows.get(path)
+        if rows is None:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+            if isinstance(payload, dict):
+                payload = next(
+                    (payload[key] for key in ('data', 'result') if isinstance(payload.get(key), list)), [],
+                )
+            rows = payload
+            with self._lock:
+                self._recorded_rows[path] = rows
+        return rows
+
+
+def _encode_rows(rows, chunk_rows, chunk_delay, on_chunk):
+    """Lista JSON em pedaços de `chunk_rows` linhas, sem montar o corpo inteiro."""
+    yield b'['
+    first, buffer = True, []
+    for row in rows:
+        buffer.append(json.dumps(row, ensure_ascii=False))
+        if len(buffer) >= chunk_rows:
+            data = ('' if first else ',') + ','.join(buffer)
+            first, buffer = False, []
+            on_chunk(chunk_rows)
+            yield data.encode('utf-8')
+            if chunk_delay:
+                time.sleep(chunk_delay)
+    if buffer:
+        on_chunk(len(buffer))
+        yield (('' if first else ',') + ','.join(buffer)).encode('utf-8')
+    yield b']'
+
+
+def create_standin_app(args):
+    app = Flask(__name__)
+    standin = _Standin(args)
+    app.config['STANDIN'] = standin
+
+    @app.before_request
+    def inject_latency():
+        if request.path.startswith('/_standin') or request.url_rule is None:
+            return None
+        standin.count(request.url_rule.endpoint)
+        delay = standin.delay()
+        if delay:
+            time.sleep(delay)
+        return None
+
+    @app.route(LOGIN_PATH, methods=['POST'])
+    def login():
+        data = request.get_json(silent=True) or {}
+        if not request.headers.get('tenant'):
+            return jsonify({'message': 'Tenant não informado.'}), 400
+        if not data.get('email') or not data.get('password'):
+            return jsonify({'message': 'Usuário ou senha inválidos.'}), 401
+        standin.count('login', 'tokens_issued')
+        return jsonify({'token': standin.issue_token(), 'expiresIn': standin.options['token_ttl']})
+
+    @app.route('/tools/fontes-dados/<codigo>/executar', methods=['GET', 'POST'])
+    def executar(codigo):
+        header = request.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else ''
+        kind = standin.token_kind(token)
+        if kind in (None, 'expired'):
+            standin.count('executar', 'unauthorized')
+            return jsonify({'message': 'Token expirado.' if kind else 'Não autorizado.'}), 401
+        if kind == 'login' and standin.strict_api_key:
+            return jsonify({'message': 'Token inválido.'}), 400
+        if kind == 'login' and standin.draw() < standin.options['expire_rate']:
+            standin.revoke(token)
+            standin.count('executar', 'injected_401')
+            return jsonify({'message': 'Token expirado.'}), 401
+        if standin.draw() < standin.options['error_rate']:
+            standin.count('executar', 'injected_500')
+            return jsonify({'message': 'Erro interno (stand-in).'}), 500
+
+        empresa_ano_fiscal_id = request.args.get('EmpresaAnoFiscalId', '')
+        rows_option = standin.options['rows']
+        chunk_rows = max(1, standin.options['chunk_rows'])
+        chunk_delay = standin.options['chunk_delay_ms'] / 1000
+
+        def on_chunk(rows):
+            standin.count('executar', 'rows_served', rows)
+
+        path = standin.recording_path(codigo, empresa_ano_fiscal_id)
+        if path and not rows_option:
+            def replay():
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(_FILE_CHUNK_SIZE), b''):
+                        standin.count('executar', 'bytes_served', len(chunk))
+                        yield chunk
+                        if chunk_delay:
+                            time.sleep(chunk_delay)
+            body = replay()
+        else:
+            if path:
+                recorded = standin.recorded_rows(path)
+                rows = (recorded[index % len(recorded)] for index in range(rows_option if recorded else 0))
+            else:
+                rng = random.Random(f'{standin.seed}:{codigo}:{empresa_ano_fiscal_id}')
+                rows = (
+                    _synthetic_row(rng, index, codigo, empresa_ano_fiscal_id)
+                    for index in range(rows_option)
+                )
+            body = _encode_rows(rows, chunk_rows, chunk_delay, on_chunk)
+
+        return Response(stream_with_context(body), mimetype='application/json')
+
+    @app.route('/_standin/stats', methods=['GET'])
+    def stats():
+        with standin._lock:
+            endpoints = {name: dict(entry) for name, entry in standin.stats.items()}
+            tokens = len(standin._tokens)
+        return jsonify({
+            'since': datetime.fromtimestamp(standin.started_at).isoformat(timespec='seconds'),
+            'options': standin.options,
+            'active_login_tokens': tokens,
+            'endpoints': endpoints,
+        })
+
+    @app.route('/_standin/reset', methods=['POST'])
+    def reset():
+        standin.reset()
+        return jsonify({'message': 'Estatísticas zeradas'})
+
+    @app.route('/_standin/expire-tokens', methods=['POST'])
+    def expire_tokens():
+        return jsonify({'revoked': standin.revoke()})
+
+    @app.route('/_standin/config', methods=['PATCH'])
+    def update_config():
+        data = request.get_json(silent=True) or {}
+        unknown = sorted(set(data) - set(_RUNTIME_OPTIONS))
+        if unknown:
+            return jsonify({'error': f'Opções desconhecidas: {", ".join(unknown)}'}), 400
+        try:
+            changes = {name: type(standin.options[name])(value) for name, value in data.items()}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Valores inválidos'}), 400
+        with standin._lock:
+            standin.options.update(changes)
+        return jsonify({'options': standin.options})
+
+    return app
+
+
+def record(args):
+    """Grava o corpo bruto de uma execução real em <recordings>/<codigo>_<ano>.json."""
+    from app.services.solucao360_service import _empresa_ano_fiscal_id, _get_client
+
+    empresa_ano_fiscal_id = args.empresa_ano_fiscal_id or _empresa_ano_fiscal_id()
+    os.makedirs(args.recordings, exist_ok=True)
+    path = os.path.join(args.recordings, f'{args.codigo}_{empresa_ano_fiscal_id}.json')
+    print(f"🎙️  Gravando {args.codigo} (EmpresaAnoFiscalId={empresa_ano_fiscal_id})...")
+    response = _get_client()._send(
+        args.method, f'/tools/fontes-dados/{args.codigo}/executar',
+        params={'EmpresaAnoFiscalId': empresa_ano_fiscal_id}, stream=True,
+    )
+    size = 0
+    try:
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=_FILE_CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+    finally:
+        response.close()
+    print(f"✅ {size / 1024:.0f} KB gravados em {path}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['record']:
+        parser = argparse.ArgumentParser(description='Grava uma resposta real de fonte de dados do Solução 360')
+        parser.add_argument('--codigo', required=True, help='código da fonte (ex.: CDS_RELORC_OFERTA_004)')
+        parser.add_argument('--empresa-ano-fiscal-id', help='padrão: SOLUCAO360_EMPRESA_ANO_FISCAL_ID')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--recordings', default='gravacoes_solucao360')
+        record(parser.parse_args(argv[1:]))
+        return
+
+    parser = argparse.ArgumentParser(description='Stand-in local do Solução 360')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5102)
+    parser.add_argument('--recordings', help='diretório com gravações <codigo>[_<ano>].json')
+    parser.add_argument('--rows', type=int, default=5000,
+                        help='linhas por execução (sintéticas; com gravação, 0 = corpo gravado como está)')
+    parser.add_argument('--chunk-rows', type=int, default=500, help='linhas por pedaço do corpo')
+    parser.add_argument('--chunk-delay-ms', type=float, default=0.0, help='pausa entre pedaços do corpo')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latência fixa antes da resposta')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='latência extra aleatória (0 a N ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fração das execuções respondidas com 500')
+    parser.add_argument('--expire-rate', type=float, default=0.0,
+                        help='fração das execuções com token de login respondidas com 401 (token invalidado)')
+    parser.add_argument('--token-ttl', type=int, default=3600, help='validade (segundos) dos tokens de login')
+    parser.add_argument('--api-key', default='standin-api-key', help='bearer estático aceito nas fontes de dados')
+    parser.add_argument('--strict-api-key', action='store_true',
+                        help='recusar tokens de login nas fontes de dados (400 "Token inválido.")')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = create_standin_app(args)
+    print("🧪 Stand-in do Solução 360")
+    print(f"   SOLUCAO360_URL=http://{args.host}:{args.port}")
+    print(f"   SOLUCAO360_API_KEY={args.api_key} (ou qualquer SOLUCAO360_EMAIL/SOLUCAO360_PASSWORD)")
+    source = f"gravações em {args.recordings}" if args.recordings else "sintéticas"
+    print(f"   Linhas {source} | {args.rows:,} por execução | latência {args.latency_ms:.0f}ms | "
+          f"500 {args.error_rate:.0%} | 401 {args.expire_rate:.0%}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()